@@ -1,12 +1,20 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, jsonify, request, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 import pymysql
 import os
-import PyPDF2
+import sys
+import time
 import json
-import openai
 from werkzeug.utils import secure_filename
 
+# Gemeinsame Services des Backends: LLM-Gateway (Concurrency-Limit, Rate-Limiting, Retries) und PDF-Extraktion
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.llm_gateway import get_llm_gateway
+from services.pdf_extractor import PDFExtractor
+from services.blob_store import get_blob_store
+from services.file_download import send_stored_file, send_bytes
+from services.dashboard_stats import get_dashboard_stats
+
 app = Flask(__name__)
 CORS(app)
 
@@ -16,9 +24,15 @@ ALLOWED_EXTENSIONS = {'pdf'}
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', 'dein-openai-api-key')  # Setze deinen API-Key
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Hinter nginx/Apache die Datei vom Webserver senden lassen (X-Sendfile)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-openai.api_key = OPENAI_API_KEY
+os.environ.setdefault('OPENAI_API_KEY', OPENAI_API_KEY)
+llm = get_llm_gateway()
+blob_store = get_blob_store()
+
+CHAT_ERROR_MESSAGE = "Es ist ein Fehler bei der Verarbeitung Ihrer Anfrage aufgetreten. Bitte versuchen Sie es später erneut."
 
 
 def get_db_connection():
@@ -31,6 +45,10 @@ def get_db_connection():
     return connection
 
 
+# Vorberechnete Kennzahlen für Dashboard und Chat (Headcount, Skills, Projekte)
+dashboard_stats = get_dashboard_stats(get_db_connection)
+
+
 @app.route('/', methods=['GET'])
 def home():
     return "Welcome to the TalentBridge API"
@@ -114,26 +132,24 @@ def upload_pdf():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Inhaltsadressiert ablegen: eine erneut hochgeladene Datei wird weder geschrieben noch neu extrahiert
+        blob = blob_store.put(file)
+        filepath = blob.path or f"blob:{blob.sha256}"
 
-        # PDF-Text extrahieren
-        text = extract_text_from_pdf(filepath)
+        # PDF-Text extrahieren (bekannte Inhalte aus dem Cache)
+        stored_pdf_text(f"blob:{blob.sha256}")
 
-        # Optional: Speichere die PDF in der Datenbank
+        # Speichere die PDF in der Datenbank (nur Verweis, der Inhalt liegt im Blob-Store)
         connection = get_db_connection()
         cursor = connection.cursor()
 
         try:
-            with open(filepath, 'rb') as pdf_file:
-                pdf_content = pdf_file.read()
-
             # Speichere in der pdf_data Tabelle
             sql = """
             INSERT INTO pdf_data (dateiname, speicherort, inhalt)
-            VALUES (%s, %s, %s)
+            VALUES (%s, %s, NULL)
             """
-            cursor.execute(sql, (filename, filepath, pdf_content))
+            cursor.execute(sql, (filename, filepath))
             connection.commit()
             pdf_id = cursor.lastrowid
 
@@ -144,30 +160,83 @@ def upload_pdf():
                 'success': True,
                 'filename': filename,
                 'pdf_id': pdf_id,
+                'file_hash': blob.sha256,
                 'message': 'PDF erfolgreich hochgeladen und analysiert'
             })
 
         except Exception as e:
             cursor.close()
             connection.close()
+            blob_store.release(blob.sha256)
             return jsonify({'error': str(e)}), 500
 
     return jsonify({'error': 'Ungültiges Dateiformat'}), 400
 
 
-# PDF-Text extrahieren
+# API-Endpunkt für den PDF-Download (Vorschau per Range-Anfragen, ETag/If-None-Match)
+@app.route('/api/pdf/<int:pdf_id>', methods=['GET'])
+def download_pdf(pdf_id):
+    as_attachment = request.args.get('download') == '1'
+    connection = get_db_connection()
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+
+    try:
+        cursor.execute("SELECT dateiname, speicherort FROM pdf_data WHERE id = %s", (pdf_id,))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'error': 'PDF nicht gefunden'}), 404
+
+        try:
+            # Datei wird gestreamt, nicht in den Speicher geladen
+            return send_stored_file(result['speicherort'], download_name=result['dateiname'],
+                                    mimetype='application/pdf', as_attachment=as_attachment)
+        except FileNotFoundError:
+            pass
+
+        # Alte Einträge ohne Datei: Inhalt aus der BLOB-Spalte
+        cursor.execute("SELECT inhalt FROM pdf_data WHERE id = %s", (pdf_id,))
+        inhalt = cursor.fetchone()['inhalt']
+        if not inhalt:
+            return jsonify({'error': 'PDF-Datei nicht gefunden'}), 404
+        return send_bytes(inhalt, result['dateiname'], mimetype='application/pdf', as_attachment=as_attachment)
+    finally:
+        cursor.close()
+        connection.close()
+
+
+# PDF-Text extrahieren (gleiches Backend wie im Backend, siehe PDF_BACKEND)
 def extract_text_from_pdf(pdf_path):
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
+    pages, error = PDFExtractor.extract_pages(pdf_path)
+    if error:
+        app.logger.warning(f"PDF-Extraktion fehlgeschlagen ({pdf_path}): {error}")
+        return ""
+    return "\n".join(pages)
+
+
+# Text einer gespeicherten PDF (speicherort): aus dem Cache des Blob-Stores, sonst extrahieren und cachen
+def stored_pdf_text(speicherort):
+    sha256 = blob_store.resolve(speicherort)
+    if sha256 is None:
+        # Alte Einträge mit Dateipfad außerhalb des Blob-Stores
+        return extract_text_from_pdf(speicherort)
+
+    text = blob_store.get_derived(sha256, 'text')
+    if text is None:
+        try:
+            with blob_store.local_file(sha256) as pdf_path:
+                text = extract_text_from_pdf(pdf_path)
+        except Exception as e:
+            app.logger.warning(f"PDF {speicherort} nicht lesbar: {str(e)}")
+            return ""
+        if text:
+            blob_store.set_derived(sha256, 'text', text)
     return text
 
 
 # API-Endpunkt für KI-Chat
 @app.route('/api/chat', methods=['POST'])
 def chat():
+    started = time.monotonic()
     data = request.json
     message = data.get('message', '')
     history = data.get('history', [])
@@ -176,6 +245,18 @@ def chat():
     if not message:
         return jsonify({'error': 'Keine Nachricht gesendet'}), 400
 
+    # Streaming nur für Clients, die es anfordern (stream=true oder Accept: text/event-stream)
+    if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+        if filename:
+            messages = pdf_context_messages(message, filename)
+        else:
+            messages = db_context_messages(message)
+        return Response(
+            stream_with_context(stream_answer(messages, started)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     # Wenn eine PDF-Datei angegeben ist, verwende den PDF-Kontext
     if filename:
         response = query_with_pdf_context(message, history, filename)
@@ -186,8 +267,90 @@ def chat():
     return jsonify({'response': response})
 
 
+# Statistiken des LLM-Gateways (u.a. Time-to-first-Token)
+@app.route('/api/chat/metrics', methods=['GET'])
+def chat_metrics():
+    return jsonify(llm.stats())
+
+
+# Dashboard-Statistiken: Mitarbeiter je Abteilung, Skill-Verteilung, Anzahl Projekte
+@app.route('/api/dashboard/stats', methods=['GET'])
+def get_dashboard_statistics():
+    try:
+        if request.args.get('refresh') == '1':
+            # Läuft bereits eine Neuberechnung, wird der aktuelle Stand geliefert
+            dashboard_stats.request_refresh()
+        snapshot = dashboard_stats.snapshot()
+    except Exception as e:
+        return jsonify({'error': f'Statistiken konnten nicht berechnet werden: {str(e)}'}), 500
+
+    response = jsonify(snapshot)
+    # Bis zur nächsten Neuberechnung dürfen Browser die Antwort wiederverwenden
+    response.cache_control.max_age = max(0, int(dashboard_stats.refresh_interval - snapshot['age']))
+    return response
+
+
+@app.route('/api/dashboard/stats/metrics', methods=['GET'])
+def dashboard_stats_metrics():
+    return jsonify(dashboard_stats.stats())
+
+
+def chat_messages(prompt):
+    return [
+        {"role": "system", "content": "Du bist ein hilfreicher Assistent für ein Talentmanagementsystem."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+# Vollständige Antwort von OpenAI holen
+def answer(messages):
+    try:
+        return llm.complete(messages, model="gpt-4")
+    except Exception as e:
+        print(f"OpenAI API Fehler: {str(e)}")
+        return CHAT_ERROR_MESSAGE
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# Antwort als Server-Sent Events streamen: "delta"-Events, am Ende "done" mit Metriken
+# (Zeiten ab Eingang der Anfrage, inklusive Aufbau des Kontexts)
+def stream_answer(messages, started):
+    if isinstance(messages, str):
+        # Kein Prompt möglich (z.B. PDF nicht gefunden), Hinweis direkt senden
+        yield sse_event({'delta': messages})
+        yield sse_event({'ttft_ms': 0, 'total_ms': 0}, event='done')
+        return
+
+    ttft_ms = None
+    try:
+        for piece in llm.stream(messages, model="gpt-4"):
+            if ttft_ms is None:
+                ttft_ms = round((time.monotonic() - started) * 1000, 1)
+            yield sse_event({'delta': piece})
+    except Exception as e:
+        print(f"OpenAI API Fehler: {str(e)}")
+        yield sse_event({'error': CHAT_ERROR_MESSAGE}, event='error')
+        return
+
+    total_ms = round((time.monotonic() - started) * 1000, 1)
+    print(f"Chat-Stream: TTFT {ttft_ms} ms, gesamt {total_ms} ms")
+    yield sse_event({'ttft_ms': ttft_ms, 'total_ms': total_ms}, event='done')
+
+
 # PDF-Kontext für die Anfrage verwenden
 def query_with_pdf_context(message, history, filename):
+    messages = pdf_context_messages(message, filename)
+    if isinstance(messages, str):
+        return messages
+    return answer(messages)
+
+
+# Prompt mit PDF-Kontext aufbauen (oder Fehlermeldung als Text)
+def pdf_context_messages(message, filename):
     # Finde die PDF in der Datenbank
     connection = get_db_connection()
     cursor = connection.cursor(pymysql.cursors.DictCursor)
@@ -202,9 +365,8 @@ def query_with_pdf_context(message, history, filename):
     if not result:
         return "Die angegebene PDF-Datei konnte nicht gefunden werden."
 
-    # Extrahiere Text aus der PDF
-    pdf_path = result['speicherort']
-    pdf_text = extract_text_from_pdf(pdf_path)
+    # Text der PDF (beim Upload extrahiert und im Blob-Store gecacht)
+    pdf_text = stored_pdf_text(result['speicherort'])
 
     # Bereite den Prompt für OpenAI vor
     prompt = f"""
@@ -218,23 +380,16 @@ def query_with_pdf_context(message, history, filename):
     Gib eine präzise und hilfreiche Antwort basierend auf den Informationen in der PDF.
     """
 
-    # Sende Anfrage an OpenAI
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Du bist ein hilfreicher Assistent für ein Talentmanagementsystem."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"OpenAI API Fehler: {str(e)}")
-        return "Es ist ein Fehler bei der Verarbeitung Ihrer Anfrage aufgetreten. Bitte versuchen Sie es später erneut."
+    return chat_messages(prompt)
 
 
 # Datenbank-Kontext für die Anfrage verwenden
 def query_with_db_context(message, history):
+    return answer(db_context_messages(message))
+
+
+# Prompt mit Datenbank-Kontext aufbauen
+def db_context_messages(message):
     # Hole relevante Daten aus der Datenbank
     connection = get_db_connection()
     cursor = connection.cursor(pymysql.cursors.DictCursor)
@@ -249,26 +404,21 @@ def query_with_db_context(message, history):
         Gib nur die wichtigsten Suchbegriffe zurück, getrennt durch Kommas. Wenn keine spezifischen Begriffe erkennbar sind, gib 'allgemein' zurück.
         """
 
-        extraction_response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        search_terms = llm.complete(
+            [
                 {"role": "system", "content": "Du bist ein Assistent, der Suchbegriffe extrahiert."},
                 {"role": "user", "content": extraction_prompt}
-            ]
-        )
-
-        search_terms = extraction_response.choices[0].message.content.strip()
+            ],
+            model="gpt-3.5-turbo",
+            timeout=20
+        ).strip()
 
         if search_terms.lower() == 'allgemein':
-            # Hole allgemeine Informationen
-            cursor.execute("SELECT COUNT(*) as count FROM mitarbeiter")
-            employee_count = cursor.fetchone()['count']
-
-            cursor.execute("SELECT COUNT(*) as count FROM abteilungen")
-            department_count = cursor.fetchone()['count']
-
-            cursor.execute("SELECT COUNT(*) as count FROM projekte")
-            project_count = cursor.fetchone()['count']
+            # Allgemeine Informationen aus den vorberechneten Statistiken statt drei COUNT(*)-Abfragen
+            snapshot = dashboard_stats.snapshot()
+            employee_count = snapshot['employees']
+            department_count = snapshot['departments']
+            project_count = snapshot['projects']
 
             db_context = f"""
             Allgemeine Informationen:
@@ -334,19 +484,7 @@ def query_with_db_context(message, history):
     Gib eine präzise und hilfreiche Antwort basierend auf den verfügbaren Informationen.
     """
 
-    # Sende Anfrage an OpenAI
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Du bist ein hilfreicher Assistent für ein Talentmanagementsystem."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"OpenAI API Fehler: {str(e)}")
-        return "Es ist ein Fehler bei der Verarbeitung Ihrer Anfrage aufgetreten. Bitte versuchen Sie es später erneut."
+    return chat_messages(prompt)
 
 
 if __name__ == '__main__':
@@ -1,42 +1,24 @@
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 import mysql.connector
 import os
+import sys
 from datetime import datetime, timedelta
 import random
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from services.cv_pdf import cv_styles
+
 def create_employee_cv(employee_data, output_path):
     doc = SimpleDocTemplate(output_path, pagesize=A4)
-    styles = getSampleStyleSheet()
     story = []
 
-    # Custom Styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        textColor=colors.HexColor('#1a365d')
-    )
-    
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=20,
-        spaceAfter=10,
-        textColor=colors.HexColor('#2c5282')
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=8
-    )
+    # Gemeinsame Styles mit dem Massenexport (services/cv_pdf.py)
+    cv_style = cv_styles()
+    title_style = cv_style['title']
+    section_style = cv_style['section']
+    normal_style = cv_style['normal']
 
     # Header
     story.append(Paragraph(f"{employee_data['vorname']} {employee_data['nachname']}", title_style))
@@ -64,7 +46,7 @@ def create_employee_cv(employee_data, output_path):
     if employee_data['projects']:
         story.append(Paragraph("Projektbeteiligungen", section_style))
         for project in employee_data['projects']:
-            story.append(Paragraph(f"• {project['name']}", styles["Heading3"]))
+            story.append(Paragraph(f"• {project['name']}", cv_style['item']))
             story.append(Paragraph(f"{project['beschreibung']}", normal_style))
             # Zufälliger Projektzeitraum
             start_date = datetime.now() - timedelta(days=random.randint(30, 365))
@@ -76,7 +58,7 @@ def create_employee_cv(employee_data, output_path):
     if employee_data['certificates']:
         story.append(Paragraph("Zertifizierungen", section_style))
         for cert in employee_data['certificates']:
-            story.append(Paragraph(f"• {cert['name'].title()}", styles["Heading3"]))
+            story.append(Paragraph(f"• {cert['name'].title()}", cv_style['item']))
             story.append(Paragraph(f"{cert['beschreibung']}", normal_style))
             # Zufälliges Zertifizierungsdatum
             cert_date = datetime.now() - timedelta(days=random.randint(0, 730))
@@ -86,33 +68,13 @@ def create_employee_cv(employee_data, output_path):
 
 def create_project_documentation(project_data, output_path):
     doc = SimpleDocTemplate(output_path, pagesize=A4)
-    styles = getSampleStyleSheet()
     story = []
 
-    # Custom Styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        textColor=colors.HexColor('#1a365d')
-    )
-    
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=20,
-        spaceAfter=10,
-        textColor=colors.HexColor('#2c5282')
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=8
-    )
+    # Gemeinsame Styles mit dem Massenexport (services/cv_pdf.py)
+    cv_style = cv_styles()
+    title_style = cv_style['title']
+    section_style = cv_style['section']
+    normal_style = cv_style['normal']
 
     # Header
     story.append(Paragraph(f"Projektdokumentation: {project_data['name']}", title_style))
@@ -21,11 +21,16 @@ CREATE TABLE IF NOT EXISTS template_variables (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Versionen als Snapshot ('full') oder Delta zur Vorversion ('delta'), siehe services/document_versions.py
 CREATE TABLE IF NOT EXISTS document_versions (
     id SERIAL PRIMARY KEY,
     document_id INTEGER REFERENCES documents(id),
     version_number INTEGER NOT NULL,
     content TEXT NOT NULL,
+    storage VARCHAR(5) NOT NULL DEFAULT 'full',
+    snapshot_version INTEGER,
+    content_size INTEGER,
+    content_hash CHAR(64),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     created_by INTEGER REFERENCES users(id),
     UNIQUE(document_id, version_number)
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from db.database import db
 from db.schema import create_tables, create_test_user
 from routes.cv_routes import cv_upload_bp
+from routes.auth_routes import resolve_request_tenant
+from services.json_provider import FastJSONProvider
 from logging.handlers import RotatingFileHandler
 
 # Load environment variables
@@ -37,7 +39,10 @@ logger.info('Starting HRMatrix backend...')
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+# Mandant einmal pro Request auflösen (g.tenant), für alle Blueprints
+app.before_request(resolve_request_tenant)
 
 def init_database():
     """Initialize database and create tables"""
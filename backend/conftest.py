@@ -0,0 +1 @@
+# Makes the backend packages (services, routes, ...) importable in tests/ when pytest runs from backend/
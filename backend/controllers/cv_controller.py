@@ -3,9 +3,15 @@ import os
 from werkzeug.utils import secure_filename
 from services.cv_service import CVService
 from db.db_service import get_db_connection
+from services.file_download import send_blob, send_stored_file
+from services.blob_store import get_blob_store
+from services import photo_pipeline
 
 cv_bp = Blueprint('cv', __name__, url_prefix='/api/cv')
 
+# Cache-Dauer für Foto-URLs ohne Version (Sekunden)
+PHOTO_MAX_AGE = int(os.getenv('PHOTO_MAX_AGE', '300'))
+
 # Standard-Endpoint für alle CVs, funktioniert mit beiden URLs:
 # - /api/cv
 # - /api/cv/cvs
@@ -126,7 +132,11 @@ def delete_cv(cv_id):
 
 @cv_bp.route('/employee/<employee_id>/photo', methods=['POST'])
 def upload_photo(employee_id):
-    """Ein Foto für einen Mitarbeiter hochladen"""
+    """Ein Foto für einen Mitarbeiter hochladen
+
+    Das Foto wird geprüft, ohne Metadaten in festen Größen als WebP und JPEG
+    gespeichert; photo_url verweist auf den Blob des hochgeladenen Fotos.
+    """
     tenant_id = request.args.get('tenant_id')
     
     if 'photo' not in request.files:
@@ -137,24 +147,115 @@ def upload_photo(employee_id):
     if file.filename == '':
         return jsonify({"error": "Keine Datei ausgewählt"}), 400
     
+    if not photo_pipeline.available():
+        return jsonify({"error": "Fotoverarbeitung ist nicht verfügbar (Pillow fehlt)"}), 501
+    
     # Datenbankverbindung herstellen
     conn = get_db_connection()
     if not conn:
         return jsonify({"error": "Datenbankverbindung konnte nicht hergestellt werden"}), 500
     
+    pipeline = photo_pipeline.get_photo_pipeline()
+    reference = None
     try:
-        cv_service = CVService(conn)
-        photo_url = cv_service.upload_photo(employee_id, file, tenant_id)
+        cursor = conn.cursor()
+        query = "SELECT photo_url FROM employees WHERE id = %s"
+        params = [employee_id]
+        if tenant_id:
+            query += " AND tenant_id = %s"
+            params.append(tenant_id)
+        cursor.execute(query + " FOR UPDATE", params)
+        result = cursor.fetchone()
+        if not result:
+            cursor.close()
+            return jsonify({"error": "Mitarbeiter nicht gefunden"}), 404
         
-        if not photo_url:
-            return jsonify({"error": "Foto konnte nicht hochgeladen werden"}), 400
+        reference, _ = pipeline.store_photo(file)
+        cursor.execute("UPDATE employees SET photo_url = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                       (reference, employee_id))
+        conn.commit()
+        cursor.close()
         
-        return jsonify({"photoUrl": photo_url})
+        # Das bisherige Foto und seine Größen freigeben (gelöscht, wenn nicht mehr referenziert)
+        if result[0]:
+            pipeline.release_photo(result[0])
+        
+        return jsonify({"photoUrl": _photo_url(employee_id, reference)})
+    except photo_pipeline.PhotoError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
+        conn.rollback()
+        if reference:
+            pipeline.release_photo(reference)
         return jsonify({"error": f"Fehler beim Hochladen des Fotos: {str(e)}"}), 500
     finally:
         conn.close()
 
+def _photo_url(employee_id, reference):
+    """Versionierte Foto-URL: ändert sich mit dem Foto und darf daher unbegrenzt gecacht werden"""
+    version = get_blob_store().resolve(reference)
+    return f"/api/cv/employee/{employee_id}/photo?v={version[:16]}" if version else f"/api/cv/employee/{employee_id}/photo"
+
+@cv_bp.route('/employee/<employee_id>/photo', methods=['GET'])
+def get_photo(employee_id):
+    """Das Foto eines Mitarbeiters streamen
+
+    Query-Parameter: size (sm, md, lg, full; Standard md), format (webp, jpeg;
+    sonst nach Accept-Header). Mit passendem v (siehe upload_photo) ist die
+    Antwort unveränderlich cachebar, sonst kurz mit ETag-Prüfung.
+    """
+    size = request.args.get('size', 'md')
+    fmt = request.args.get('format')
+    if size not in photo_pipeline.SIZES and size != 'full':
+        return jsonify({"error": f"Unbekannte Größe '{size}'"}), 400
+    if fmt and fmt not in photo_pipeline.FORMATS:
+        return jsonify({"error": f"Unbekanntes Format '{fmt}'"}), 400
+    
+    # Datenbankverbindung herstellen
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"error": "Datenbankverbindung konnte nicht hergestellt werden"}), 500
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT photo_url FROM employees WHERE id = %s", (employee_id,))
+        result = cursor.fetchone()
+        cursor.close()
+        
+        if not result or not result[0]:
+            return jsonify({"error": "Kein Foto vorhanden"}), 404
+        
+        reference = result[0]
+        negotiated = fmt is None
+        if negotiated:
+            # Nur Clients, die WebP ausdrücklich nennen (nicht über */*), bekommen WebP
+            fmt = 'webp' if any(value == 'image/webp' for value, _ in request.accept_mimetypes) else 'jpeg'
+        rendition = photo_pipeline.get_photo_pipeline().rendition(reference, size, fmt) \
+            if photo_pipeline.available() else None
+        if rendition:
+            response = send_blob(rendition, f"photo_{employee_id}_{size}.{'jpg' if fmt == 'jpeg' else fmt}",
+                                 photo_pipeline.FORMATS[fmt])
+            if negotiated:
+                response.vary.add('Accept')
+        else:
+            # Fotos aus der Zeit vor der Pipeline werden unverändert ausgeliefert
+            response = send_stored_file(reference)
+        
+        version = request.args.get('v')
+        sha256 = get_blob_store().resolve(reference)
+        if not (version and sha256 and sha256.startswith(version)):
+            # Unversionierte URL zeigt nach einem neuen Upload ein anderes Foto
+            response.cache_control.immutable = False
+            response.cache_control.max_age = PHOTO_MAX_AGE
+        return response
+    except FileNotFoundError:
+        return jsonify({"error": "Foto nicht gefunden"}), 404
+    except Exception as e:
+        return jsonify({"error": f"Fehler beim Abrufen des Fotos: {str(e)}"}), 500
+    finally:
+        conn.close()
+
 @cv_bp.route('/<cv_id>/export/<template_id>', methods=['GET'])
 def export_cv(cv_id, template_id):
     """Einen Lebenslauf mit einer Vorlage exportieren"""
@@ -1,6 +1,7 @@
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import logging
+from services.cv_summary import backfill_summaries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -63,9 +64,40 @@ def init_database():
             )
         """)
         
+        # Summary projection for list and search views (see services/cv_summary.py)
+        cursor.execute("""
+            ALTER TABLE cv_data
+                ADD COLUMN IF NOT EXISTS display_name VARCHAR(255),
+                ADD COLUMN IF NOT EXISTS current_position VARCHAR(255),
+                ADD COLUMN IF NOT EXISTS current_company VARCHAR(255),
+                ADD COLUMN IF NOT EXISTS top_skills TEXT[],
+                ADD COLUMN IF NOT EXISTS skill_count INTEGER,
+                ADD COLUMN IF NOT EXISTS summary_version SMALLINT
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cv_data_user_updated ON cv_data (user_id, updated_at DESC)")
+        
+        # Duplicate detection signatures per CV (see services/dedupe.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cv_fingerprints (
+                cv_id INTEGER PRIMARY KEY REFERENCES cv_data(id) ON DELETE CASCADE,
+                content_hash CHAR(64),
+                text_hash CHAR(64) NOT NULL,
+                minhash BYTEA NOT NULL,
+                simhash BIGINT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         conn.commit()
         logger.info("Tables created successfully.")
         
+        # Summaries of CVs stored before the columns existed; not fatal, the rest is retried on the next start
+        try:
+            backfill_summaries(conn)
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"CV summary backfill failed: {str(e)}")
+        
         cursor.close()
         conn.close()
         
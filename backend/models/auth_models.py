@@ -1,6 +1,7 @@
 import datetime
+import json
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Tuple
 
 # Enumeration für Benutzerrollen
 class UserRole(Enum):
@@ -10,7 +11,89 @@ class UserRole(Enum):
     EMPLOYEE = "employee"
     GUEST = "guest"
 
-class User:
+def _iso(value: Optional[datetime.datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _build_row_mapper(cls):
+    """
+    Erzeugt eine Funktion, die eine Zeile per Tupel-Entpackung auf die Slots verteilt
+    
+    Wie bei collections.namedtuple wird der Code einmal pro Klasse generiert;
+    das ist deutlich schneller als ein setattr-Aufruf pro Spalte.
+    """
+    targets = ", ".join(f"obj.{column}" for column in cls.COLUMNS)
+    source = (
+        "def map_row(row):\n"
+        "    obj = new(cls)\n"
+        f"    {targets}, = row\n"
+        "    return obj\n"
+    )
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec(source, namespace)
+    return namespace['map_row']
+
+class SlotModel:
+    """
+    Basisklasse für kompakte Modelle mit __slots__
+    
+    COLUMNS entspricht der Spaltenreihenfolge der Tabelle, damit Tupel-Zeilen
+    aus psycopg2 ohne Umweg über RealDictRow direkt zugeordnet werden können.
+    """
+    __slots__ = ()
+    COLUMNS: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.COLUMNS:
+            cls._row_mapper = staticmethod(_build_row_mapper(cls))
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]):
+        """Erzeugt ein Objekt aus einer Tupel-Zeile in COLUMNS-Reihenfolge (ohne __init__)"""
+        return cls._row_mapper(row)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> Iterator:
+        """Ordnet Zeilen lazy zu, z.B. direkt aus einem serverseitigen Cursor"""
+        return map(cls.from_row, rows)
+
+    @classmethod
+    def select_columns(cls, alias: Optional[str] = None) -> str:
+        """SELECT-Liste in COLUMNS-Reihenfolge, passend zu from_row"""
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + column for column in cls.COLUMNS)
+
+def iter_json_array(models: Iterable[SlotModel], chunk_size: int = 500, **to_dict_kwargs) -> Iterator[str]:
+    """
+    Serialisiert Modelle stückweise als JSON-Array für gestreamte Antworten
+    
+    Es wird nie die komplette Liste im Speicher aufgebaut, sondern jeweils
+    `chunk_size` Objekte zu einem Textblock zusammengefasst.
+    """
+    yield '['
+    separator = ''
+    chunk = []
+    for model in models:
+        chunk.append(model.to_dict(**to_dict_kwargs))
+        if len(chunk) >= chunk_size:
+            # Ein json.dumps pro Block, die äußeren Klammern werden abgeschnitten
+            yield separator + json.dumps(chunk, default=str)[1:-1]
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + json.dumps(chunk, default=str)[1:-1]
+    yield ']'
+
+class User(SlotModel):
+    __slots__ = (
+        'id', 'tenant_id', 'email', 'password_hash', 'first_name', 'last_name', 'role_id',
+        'is_active', 'is_email_verified', 'last_login', 'created_at', 'updated_at',
+        'employee_id', 'profile_image', 'phone', 'language', 'timezone',
+        'failed_login_attempts', 'account_locked_until', 'reset_password_token',
+        'reset_password_expires', 'email_verification_token', 'email_verification_expires'
+    )
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -76,9 +159,9 @@ class User:
             "role_id": self.role_id,
             "is_active": self.is_active,
             "is_email_verified": self.is_email_verified,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "last_login": self.last_login.isoformat() if self.last_login else None,
+            "created_at": _iso(self.created_at),
+            "updated_at": _iso(self.updated_at),
+            "last_login": _iso(self.last_login),
             "employee_id": self.employee_id,
             "profile_image": self.profile_image,
             "phone": self.phone,
@@ -90,14 +173,22 @@ class User:
         if with_sensitive_data:
             result.update({
                 "failed_login_attempts": self.failed_login_attempts,
-                "account_locked_until": self.account_locked_until.isoformat() if self.account_locked_until else None,
+                "account_locked_until": _iso(self.account_locked_until),
                 "has_reset_token": self.reset_password_token is not None,
                 "has_verification_token": self.email_verification_token is not None
             })
         
         return result
 
-class Tenant:
+class Tenant(SlotModel):
+    __slots__ = (
+        'id', 'name', 'subdomain', 'is_active', 'created_at', 'updated_at', 'max_users',
+        'logo_url', 'primary_color', 'secondary_color', 'subscription_plan',
+        'subscription_expires', 'custom_domain', 'contact_email', 'contact_phone',
+        'address', 'city', 'postal_code', 'country', 'tax_id'
+    )
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -148,14 +239,14 @@ class Tenant:
             "name": self.name,
             "subdomain": self.subdomain,
             "is_active": self.is_active,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "created_at": _iso(self.created_at),
+            "updated_at": _iso(self.updated_at),
             "max_users": self.max_users,
             "logo_url": self.logo_url,
             "primary_color": self.primary_color,
             "secondary_color": self.secondary_color,
             "subscription_plan": self.subscription_plan,
-            "subscription_expires": self.subscription_expires.isoformat() if self.subscription_expires else None,
+            "subscription_expires": _iso(self.subscription_expires),
             "custom_domain": self.custom_domain,
             "contact_email": self.contact_email,
             "contact_phone": self.contact_phone,
@@ -166,7 +257,10 @@ class Tenant:
             "tax_id": self.tax_id
         }
 
-class Role:
+class Role(SlotModel):
+    __slots__ = ('id', 'name', 'description', 'is_system_role')
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -187,7 +281,10 @@ class Role:
             "is_system_role": self.is_system_role
         }
 
-class Permission:
+class Permission(SlotModel):
+    __slots__ = ('id', 'name', 'description', 'module')
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -208,7 +305,10 @@ class Permission:
             "module": self.module
         }
 
-class RolePermission:
+class RolePermission(SlotModel):
+    __slots__ = ('id', 'role_id', 'permission_id')
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -219,7 +319,10 @@ class RolePermission:
         self.role_id = role_id
         self.permission_id = permission_id
 
-class LoginAttempt:
+class LoginAttempt(SlotModel):
+    __slots__ = ('id', 'user_id', 'email', 'ip_address', 'user_agent', 'success', 'timestamp', 'reason')
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -239,8 +342,23 @@ class LoginAttempt:
         self.success = success
         self.timestamp = timestamp or datetime.datetime.now()
         self.reason = reason
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "email": self.email,
+            "ip_address": self.ip_address,
+            "user_agent": self.user_agent,
+            "success": self.success,
+            "timestamp": _iso(self.timestamp),
+            "reason": self.reason
+        }
+
+class TokenBlacklist(SlotModel):
+    __slots__ = ('id', 'token', 'expires_at', 'revoked_by_user_id', 'revoked_at', 'reason')
+    COLUMNS = __slots__
 
-class TokenBlacklist:
     def __init__(
         self,
         id: int = None,
@@ -257,7 +375,13 @@ class TokenBlacklist:
         self.revoked_at = revoked_at or datetime.datetime.now()
         self.reason = reason
 
-class AuditLog:
+class AuditLog(SlotModel):
+    __slots__ = (
+        'id', 'user_id', 'tenant_id', 'action', 'entity_type', 'entity_id',
+        'changes', 'ip_address', 'user_agent', 'timestamp'
+    )
+    COLUMNS = __slots__
+
     def __init__(
         self,
         id: int = None,
@@ -293,5 +417,5 @@ class AuditLog:
             "changes": self.changes,
             "ip_address": self.ip_address,
             "user_agent": self.user_agent,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None
+            "timestamp": _iso(self.timestamp)
         } 
\ No newline at end of file
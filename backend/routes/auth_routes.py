@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context
 import os
 from functools import wraps
 from services import auth_service
@@ -6,6 +6,7 @@ from flask_cors import CORS
 import time
 import traceback
 from services.auth_service import AuthService
+from models.auth_models import iter_json_array
 import logging
 
 # Logging konfigurieren
@@ -25,6 +26,32 @@ CORS(auth_routes,
 def handle_auth_options(path):
     return '', 204
 
+def _subdomain_from_host(host: str):
+    """Ermittelt die Subdomain aus dem Host-Header (z.B. 'acme.hrmatrix.de' -> 'acme')"""
+    hostname = host.split(':')[0]
+    parts = hostname.split('.')
+    if len(parts) < 3 or hostname.replace('.', '').isdigit():
+        return None
+    return parts[0]
+
+def resolve_request_tenant():
+    """Löst den Mandanten einmal pro Request auf und legt ihn in g.tenant ab
+
+    Wird in app.py für die gesamte App registriert (app.before_request), damit
+    der Hook unabhängig davon läuft, welche Blueprints registriert sind.
+    """
+    g.tenant = None
+    if request.method == 'OPTIONS':
+        return
+    
+    subdomain = request.headers.get('X-Tenant-Subdomain') or _subdomain_from_host(request.host)
+    if not subdomain:
+        return
+    
+    result = auth_service.get_tenant_by_subdomain(subdomain)
+    if result['success']:
+        g.tenant = result['tenant']
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -196,10 +223,113 @@ def check_auth(user_id):
 @token_required
 @permission_required('user_read')
 def list_users(user_id, role, tenant_id):
-    offset = request.args.get('offset', 0, type=int)
     limit = request.args.get('limit', 100, type=int)
     
-    result = auth_service.list_users(tenant_id, offset, limit)
+    # Keyset-Pagination, sobald ein Cursor (auch leer für die erste Seite) übergeben wird
+    if 'cursor' in request.args:
+        result = auth_service.list_users_keyset(tenant_id, request.args.get('cursor') or None, limit)
+    else:
+        offset = request.args.get('offset', 0, type=int)
+        result = auth_service.list_users(tenant_id, offset, limit)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 200
+
+@auth_routes.route('/users/export', methods=['GET'])
+@token_required
+@permission_required('user_read')
+def export_users(user_id, role, tenant_id):
+    """Alle Benutzer des Mandanten als gestreamtes JSON-Array"""
+    users = auth_service.iter_tenant_users(tenant_id)
+    return Response(stream_with_context(iter_json_array(users)), mimetype='application/json')
+
+@auth_routes.route('/audit-logs/export', methods=['GET'])
+@token_required
+@permission_required('report_access')
+def export_audit_logs(user_id, role, tenant_id):
+    """Audit-Logs des Mandanten als gestreamtes JSON-Array"""
+    audit_logs = auth_service.iter_audit_logs(tenant_id)
+    return Response(stream_with_context(iter_json_array(audit_logs)), mimetype='application/json')
+
+# Bulk-Verwaltung von Benutzern
+
+@auth_routes.route('/users/bulk', methods=['POST'])
+@token_required
+@permission_required('user_create')
+def bulk_create_users(user_id, role, tenant_id):
+    data = request.json
+    
+    if not data or not isinstance(data.get('users'), list) or 'role_id' not in data:
+        return jsonify({'success': False, 'message': 'Benutzerliste und role_id sind erforderlich!'}), 400
+    
+    result = auth_service.bulk_create_users(tenant_id, data['users'], data['role_id'])
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 201
+
+@auth_routes.route('/users/import', methods=['POST'])
+@token_required
+@permission_required('user_create')
+def import_users(user_id, role, tenant_id):
+    role_id = request.form.get('role_id', type=int)
+    
+    if 'file' not in request.files or not role_id:
+        return jsonify({'success': False, 'message': 'CSV-Datei und role_id sind erforderlich!'}), 400
+    
+    csv_text = request.files['file'].read().decode('utf-8-sig')
+    result = auth_service.import_users_csv(tenant_id, csv_text, role_id)
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 201
+
+@auth_routes.route('/users/bulk', methods=['PUT'])
+@token_required
+@permission_required('user_update')
+def bulk_update_users(user_id, role, tenant_id):
+    data = request.json
+    
+    if not data or not isinstance(data.get('users'), list):
+        return jsonify({'success': False, 'message': 'Benutzerliste ist erforderlich!'}), 400
+    
+    result = auth_service.bulk_update_users(tenant_id, data['users'])
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 200
+
+@auth_routes.route('/users/bulk/deactivate', methods=['POST'])
+@token_required
+@permission_required('user_update')
+def bulk_deactivate_users(user_id, role, tenant_id):
+    data = request.json
+    
+    if not data or not isinstance(data.get('user_ids'), list):
+        return jsonify({'success': False, 'message': 'Benutzer-IDs sind erforderlich!'}), 400
+    
+    result = auth_service.bulk_set_active(tenant_id, data['user_ids'], data.get('is_active', False))
+    
+    if not result['success']:
+        return jsonify(result), 400
+    
+    return jsonify(result), 200
+
+@auth_routes.route('/users/bulk', methods=['DELETE'])
+@token_required
+@permission_required('user_delete')
+def bulk_delete_users(user_id, role, tenant_id):
+    data = request.json
+    
+    if not data or not isinstance(data.get('user_ids'), list):
+        return jsonify({'success': False, 'message': 'Benutzer-IDs sind erforderlich!'}), 400
+    
+    result = auth_service.bulk_delete_users(tenant_id, data['user_ids'])
     
     if not result['success']:
         return jsonify(result), 400
@@ -288,6 +418,10 @@ def get_tenant(user_id, role, tenant_id, id):
     if id != tenant_id and not auth_service.has_permission(user_id, 'tenant_manage'):
         return jsonify({'success': False, 'message': 'Keine Berechtigung!'}), 403
     
+    # Bereits durch die Middleware aufgelöster Mandant
+    if g.get('tenant') and g.tenant['id'] == id:
+        return jsonify({'success': True, 'tenant': g.tenant}), 200
+    
     result = auth_service.get_tenant(id)
     
     if not result['success']:
@@ -324,6 +458,9 @@ def delete_tenant(user_id, role, tenant_id, id):
 
 @auth_routes.route('/tenants/by-subdomain/<subdomain>', methods=['GET'])
 def get_tenant_by_subdomain(subdomain):
+    if g.get('tenant') and g.tenant['subdomain'] == subdomain:
+        return jsonify({'success': True, 'tenant': g.tenant}), 200
+    
     result = auth_service.get_tenant_by_subdomain(subdomain)
     
     if not result['success']:
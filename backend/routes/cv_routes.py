@@ -1,9 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+import io
 import os
+import json
 import logging
+import zipfile
 from werkzeug.utils import secure_filename
 from services.cv_service import CVService
+from services.blob_store import get_blob_store
+from services.file_download import send_blob, send_bytes
+from services.template_engine import TemplateRenderError
+from services import cv_pdf
+from services.bulk_export import create_job, get_job, load_bid_cvs, stream_bid_export
+from services import talent_matching
 from functools import wraps
 import jwt
 
@@ -16,11 +25,11 @@ cv_upload_bp = Blueprint('cv_upload', __name__, url_prefix='/api/cv')
 CORS(cv_upload_bp)
 
 # Konfiguration
-UPLOAD_FOLDER = 'temp'
 ALLOWED_EXTENSIONS = {'pdf'}
 
 # CV Service initialisieren
 cv_service = CVService()
+blob_store = get_blob_store()
 
 def token_required(f):
     @wraps(f)
@@ -60,80 +69,219 @@ def upload_cv(user_id):
     if not allowed_file(file.filename):
         return jsonify({'error': 'Nur PDF-Dateien sind erlaubt'}), 400
 
-    # Stelle sicher, dass der Upload-Ordner existiert
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-    temp_path = None
+    blob = None
     try:
-        # Datei sicher speichern
+        # Datei inhaltsadressiert ablegen: gleiche Datei = gleicher Blob, kein zweites Schreiben
         filename = secure_filename(file.filename)
-        temp_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(temp_path)
-        
-        # CV verarbeiten
-        cv_data = cv_service.process_cv(temp_path)
-        
-        # CV in Datenbank speichern
-        cv_id = cv_service.create_or_update_cv(user_id, {
-            'file_name': filename,
-            'extracted_data': cv_data,
-            'skills': cv_data.get('skills', {}),
-            'projects': cv_data.get('experience', []),
-            'languages': cv_data.get('skills', {}).get('languages', []),
-            'certifications': []  # Optional, falls später benötigt
-        })
+        blob = blob_store.put(file)
+        
+        # CV verarbeiten und speichern; Duplikate werden verknüpft bzw. zusammengeführt
+        with blob_store.local_file(blob.sha256) as pdf_path:
+            result = cv_service.ingest_cv(user_id, pdf_path, filename, content_hash=blob.sha256)
         
-        if not cv_id:
+        if not result['cv_id']:
+            blob_store.release(blob.sha256)
             return jsonify({'error': 'Fehler beim Speichern des CVs'}), 500
         
+        if result['action'] == 'linked':
+            # Kein neuer Datensatz, der den Blob referenziert
+            blob_store.release(blob.sha256)
+        elif result['replaced_hash'] and result['replaced_hash'] != blob.sha256:
+            # Zusammengeführter CV zeigt jetzt auf die neue Datei
+            blob_store.release(result['replaced_hash'])
+        
+        duplicate = result['duplicate']
         return jsonify({
             'success': True,
-            'cv_id': cv_id,
-            'cv_data': cv_data
+            'cv_id': result['cv_id'],
+            'cv_data': result['cv_data'],
+            'file_hash': blob.sha256,
+            'action': result['action'],
+            'duplicate_of': duplicate['cv_id'] if duplicate else None,
+            'duplicate': duplicate
         })
                 
     except Exception as e:
         logger.error(f"Allgemeiner Fehler: {str(e)}")
+        if blob:
+            blob_store.release(blob.sha256)
         return jsonify({'error': f'Serverfehler: {str(e)}'}), 500
-        
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except Exception as e:
-                logger.error(f"Fehler beim Löschen der temporären Datei: {str(e)}")
+
+@cv_upload_bp.route('', methods=['GET'])
+@token_required
+def list_cvs(user_id):
+    """CVs des Benutzers als Zusammenfassung (Name, Position, Top-Skills), neueste zuerst"""
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return jsonify(cv_service.list_cvs(user_id, limit, offset))
 
 @cv_upload_bp.route('/<int:cv_id>', methods=['GET'])
 @token_required
 def get_cv(cv_id, user_id):
     """CV nach ID abrufen"""
-    cv_data = cv_service.get_cv_by_id(cv_id, user_id)
+    cv_data = cv_service.get_cv_by_id(cv_id, user_id, raw_json=True)
     if not cv_data:
         return jsonify({'error': 'CV nicht gefunden'}), 404
         
     return jsonify(cv_data)
 
+@cv_upload_bp.route('/<int:cv_id>/file', methods=['GET'])
+@token_required
+def download_cv_file(cv_id, user_id):
+    """Hochgeladene PDF eines CVs streamen (Range-Anfragen für die Vorschau, ETag = Inhalts-Hash)"""
+    cv_file = cv_service.get_cv_file(cv_id, user_id)
+    if not cv_file:
+        return jsonify({'error': 'Datei nicht gefunden'}), 404
+        
+    try:
+        response = send_blob(cv_file['content_hash'], download_name=cv_file['file_name'],
+                             mimetype='application/pdf',
+                             as_attachment=request.args.get('download') == '1')
+    except FileNotFoundError:
+        return jsonify({'error': 'Datei nicht gefunden'}), 404
+    # Nur für den angemeldeten Benutzer, nicht in geteilten Caches ablegen
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
 @cv_upload_bp.route('/search', methods=['POST'])
 @token_required
 def search_cvs(user_id):
-    """CVs durchsuchen"""
+    """CVs durchsuchen
+
+    Liefert Zusammenfassungen; mit "full": true zusätzlich extracted_data und skills.
+    """
     query = request.json or {}
-    results = cv_service.search_cvs(query)
+    results = cv_service.search_cvs(query, raw_json=True, full=bool(query.get('full')))
     return jsonify(results)
 
+@cv_upload_bp.route('/extraction-metrics', methods=['GET'])
+@token_required
+def extraction_metrics(user_id):
+    """Kennzahlen der gestuften Extraktion (LLM-Aufrufe und eingesparte Tokens)"""
+    return jsonify(cv_service.get_extraction_metrics())
+
 @cv_upload_bp.route('/<int:cv_id>/export', methods=['POST'])
 @token_required
 def export_cv(cv_id, user_id):
-    """CV exportieren"""
-    template_id = request.json.get('template_id')
+    """CV mit einer Vorlage exportieren (format: pdf, html oder docx)"""
+    options = request.json or {}
+    template_id = options.get('template_id')
     if not template_id:
         return jsonify({'error': 'Template-ID fehlt'}), 400
         
-    result = cv_service.export_cv(cv_id, user_id, template_id)
+    try:
+        result = cv_service.export_cv(cv_id, user_id, template_id, options.get('format', 'pdf'))
+    except TemplateRenderError as e:
+        return jsonify({'error': str(e)}), 400
     if not result:
-        return jsonify({'error': 'Export fehlgeschlagen'}), 500
+        return jsonify({'error': 'CV oder Vorlage nicht gefunden'}), 404
+        
+    return send_bytes(result['content'], result['file_name'], mimetype=result['mimetype'], as_attachment=True)
+
+@cv_upload_bp.route('/export', methods=['POST'])
+@token_required
+def export_cvs(user_id):
+    """Mehrere CVs mit einer Vorlage exportieren (parallel gerendert, als ZIP)"""
+    options = request.json or {}
+    template_id = options.get('template_id')
+    cv_ids = options.get('cv_ids') or []
+    if not template_id or not cv_ids:
+        return jsonify({'error': 'Template-ID oder CV-IDs fehlen'}), 400
         
-    return jsonify(result)
+    exports = cv_service.export_cvs(cv_ids, user_id, template_id, options.get('format', 'pdf'))
+    if not exports:
+        return jsonify({'error': 'Vorlage oder CVs nicht gefunden'}), 404
+        
+    buffer = io.BytesIO()
+    errors = {}
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for export in exports:
+            if isinstance(export['content'], TemplateRenderError):
+                errors[export['cv_id']] = str(export['content'])
+            else:
+                archive.writestr(export['file_name'], export['content'])
+        if errors:
+            archive.writestr('errors.json', json.dumps(errors, ensure_ascii=False, indent=2))
+    return send_bytes(buffer.getvalue(), 'cv_export.zip', mimetype='application/zip', as_attachment=True)
+
+@cv_upload_bp.route('/bids/<int:bid_id>/export', methods=['POST'])
+@token_required
+def export_bid_cvs(bid_id, user_id):
+    """Alle angepassten CVs einer Ausschreibung als ZIP streamen (Fortschritt über /export/jobs/<job_id>)"""
+    if not cv_pdf.available():
+        return jsonify({'error': 'PDF-Erzeugung nicht verfügbar (reportlab fehlt)'}), 501
+        
+    conn = cv_service.get_db_connection()
+    try:
+        bid, employees = load_bid_cvs(conn, bid_id)
+    finally:
+        conn.close()
+    if not bid:
+        return jsonify({'error': 'Ausschreibung nicht gefunden'}), 404
+    if not employees:
+        return jsonify({'error': 'Keine CVs für diese Ausschreibung'}), 404
+        
+    job = create_job(bid['titel'], len(employees))
+    subtitle = f"Profil für: {bid['titel']}" + (f" ({bid['kunde']})" if bid.get('kunde') else '')
+    # PDFs werden parallel gerendert und einzeln in den ZIP-Stream geschrieben
+    response = Response(stream_with_context(stream_bid_export(job, employees, subtitle)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f"attachment; filename=ausschreibung_{bid_id}_cvs.zip"
+    response.headers['X-Export-Job'] = job.id
+    response.headers['X-Export-Total'] = str(job.total)
+    return response
+
+@cv_upload_bp.route('/bids/<int:bid_id>/matches', methods=['GET'])
+@token_required
+def match_bid(bid_id, user_id):
+    """Am besten passende Mitarbeiter für eine Ausschreibung (TF-IDF), mit Begründung"""
+    if not talent_matching.available():
+        return jsonify({'error': 'Matching nicht verfügbar (numpy/scipy fehlen)'}), 501
+    k = max(1, min(request.args.get('k', 10, type=int), 100))
+        
+    conn = cv_service.get_db_connection()
+    try:
+        posting, team_members = talent_matching.load_posting(conn, bid_id)
+    finally:
+        conn.close()
+    if not posting:
+        return jsonify({'error': 'Ausschreibung nicht gefunden'}), 404
+        
+    matcher = talent_matching.get_talent_matcher(cv_service.get_db_connection)
+    return jsonify({'ausschreibung_id': bid_id, 'matches': matcher.match(posting, k, team_members)})
+
+@cv_upload_bp.route('/matches', methods=['POST'])
+@token_required
+def match_posting(user_id):
+    """Mitarbeiter für frei angegebene Anforderungen finden (titel, beschreibung, anforderungen, k)"""
+    if not talent_matching.available():
+        return jsonify({'error': 'Matching nicht verfügbar (numpy/scipy fehlen)'}), 501
+    posting = request.json or {}
+    if not isinstance(posting, dict):
+        return jsonify({'error': 'Ungültige Anfrage'}), 400
+    requirements = posting.get('anforderungen') or []
+    if not isinstance(requirements, list) or not all(isinstance(item, str) for item in requirements):
+        return jsonify({'error': 'anforderungen muss eine Liste von Texten sein'}), 400
+    if not all(isinstance(posting.get(key) or '', str) for key in ('titel', 'beschreibung')):
+        return jsonify({'error': 'titel und beschreibung müssen Texte sein'}), 400
+    if not (posting.get('anforderungen') or posting.get('titel') or posting.get('beschreibung')):
+        return jsonify({'error': 'Keine Anforderungen angegeben'}), 400
+    try:
+        k = max(1, min(int(posting.get('k') or 10), 100))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k muss eine Zahl sein'}), 400
+        
+    matcher = talent_matching.get_talent_matcher(cv_service.get_db_connection)
+    return jsonify({'matches': matcher.match(posting, k)})
+
+@cv_upload_bp.route('/export/jobs/<job_id>', methods=['GET'])
+@token_required
+def export_job_status(job_id, user_id):
+    """Fortschritt eines Massenexports"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export-Job nicht gefunden'}), 404
+    return jsonify(job.to_dict())
 
 @cv_upload_bp.route('/<int:cv_id>', methods=['PUT'])
 @token_required
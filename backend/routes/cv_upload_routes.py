@@ -1,12 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_cors import CORS
-import os
-import tempfile
 from werkzeug.utils import secure_filename
 import logging
 from services.cv_service import CVService
 from db.db_service import get_db_connection
-from ollama_extraction import OllamaExtractor
+from services.ollama_extractor import OllamaExtractor
+from services.blob_store import get_blob_store
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO)
@@ -26,8 +25,12 @@ CORS(cv_upload_bp,
 # CV-Service für Datenbankoperationen
 cv_service = CVService()
 
-# Ollama-Extraktor für KI-Extraktion
-extractor = OllamaExtractor(model="mistral")
+# Ollama-Extraktor für KI-Extraktion (Modell über OLLAMA_MODEL, Standard: mistral)
+# Das Modell wird beim Start im Hintergrund geladen und per keep_alive im Speicher gehalten
+extractor = OllamaExtractor()
+
+# Inhaltsadressierter Speicher für hochgeladene Dateien
+blob_store = get_blob_store()
 
 # Erlaubte Dateitypen für den Upload
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
@@ -36,6 +39,18 @@ def allowed_file(filename):
     """Überprüft, ob die Datei einen erlaubten Dateityp hat"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def extract_blob(blob):
+    """Extrahiert die Daten einer abgelegten Datei, bekannte Inhalte kommen aus dem Cache"""
+    cached = blob_store.get_derived(blob.sha256, 'ollama_extraction')
+    if cached is not None:
+        logger.info(f"Extraktion aus dem Cache: {blob.sha256}")
+        return cached
+    with blob_store.local_file(blob.sha256) as path:
+        result = extractor.extract_from_file(path)
+    if 'error' not in result:
+        blob_store.set_derived(blob.sha256, 'ollama_extraction', result)
+    return result
+
 # OPTIONS-Handler für CORS-Preflight-Anfragen
 @cv_upload_bp.route('/upload', methods=['OPTIONS'])
 @cv_upload_bp.route('/extract-preview', methods=['OPTIONS'])
@@ -77,52 +92,53 @@ def upload_cv():
             'message': 'Nicht unterstütztes Dateiformat. Erlaubte Formate: ' + ', '.join(ALLOWED_EXTENSIONS)
         }), 400
     
+    blob = None
     try:
-        # Speichere die Datei temporär
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            logger.info(f"Datei temporär gespeichert: {temp_file.name}")
-            
-            # Extrahiere Daten mit Ollama
-            extraction_result = extractor.extract_from_file(temp_file.name)
-            logger.info(f"Extraktion abgeschlossen: {extraction_result is not None}")
-            
-            if 'error' in extraction_result:
-                logger.error(f"Fehler bei der Extraktion: {extraction_result['error']}")
-                return jsonify({
-                    'success': False,
-                    'message': f"Fehler bei der Extraktion: {extraction_result['error']}"
-                }), 500
-            
-            # Hole Mandanten-ID aus dem Formular oder setze Default
-            tenant_id = request.form.get('tenant_id', '1')  # Default ist Mandant 1
-            
-            # Erstelle einen neuen Mitarbeiter und CV in der Datenbank
-            result = cv_service.create_cv_from_extracted_data(
-                extracted_data=extraction_result, 
-                tenant_id=tenant_id, 
-                filename=secure_filename(file.filename)
-            )
-            
-            # Lösche die temporäre Datei
-            os.unlink(temp_file.name)
-            logger.info("Temporäre Datei gelöscht")
-            
-            if result['success']:
-                return jsonify({
-                    'success': True,
-                    'message': 'Lebenslauf erfolgreich verarbeitet',
-                    'cv_id': result.get('cv_id'),
-                    'employee_id': result.get('employee_id')
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'message': result.get('message', 'Fehler beim Speichern des Lebenslaufs')
-                }), 500
+        # Datei inhaltsadressiert ablegen (gleiche Datei wird nur einmal gespeichert)
+        blob = blob_store.put(file)
+        logger.info(f"Datei abgelegt: {blob.sha256} ({'neu' if blob.new else 'bereits vorhanden'})")
+        
+        # Extrahiere Daten mit Ollama
+        extraction_result = extract_blob(blob)
+        logger.info(f"Extraktion abgeschlossen: {extraction_result is not None}")
+        
+        if 'error' in extraction_result:
+            logger.error(f"Fehler bei der Extraktion: {extraction_result['error']}")
+            blob_store.release(blob.sha256)
+            return jsonify({
+                'success': False,
+                'message': f"Fehler bei der Extraktion: {extraction_result['error']}"
+            }), 500
+        
+        # Hole Mandanten-ID aus dem Formular oder setze Default
+        tenant_id = request.form.get('tenant_id', '1')  # Default ist Mandant 1
+        
+        # Erstelle einen neuen Mitarbeiter und CV in der Datenbank
+        result = cv_service.create_cv_from_extracted_data(
+            extracted_data=extraction_result, 
+            tenant_id=tenant_id, 
+            filename=secure_filename(file.filename)
+        )
+        
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'message': 'Lebenslauf erfolgreich verarbeitet',
+                'cv_id': result.get('cv_id'),
+                'employee_id': result.get('employee_id'),
+                'file_hash': blob.sha256
+            })
+        else:
+            blob_store.release(blob.sha256)
+            return jsonify({
+                'success': False,
+                'message': result.get('message', 'Fehler beim Speichern des Lebenslaufs')
+            }), 500
                 
     except Exception as e:
         logger.exception(f"Fehler beim Verarbeiten des Lebenslaufs: {str(e)}")
+        if blob:
+            blob_store.release(blob.sha256)
         return jsonify({
             'success': False,
             'message': f'Ein Fehler ist aufgetreten: {str(e)}'
@@ -164,36 +180,32 @@ def extract_preview():
         }), 400
     
     try:
-        # Speichere die Datei temporär
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            logger.info(f"Datei temporär gespeichert: {temp_file.name}")
-            
-            # Extrahiere Daten mit Ollama
+        # Datei ablegen; bekannte Inhalte kommen aus dem Extraktions-Cache
+        blob = blob_store.put(file)
+        try:
             logger.info("Starte Extraktion mit Ollama...")
-            extraction_result = extractor.extract_from_file(temp_file.name)
+            extraction_result = extract_blob(blob)
             logger.info(f"Extraktion abgeschlossen: {extraction_result is not None}")
-            
-            # Lösche die temporäre Datei
-            os.unlink(temp_file.name)
-            logger.info("Temporäre Datei gelöscht")
-            
-            if 'error' in extraction_result:
-                logger.error(f"Fehler bei der Extraktion: {extraction_result['error']}")
-                return jsonify({
-                    'success': False,
-                    'message': f"Fehler bei der Extraktion: {extraction_result['error']}"
-                }), 500
-            
-            # Extrahiere einen kurzen Text aus der Datei für die Vorschau (dies könnte verbessert werden)
-            text_sample = "Textvorschau nicht verfügbar"
-            
+        finally:
+            # Die Vorschau speichert nichts, die Referenz wird sofort freigegeben
+            blob_store.release(blob.sha256)
+        
+        if 'error' in extraction_result:
+            logger.error(f"Fehler bei der Extraktion: {extraction_result['error']}")
             return jsonify({
-                'success': True,
-                'message': 'Daten erfolgreich extrahiert',
-                'extracted_data': extraction_result,
-                'text_sample': text_sample
-            })
+                'success': False,
+                'message': f"Fehler bei der Extraktion: {extraction_result['error']}"
+            }), 500
+        
+        # Extrahiere einen kurzen Text aus der Datei für die Vorschau (dies könnte verbessert werden)
+        text_sample = "Textvorschau nicht verfügbar"
+        
+        return jsonify({
+            'success': True,
+            'message': 'Daten erfolgreich extrahiert',
+            'extracted_data': extraction_result,
+            'text_sample': text_sample
+        })
                 
     except Exception as e:
         logger.exception(f"Fehler bei der Vorschau-Extraktion: {str(e)}")
@@ -1,19 +1,48 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
-import os
 from services.pdf_extractor import PDFExtractor
+from services.pdf_layout import sections_to_text
+from services.blob_store import get_blob_store
 import logging
 
 pdf_bp = Blueprint('pdf', __name__)
 logger = logging.getLogger(__name__)
 
 # Konfiguration
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
+blob_store = get_blob_store()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def extract_file(filepath):
+    """Extrahiert Text (oder mit mode=layout Abschnitte) aus einer abgelegten PDF"""
+    extractor = PDFExtractor()
+    if not extractor.is_valid_pdf(filepath):
+        return jsonify({'error': 'Ungültige PDF-Datei'}), 400
+        
+    # mode=layout liefert Abschnitte mit Überschriften statt Fließtext
+    if request.values.get('mode') == 'layout':
+        sections, error = extractor.extract_layout(filepath)
+        if error:
+            return jsonify({'error': 'Konnte keinen Text aus der PDF extrahieren'}), 400
+        text = sections_to_text(sections)
+        return jsonify({
+            'success': True,
+            'text': text,
+            'length': len(text),
+            'sections': [section.to_dict() for section in sections]
+        })
+        
+    text, error = extractor.extract_text(filepath)
+    if text is None:
+        return jsonify({'error': 'Konnte keinen Text aus der PDF extrahieren'}), 400
+        
+    return jsonify({
+        'success': True,
+        'text': text,
+        'length': len(text)
+    })
+
 @pdf_bp.route('/extract', methods=['POST'])
 def extract_pdf():
     """
@@ -32,35 +61,13 @@ def extract_pdf():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Nur PDF-Dateien erlaubt'}), 400
             
-        # Sichere die Datei
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        
-        # Stelle sicher dass der Upload-Ordner existiert
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        
-        # Speichere die Datei
-        file.save(filepath)
-        
-        # Extrahiere Text
-        extractor = PDFExtractor()
-        if not extractor.is_valid_pdf(filepath):
-            os.remove(filepath)
-            return jsonify({'error': 'Ungültige PDF-Datei'}), 400
-            
-        text = extractor.extract_text(filepath)
-        
-        # Lösche die temporäre Datei
-        os.remove(filepath)
-        
-        if text is None:
-            return jsonify({'error': 'Konnte keinen Text aus der PDF extrahieren'}), 400
-            
-        return jsonify({
-            'success': True,
-            'text': text,
-            'length': len(text)
-        })
+        # Datei im Blob-Store ablegen; die Test-Route behält sie nicht
+        blob = blob_store.put(file)
+        try:
+            with blob_store.local_file(blob.sha256) as filepath:
+                return extract_file(filepath)
+        finally:
+            blob_store.release(blob.sha256)
         
     except Exception as e:
         logger.error(f"Fehler bei der PDF-Verarbeitung: {str(e)}")
@@ -1,19 +1,17 @@
 from flask import Blueprint, request, jsonify
 from services.workflow_service import WorkflowService
+from services.blob_store import get_blob_store
+from services.file_download import send_stored_file
 import logging
 from werkzeug.utils import secure_filename
-import os
-import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 workflow_bp = Blueprint('workflow', __name__, url_prefix='/api/workflow')
 
-# Pfad für Uploads
-UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads', 'workflow_attachments')
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Anhänge liegen im inhaltsadressierten Blob-Store
+blob_store = get_blob_store()
 
 def get_db_connection():
     from app import get_db_connection as get_conn
@@ -226,13 +224,9 @@ def add_task_attachment(task_id):
         if file.filename == '':
             return jsonify({'error': 'Keine Datei ausgewählt'}), 400
         
-        # Erstelle eindeutigen Dateinamen
+        # Datei inhaltsadressiert speichern: derselbe Anhang an mehreren Tasks liegt nur einmal vor
         filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-        
-        # Speichere Datei
-        file.save(file_path)
+        blob = blob_store.put(file)
         
         # Erstelle Attachment-Eintrag in der Datenbank
         conn = get_db_connection()
@@ -240,27 +234,58 @@ def add_task_attachment(task_id):
         
         attachment_data = {
             'file_name': filename,
-            'file_path': file_path,
+            'file_path': blob.path or f"blob:{blob.sha256}",
             'file_type': file.content_type,
-            'file_size': os.path.getsize(file_path),
+            'file_size': blob.size,
             'uploaded_by': request.form.get('user_id')
         }
         
-        attachment_id = workflow_service.add_task_attachment(task_id, attachment_data)
-        
-        if conn:
-            conn.close()
+        try:
+            attachment_id = workflow_service.add_task_attachment(task_id, attachment_data)
+        except Exception:
+            blob_store.release(blob.sha256)
+            raise
+        finally:
+            if conn:
+                conn.close()
         
         return jsonify({
             'id': attachment_id,
             'file_name': filename,
-            'file_path': file_path,
+            'file_path': attachment_data['file_path'],
+            'file_hash': blob.sha256,
             'message': 'Anhang erfolgreich hochgeladen'
         }), 201
     except Exception as e:
         logger.error(f"Fehler beim Hochladen des Anhangs für Task {task_id}: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@workflow_bp.route('/attachments/<int:attachment_id>', methods=['GET'])
+def download_task_attachment(attachment_id):
+    """Streamt einen Anhang von der Platte (Range-Anfragen, ETag, langes Caching bei Blobs)."""
+    try:
+        conn = get_db_connection()
+        workflow_service = WorkflowService(conn)
+        attachment = workflow_service.get_task_attachment(attachment_id)
+        
+        if conn:
+            conn.close()
+        
+        if not attachment:
+            return jsonify({'error': 'Anhang nicht gefunden'}), 404
+        
+        return send_stored_file(
+            attachment['file_path'],
+            download_name=attachment['file_name'],
+            mimetype=attachment.get('file_type'),
+            as_attachment=request.args.get('download') == '1'
+        )
+    except FileNotFoundError:
+        return jsonify({'error': 'Datei des Anhangs nicht gefunden'}), 404
+    except Exception as e:
+        logger.error(f"Fehler beim Herunterladen des Anhangs {attachment_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @workflow_bp.route('/user/<int:user_id>/tasks', methods=['GET'])
 def get_user_tasks(user_id):
     """Ruft alle Tasks eines Benutzers ab."""
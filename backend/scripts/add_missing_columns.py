@@ -35,7 +35,11 @@ def add_missing_columns():
             ("projekterfahrungen", "end_datum", "DATE", None, True),
             ("weiterbildungen", "titel", "VARCHAR(255)", None, False),
             ("weiterbildungen", "beschreibung", "TEXT", None, True),
-            ("weiterbildungen", "datum", "DATE", None, True)
+            ("weiterbildungen", "datum", "DATE", None, True),
+            ("document_versions", "storage", "VARCHAR(5)", "'full'", True),
+            ("document_versions", "snapshot_version", "INTEGER", None, False),
+            ("document_versions", "content_size", "INTEGER", None, False),
+            ("document_versions", "content_hash", "CHAR(64)", None, False)
         ]
         
         print("\nFüge fehlende Spalten hinzu:")
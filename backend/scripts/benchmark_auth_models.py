@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import datetime
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.auth_models import User, AuditLog, iter_json_array
+
+ROW_COUNT = 100_000
+
+def make_user_rows(count):
+    """Generate user rows as tuples in User.COLUMNS order"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        (
+            i, 1, f"user{i}@example.com", "$2b$12$hash", f"Vorname{i}", f"Nachname{i}", 4,
+            True, True, now, now, now, None, None, None, "de", "Europe/Berlin",
+            0, None, None, None, None, None
+        )
+        for i in range(count)
+    ]
+
+def make_audit_rows(count):
+    """Generate audit log rows as tuples in AuditLog.COLUMNS order"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        (i, i % 500, 1, "update", "user", i, {"field": "is_active"}, "10.0.0.1", "Mozilla/5.0", now)
+        for i in range(count)
+    ]
+
+def measure(label, func):
+    """Run func and print wall time and peak traced memory (measured in a second run)"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows execution down considerably, so memory gets its own run
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<45} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:8.1f} MiB")
+    return result
+
+def benchmark(model, rows):
+    columns = model.COLUMNS
+    dict_rows = [dict(zip(columns, row)) for row in rows]
+
+    print(f"\n{model.__name__}: {len(rows)} rows")
+
+    # Construction: RealDictRow-style dicts via __init__ vs. tuples via from_row
+    measure("construct from dict rows (__init__)", lambda: [model(**row) for row in dict_rows])
+    objects = measure("construct from tuple rows (from_row)", lambda: list(model.from_rows(rows)))
+
+    # Memory held by the materialized objects
+    tracemalloc.start()
+    retained = list(model.from_rows(rows))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {'retained memory of slot objects':<45} {current / 1024 / 1024:9.1f} MiB")
+    del retained
+
+    tracemalloc.start()
+    retained = [dict(row) for row in dict_rows]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {'retained memory of dict rows':<45} {current / 1024 / 1024:9.1f} MiB")
+    del retained
+
+    # Serialization: one big json.dumps vs. chunked streaming
+    measure("serialize list with json.dumps", lambda: json.dumps([obj.to_dict() for obj in objects], default=str))
+    measure("serialize via iter_json_array (streamed)", lambda: sum(len(chunk) for chunk in iter_json_array(model.from_rows(rows))))
+
+def main():
+    print("=== Auth model benchmark ===")
+    benchmark(User, make_user_rows(ROW_COUNT))
+    benchmark(AuditLog, make_audit_rows(ROW_COUNT))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_provider import RawJSON, dumps_bytes, _USE_ORJSON
+
+ROW_COUNT = 20_000
+REPEAT = 3
+
+def make_extracted_data(i):
+    """Build a CV document shaped like the extractor output"""
+    return {
+        "personal_info": {"name": f"Kandidat {i}", "email": f"kandidat{i}@example.com", "phone": "+49 30 1234567"},
+        "summary": "Erfahrener Softwareentwickler mit Schwerpunkt Backend und Datenverarbeitung. " * 3,
+        "work_experience": [
+            {"company": f"Firma {j}", "position": "Entwickler", "start_date": "2019-01", "end_date": "2023-06",
+             "description": "Entwicklung und Betrieb von Microservices in Python und Go."}
+            for j in range(4)
+        ],
+        "education": [{"institution": "TU Berlin", "degree": "M.Sc. Informatik", "year": "2018"}],
+    }
+
+def make_rows(count):
+    """Rows as psycopg2 returns them: decoded JSONB and the same JSONB fetched as ::text"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    decoded, raw = [], []
+    for i in range(count):
+        extracted = make_extracted_data(i)
+        skills = ["Python", "SQL", "Docker", "Kubernetes", f"Skill{i % 50}"]
+        decoded.append((i, f"cv_{i}.pdf", extracted, skills, now, now))
+        raw.append((i, f"cv_{i}.pdf", json.dumps(extracted), json.dumps(skills), now, now))
+    return decoded, raw
+
+def previous_response(rows):
+    """Field-by-field reshaping with isoformat() and the stdlib encoder"""
+    data = [{
+        'id': row[0],
+        'file_name': row[1],
+        'extracted_data': row[2],
+        'skills': row[3],
+        'created_at': row[4].isoformat(),
+        'updated_at': row[5].isoformat()
+    } for row in rows]
+    return json.dumps(data).encode('utf-8')
+
+def provider_response(rows):
+    """Decoded JSONB serialized by the configured provider"""
+    columns = ('id', 'file_name', 'extracted_data', 'skills', 'created_at', 'updated_at')
+    return dumps_bytes([dict(zip(columns, row)) for row in rows])
+
+def provider_raw_response(rows):
+    """JSONB passed through as RawJSON without decode/re-encode"""
+    columns = ('id', 'file_name', 'extracted_data', 'skills', 'created_at', 'updated_at')
+    data = []
+    for row in rows:
+        item = dict(zip(columns, row))
+        item['extracted_data'] = RawJSON(item['extracted_data'])
+        item['skills'] = RawJSON(item['skills'])
+        data.append(item)
+    return dumps_bytes(data)
+
+def measure(label, func, rows):
+    """Best of REPEAT runs"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        body = func(rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<45} {best * 1000:9.1f} ms   {len(body) / 1024 / 1024:6.1f} MiB")
+
+def main():
+    print("=== JSON provider benchmark ===")
+    print(f"Encoder: {'orjson' if _USE_ORJSON else 'stdlib json'}, {ROW_COUNT} CVs")
+    decoded, raw = make_rows(ROW_COUNT)
+    measure("stdlib json + isoformat() reshaping", previous_response, decoded)
+    measure("FastJSONProvider (decoded JSONB)", provider_response, decoded)
+    measure("FastJSONProvider (raw JSONB pass-through)", provider_raw_response, raw)
+
+if __name__ == '__main__':
+    main()
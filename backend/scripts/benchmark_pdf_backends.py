@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import glob
+import logging
+import argparse
+import multiprocessing
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_backends import get_pdf_backend, available_backends, PyMuPDFBackend
+
+try:
+    import resource
+except ImportError:  # Windows: no peak memory figures
+    resource = None
+
+PDF_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend', 'public', 'pdfs')
+REPEAT = 3
+
+def peak_rss_mib():
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def run_backend(name, paths):
+    """Extract all PDFs with one backend (in a fresh process, so memory is not shared)"""
+    logging.disable(logging.INFO)
+    backend = get_pdf_backend(name)
+    rss_before = peak_rss_mib()
+    best, texts = None, None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        texts = ["\n".join(backend.extract_pages(path)) for path in paths]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'texts': texts, 'peak_rss_mib': peak_rss_mib() - rss_before}
+
+def word_f1(text, reference):
+    """Word overlap with the reference text (bag of words)"""
+    words, expected = Counter(text.split()), Counter(reference.split())
+    common = sum((words & expected).values())
+    if not common:
+        return 0.0
+    precision, recall = common / sum(words.values()), common / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF extraction backends")
+    parser.add_argument('--pdfs', default=PDF_ROOT, help="Folder with PDFs (searched recursively)")
+    parser.add_argument('--backends', nargs='*', default=available_backends())
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.pdfs, '**', '*.pdf'), recursive=True))
+    if not paths:
+        print(f"No PDFs found under {args.pdfs}")
+        return
+    backends = list(dict.fromkeys([PyMuPDFBackend.name] + args.backends))
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in backends:
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_backend, (name, paths))
+
+    reference = results[PyMuPDFBackend.name]['texts']
+    reference_lines = sum(text.count('\n') for text in reference)
+    print("=== PDF backend benchmark ===")
+    print(f"{len(paths)} PDFs under {os.path.normpath(args.pdfs)}, best of {REPEAT} runs, "
+          f"fidelity against {PyMuPDFBackend.name}")
+    print(f"  {'backend':<16} {'ms/PDF':>8} {'PDFs/s':>8} {'peak MiB':>9} {'word F1':>8} {'lines':>7}")
+    for name, result in results.items():
+        texts = result['texts']
+        f1 = sum(word_f1(text, ref) for text, ref in zip(texts, reference)) / len(paths)
+        lines = sum(text.count('\n') for text in texts) / reference_lines if reference_lines else 0.0
+        print(f"  {name:<16} {result['seconds'] * 1000 / len(paths):8.2f} {len(paths) / result['seconds']:8.1f} "
+              f"{result['peak_rss_mib']:9.1f} {f1:8.3f} {lines:6.2f}x")
+
+if __name__ == "__main__":
+    main()
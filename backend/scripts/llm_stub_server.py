@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local stand-in for an OpenAI-compatible chat completion API.
+#
+#   python scripts/llm_stub_server.py --port 8089 --latency 0.5 --fail-first 2
+#   LLM_BASE_URL=http://localhost:8089/v1 python app.py
+#
+# GET /stats returns the number of requests received, e.g. to check that the
+# gateway coalesces identical requests and retries after injected failures,
+# and the most requests that were in flight at the same time (concurrency caps).
+#
+# The Ollama API (/api/chat, /api/generate, /api/tags) is served as well:
+#
+#   OLLAMA_BASE_URL=http://localhost:8089 python app.py
+#
+# The first request for a model waits --load-time seconds (a cold model load),
+# later ones only if the model was idle for longer than the request's keep_alive.
+
+STATS = {'requests': 0, 'failed': 0, 'model_loads': 0, 'in_flight': 0, 'max_in_flight': 0}
+STATS_LOCK = threading.Lock()
+
+# Ollama models currently "in memory": name -> unload time
+LOADED = {}
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def keep_alive_seconds(value):
+    """Ollama keep_alive ("5m", "30s", seconds as number, -1 = forever)"""
+    if value is None:
+        return 300
+    if isinstance(value, (int, float)):
+        return float('inf') if value < 0 else value
+    for unit in sorted(DURATION_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return float(value[:-len(unit)]) * DURATION_UNITS[unit]
+    return float(value)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'LLMStub/1.0'
+
+    def log_message(self, format, *args):
+        if not self.server.options.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            with STATS_LOCK:
+                return self._send_json(200, dict(STATS))
+        if self.path.rstrip('/') == '/api/tags':
+            return self._send_json(200, {'models': [{'name': 'mistral:latest'}, {'name': 'stub:latest'}]})
+        self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        with STATS_LOCK:
+            STATS['in_flight'] += 1
+            STATS['max_in_flight'] = max(STATS['max_in_flight'], STATS['in_flight'])
+        try:
+            if self.path.rstrip('/') in ('/api/chat', '/api/generate'):
+                return self._ollama()
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                return self._send_json(404, {'error': 'not found'})
+            return self._chat_completion()
+        finally:
+            with STATS_LOCK:
+                STATS['in_flight'] -= 1
+
+    def _chat_completion(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        options = self.server.options
+
+        with STATS_LOCK:
+            STATS['requests'] += 1
+            number = STATS['requests']
+            fail = number <= options.fail_first or random.random() < options.error_rate
+            if fail:
+                STATS['failed'] += 1
+
+        # Latency until the first token (the whole response when not streaming)
+        time.sleep(options.latency)
+        if fail:
+            status = random.choice([429, 503]) if options.error_rate else 429
+            return self._send_json(status, {'error': {'message': 'Injected failure'}}, {'Retry-After': '0.1'})
+
+        content = self.server.reply or self._echo(payload)
+        if payload.get('stream'):
+            return self._send_stream(payload, content, number)
+        self._send_json(200, {
+            'id': f"chatcmpl-stub-{number}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {
+                'prompt_tokens': sum(len(m.get('content') or '') for m in payload.get('messages', [])) // 4,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': 0,
+            },
+        })
+
+    def _send_stream(self, payload, content, number):
+        """Server-sent events in the OpenAI streaming format, one word per chunk"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        words = content.split(' ')
+        for index, word in enumerate(words):
+            chunk = {
+                'id': f"chatcmpl-stub-{number}",
+                'object': 'chat.completion.chunk',
+                'model': payload.get('model', 'stub'),
+                'choices': [{'index': 0, 'delta': {'content': word if index == 0 else ' ' + word}, 'finish_reason': None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(self.server.options.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _ollama(self):
+        """Ollama chat/generate, streamed as newline-delimited JSON by default"""
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        options = self.server.options
+        model = payload.get('model', 'stub')
+        now = time.monotonic()
+
+        with STATS_LOCK:
+            STATS['requests'] += 1
+            cold = LOADED.get(model, 0) < now
+            if cold:
+                STATS['model_loads'] += 1
+        load_time = options.load_time if cold else 0.0
+        time.sleep(load_time)
+        with STATS_LOCK:
+            LOADED[model] = time.monotonic() + keep_alive_seconds(payload.get('keep_alive'))
+
+        final = {'model': model, 'done': True, 'load_duration': int(load_time * 1e9)}
+        if self.path.rstrip('/') == '/api/generate' and not payload.get('prompt'):
+            # Load request (warm-up) without generation
+            return self._send_json(200, {**final, 'response': ''})
+
+        time.sleep(options.latency)
+        if payload.get('format') == 'json':
+            payload = {**payload, 'response_format': {'type': 'json_object'}}
+        content = self.server.reply or self._echo(payload)
+        if payload.get('stream') is False:
+            return self._send_json(200, {**final, 'message': {'role': 'assistant', 'content': content}})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        words = content.split(' ')
+        started = time.monotonic()
+        for index, word in enumerate(words):
+            chunk = {'model': model, 'done': False,
+                     'message': {'role': 'assistant', 'content': word if index == 0 else ' ' + word}}
+            self.wfile.write(json.dumps(chunk).encode('utf-8') + b"\n")
+            self.wfile.flush()
+            time.sleep(options.token_delay)
+        final.update(eval_count=len(words), eval_duration=int((time.monotonic() - started) * 1e9),
+                     message={'role': 'assistant', 'content': ''})
+        self.wfile.write(json.dumps(final).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+    @staticmethod
+    def _echo(payload):
+        messages = payload.get('messages') or [{}]
+        if (payload.get('response_format') or {}).get('type') == 'json_object':
+            return json.dumps({'echo': (messages[-1].get('content') or '')[:200]})
+        return f"Stub reply to: {(messages[-1].get('content') or '')[:200]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for an OpenAI-compatible LLM API")
+    parser.add_argument('--port', type=int, default=int(os.getenv('LLM_STUB_PORT', '8089')))
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds per response")
+    parser.add_argument('--token-delay', type=float, default=0.05, help="Seconds between streamed chunks")
+    parser.add_argument('--load-time', type=float, default=2.0, help="Seconds for a cold Ollama model load")
+    parser.add_argument('--fail-first', type=int, default=0, help="Answer the first N requests with 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with 429/503")
+    parser.add_argument('--reply-file', help="File whose content is returned as the assistant message")
+    parser.add_argument('--quiet', action='store_true')
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', options.port), StubHandler)
+    server.options = options
+    server.reply = open(options.reply_file, encoding='utf-8').read() if options.reply_file else None
+    print(f"LLM stub listening on http://127.0.0.1:{options.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,22 @@ import uuid
 import datetime
 import secrets
 import string
+import base64
+import csv
+import io
+import json
 import bcrypt
 import jwt
-from typing import Dict, List, Optional, Union, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Union, Any, Tuple
 import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
-from models.auth_models import User, Tenant, Role, Permission
+from psycopg2 import pool, extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from concurrent.futures import ThreadPoolExecutor
+from models.auth_models import User, Tenant, Role, Permission, AuditLog
 from db.db_service import execute_query
 import logging
-from database import DatabaseManager
+from db.database import db
+from services.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +56,39 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'dev_secret_key_change_in_production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION = 3600 * 24  # 24 Stunden
 
+# Cache für Mandanten-Metadaten (ID bzw. Subdomain -> Mandant)
+TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', 300))
+tenant_cache = TTLCache(ttl=TENANT_CACHE_TTL, maxsize=1024)
+# Unbekannte Subdomains werden kurz als fehlend gemerkt (Host-/Header-Werte beliebiger Clients)
+TENANT_MISSING_TTL = int(os.environ.get('TENANT_MISSING_TTL', 30))
+_TENANT_MISSING = object()
+
+def _cache_tenant(tenant: Dict) -> None:
+    """Legt einen Mandanten unter ID und Subdomain im Cache ab"""
+    tenant_cache.set(('id', tenant['id']), tenant)
+    tenant_cache.set(('subdomain', tenant['subdomain']), tenant)
+
+def invalidate_tenant_cache(tenant_id: int, *subdomains: str) -> None:
+    """Entfernt einen Mandanten (und die angegebenen Subdomains) aus dem Cache"""
+    cached = tenant_cache.get(('id', tenant_id))
+    keys = [('id', tenant_id)] + [('subdomain', s) for s in subdomains if s]
+    if cached:
+        keys.append(('subdomain', cached['subdomain']))
+    tenant_cache.delete(*keys)
+
+# Cache für Benutzerprofile (Benutzer-ID -> Profil inkl. Einstellungen und Berechtigungen)
+# Invalidierungen gelten nur für den eigenen Prozess: andere Worker zeigen Änderungen bis zu
+# USER_CACHE_TTL Sekunden später. Zugriffsentscheidungen (has_permission) lesen daher nie aus dem Cache.
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+user_profile_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=4096)
+
+def invalidate_user_cache(*user_ids: int) -> None:
+    """Entfernt Benutzerprofile aus dem Cache; ohne IDs wird der ganze Cache geleert"""
+    if user_ids:
+        user_profile_cache.delete(*user_ids)
+    else:
+        user_profile_cache.clear()
+
 def get_password_hash(password: str) -> str:
     """Erzeugt einen Hash für das gegebene Passwort"""
     salt = bcrypt.gensalt()
@@ -173,6 +212,7 @@ def login(email: str, password: str, ip_address: str, user_agent: str) -> Dict:
             token = create_jwt_token(user['id'], user['role_name'], user['tenant_id'])
             
             conn.commit()
+            invalidate_user_cache(user['id'])
             print(f"Login erfolgreich für: {email}")
             return {
                 'success': True,
@@ -289,6 +329,7 @@ def verify_email(verification_token: str) -> Dict:
             return {'success': False, 'message': 'Ungültiger oder abgelaufener Token'}
         
         conn.commit()
+        invalidate_user_cache(user['id'])
         return {
             'success': True,
             'user_id': user['id'],
@@ -426,15 +467,35 @@ def get_user(user_id: int) -> Dict:
     """
     Gibt die Informationen eines Benutzers zurück
     """
+    cached = user_profile_cache.get(user_id)
+    if cached is not None:
+        return {'success': True, 'user': _copy_profile(cached)}
+    
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        # Benutzer, Einstellungen und Berechtigungen in einem Roundtrip laden
         cursor.execute("""
             SELECT u.id, u.email, u.first_name, u.last_name, u.is_active, 
                    u.email_verified, u.employee_id, u.tenant_id, 
-                   r.name as role_name, u.created_at, u.last_login
+                   r.name as role_name, u.created_at, u.last_login,
+                   COALESCE((
+                       SELECT row_to_json(s)
+                       FROM (
+                           SELECT theme, language, notifications_enabled, email_notifications_enabled
+                           FROM user_settings
+                           WHERE user_id = u.id
+                           LIMIT 1
+                       ) s
+                   ), '{}'::json) AS settings,
+                   COALESCE((
+                       SELECT json_agg(p.name)
+                       FROM permissions p
+                       JOIN role_permissions rp ON p.id = rp.permission_id
+                       WHERE rp.role_id = u.role_id
+                   ), '[]'::json) AS permissions
             FROM users u
             JOIN roles r ON u.role_id = r.id
             WHERE u.id = %s
@@ -444,30 +505,12 @@ def get_user(user_id: int) -> Dict:
         if user is None:
             return {'success': False, 'message': 'Benutzer nicht gefunden'}
         
-        # Benutzereinstellungen abrufen
-        cursor.execute("""
-            SELECT theme, language, notifications_enabled, email_notifications_enabled
-            FROM user_settings
-            WHERE user_id = %s
-        """, (user_id,))
-        settings = cursor.fetchone()
-        
-        # Berechtigungen abrufen
-        cursor.execute("""
-            SELECT p.name
-            FROM permissions p
-            JOIN role_permissions rp ON p.id = rp.permission_id
-            WHERE rp.role_id = (SELECT role_id FROM users WHERE id = %s)
-        """, (user_id,))
-        permissions = [row['name'] for row in cursor.fetchall()]
-        
         user_data = dict(user)
-        user_data['settings'] = dict(settings) if settings else {}
-        user_data['permissions'] = permissions
+        user_profile_cache.set(user_id, user_data)
         
         return {
             'success': True,
-            'user': user_data
+            'user': _copy_profile(user_data)
         }
     except Exception as e:
         print(f"Get user error: {str(e)}")
@@ -476,6 +519,13 @@ def get_user(user_id: int) -> Dict:
         if conn:
             release_db_connection(conn)
 
+def _copy_profile(user_data: Dict) -> Dict:
+    """Kopiert ein Profil, damit Aufrufer den Cache-Eintrag nicht verändern"""
+    profile = dict(user_data)
+    profile['settings'] = dict(user_data['settings'])
+    profile['permissions'] = list(user_data['permissions'])
+    return profile
+
 def list_users(tenant_id: int, offset: int = 0, limit: int = 100) -> Dict:
     """
     Listet alle Benutzer eines Mandanten auf
@@ -485,29 +535,36 @@ def list_users(tenant_id: int, offset: int = 0, limit: int = 100) -> Dict:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Benutzer zählen
-        cursor.execute("""
-            SELECT COUNT(*) AS total FROM users WHERE tenant_id = %s
-        """, (tenant_id,))
-        total = cursor.fetchone()['total']
-        
-        # Benutzer abrufen
+        # Benutzer abrufen, Gesamtzahl per Window-Funktion in derselben Abfrage
         cursor.execute("""
             SELECT u.id, u.email, u.first_name, u.last_name, u.is_active, 
                    u.email_verified, u.employee_id, r.name as role_name,
-                   u.created_at, u.last_login
+                   u.created_at, u.last_login,
+                   COUNT(*) OVER () AS total
             FROM users u
             JOIN roles r ON u.role_id = r.id
             WHERE u.tenant_id = %s
             ORDER BY u.created_at DESC
             LIMIT %s OFFSET %s
         """, (tenant_id, limit, offset))
-        users = cursor.fetchall()
+        users = [dict(user) for user in cursor.fetchall()]
+        
+        if users:
+            total = users[0]['total']
+        else:
+            # Leere Seite (z.B. Offset hinter dem Ende): Gesamtzahl separat zählen
+            cursor.execute("""
+                SELECT COUNT(*) AS total FROM users WHERE tenant_id = %s
+            """, (tenant_id,))
+            total = cursor.fetchone()['total']
+        
+        for user in users:
+            del user['total']
         
         return {
             'success': True,
             'total': total,
-            'users': [dict(user) for user in users]
+            'users': users
         }
     except Exception as e:
         print(f"List users error: {str(e)}")
@@ -516,6 +573,108 @@ def list_users(tenant_id: int, offset: int = 0, limit: int = 100) -> Dict:
         if conn:
             release_db_connection(conn)
 
+def _encode_cursor(created_at: datetime.datetime, user_id: int) -> str:
+    """Kodiert die Position der letzten Zeile als undurchsichtigen Cursor"""
+    raw = json.dumps([created_at.isoformat(), user_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _decode_cursor(cursor_value: str) -> Tuple[datetime.datetime, int]:
+    """Dekodiert einen Cursor aus _encode_cursor"""
+    created_at, user_id = json.loads(base64.urlsafe_b64decode(cursor_value.encode('ascii')))
+    return datetime.datetime.fromisoformat(created_at), int(user_id)
+
+def list_users_keyset(tenant_id: int, cursor_value: Optional[str] = None, limit: int = 100) -> Dict:
+    """
+    Listet Benutzer eines Mandanten seitenweise per Keyset-Pagination auf
+    
+    Im Gegensatz zu OFFSET bleibt jede Seite gleich schnell, da die Abfrage
+    direkt hinter der letzten Zeile (created_at, id) der Vorseite fortsetzt.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        params: List[Any] = [tenant_id]
+        keyset_clause = ""
+        if cursor_value:
+            try:
+                last_created_at, last_id = _decode_cursor(cursor_value)
+            except (ValueError, TypeError):
+                return {'success': False, 'message': 'Ungültiger Cursor'}
+            keyset_clause = "AND (u.created_at, u.id) < (%s, %s)"
+            params.extend([last_created_at, last_id])
+        params.append(limit + 1)
+        
+        cursor.execute(f"""
+            SELECT u.id, u.email, u.first_name, u.last_name, u.is_active, 
+                   u.email_verified, u.employee_id, r.name as role_name,
+                   u.created_at, u.last_login
+            FROM users u
+            JOIN roles r ON u.role_id = r.id
+            WHERE u.tenant_id = %s {keyset_clause}
+            ORDER BY u.created_at DESC, u.id DESC
+            LIMIT %s
+        """, tuple(params))
+        users = [dict(user) for user in cursor.fetchall()]
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = _encode_cursor(users[-1]['created_at'], users[-1]['id'])
+        
+        return {
+            'success': True,
+            'users': users,
+            'next_cursor': next_cursor
+        }
+    except Exception as e:
+        print(f"List users keyset error: {str(e)}")
+        return {'success': False, 'message': f'Fehler beim Abrufen der Benutzer: {str(e)}'}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+def _iter_model_rows(model, query: str, params: tuple, batch_size: int = 2000) -> Iterator:
+    """
+    Streamt Zeilen über einen serverseitigen Cursor direkt in Modellobjekte
+    
+    Es wird ein Tupel-Cursor statt RealDictCursor verwendet, die Zeilen werden
+    per `model.from_row` zugeordnet und in Blöcken von `batch_size` geholt.
+    """
+    conn = get_db_connection()
+    try:
+        cursor_name = f"stream_{model.__name__.lower()}_{uuid.uuid4().hex}"
+        with conn.cursor(name=cursor_name, cursor_factory=extensions.cursor) as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            yield from model.from_rows(cursor)
+    finally:
+        conn.rollback()
+        release_db_connection(conn)
+
+def iter_tenant_users(tenant_id: int) -> Iterator[User]:
+    """
+    Liefert alle Benutzer eines Mandanten als User-Objekte, ohne sie vollständig zu laden
+    """
+    return _iter_model_rows(User, f"""
+        SELECT {User.select_columns()}
+        FROM users
+        WHERE tenant_id = %s
+        ORDER BY id
+    """, (tenant_id,))
+
+def iter_audit_logs(tenant_id: int) -> Iterator[AuditLog]:
+    """
+    Liefert die Audit-Logs eines Mandanten als AuditLog-Objekte (neueste zuerst)
+    """
+    return _iter_model_rows(AuditLog, f"""
+        SELECT {AuditLog.select_columns()}
+        FROM audit_logs
+        WHERE tenant_id = %s
+        ORDER BY timestamp DESC, id DESC
+    """, (tenant_id,))
+
 def update_user(user_id: int, data: Dict) -> Dict:
     """
     Aktualisiert einen Benutzer
@@ -583,6 +742,7 @@ def update_user(user_id: int, data: Dict) -> Dict:
                 """, tuple(values))
         
         conn.commit()
+        invalidate_user_cache(user_id)
         return {'success': True, 'user_id': user_id}
     except Exception as e:
         if conn:
@@ -623,6 +783,7 @@ def change_password(user_id: int, current_password: str, new_password: str) -> D
         """, (password_hash, user_id))
         
         conn.commit()
+        invalidate_user_cache(user_id)
         return {'success': True}
     except Exception as e:
         if conn:
@@ -659,6 +820,7 @@ def delete_user(user_id: int) -> Dict:
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         
         conn.commit()
+        invalidate_user_cache(user_id)
         return {'success': True}
     except Exception as e:
         if conn:
@@ -669,6 +831,320 @@ def delete_user(user_id: int) -> Dict:
         if conn:
             release_db_connection(conn)
 
+# Bulk-Verwaltung von Benutzern
+
+BULK_MAX_USERS = int(os.environ.get('BULK_MAX_USERS', 5000))
+BULK_PAGE_SIZE = 1000  # Zeilen pro Mehrzeilen-Statement
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+TRUE_VALUES = {'true', '1', 'yes', 'y', 'ja', 'j', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'n', 'nein', 'off'}
+
+def _parse_bool(value: Any, default: Optional[bool] = None) -> Optional[bool]:
+    """Wahrheitswert aus JSON oder CSV ('false', '0', 'nein', ...); leer ergibt default
+
+    Raises:
+        ValueError: Wenn der Wert kein Wahrheitswert ist
+    """
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in TRUE_VALUES:
+            return True
+        if normalized in FALSE_VALUES:
+            return False
+    raise ValueError(f"Kein Wahrheitswert: {value!r}")
+
+def _parse_id(value: Any) -> Optional[int]:
+    """Ganzzahlige ID aus JSON (Zahl oder Ziffernfolge), sonst None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Hasht viele Passwörter parallel (bcrypt gibt den GIL während des Hashens frei)"""
+    if len(passwords) < 2:
+        return [get_password_hash(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS) as executor:
+        return list(executor.map(get_password_hash, passwords))
+
+def _insert_users(cursor, tenant_id: int, users: List[Dict], default_role_id: int) -> Dict:
+    """
+    Legt mehrere Benutzer mit Mehrzeilen-INSERTs an (ohne Commit)
+    
+    Returns:
+        Dictionary mit angelegten Benutzern und übersprungenen Einträgen
+    """
+    skipped = []
+    valid = []
+    seen_emails = set()
+    for index, user in enumerate(users):
+        if not isinstance(user, dict):
+            skipped.append({'index': index, 'email': None, 'reason': 'Eintrag ist kein Objekt'})
+            continue
+        email = str(user.get('email') or '').strip()
+        try:
+            is_active = _parse_bool(user.get('is_active'), default=True)
+        except ValueError:
+            skipped.append({'index': index, 'email': email, 'reason': 'Ungültiger Wert für is_active'})
+            continue
+        if not email or not user.get('first_name') or not user.get('last_name'):
+            skipped.append({'index': index, 'email': email, 'reason': 'Pflichtfelder fehlen'})
+        elif email in seen_emails:
+            skipped.append({'index': index, 'email': email, 'reason': 'Doppelte E-Mail im Import'})
+        else:
+            seen_emails.add(email)
+            valid.append((index, email, {**user, 'is_active': is_active}))
+    
+    if valid:
+        # Bereits vorhandene E-Mails mit einer einzigen Abfrage ermitteln
+        cursor.execute("SELECT email FROM users WHERE email = ANY(%s)", ([email for _, email, _ in valid],))
+        existing = {row['email'] for row in cursor.fetchall()}
+        for index, email, _ in valid:
+            if email in existing:
+                skipped.append({'index': index, 'email': email, 'reason': 'E-Mail-Adresse wird bereits verwendet'})
+        valid = [entry for entry in valid if entry[1] not in existing]
+    
+    if not valid:
+        return {'created': [], 'skipped': skipped}
+    
+    # Ohne Passwort wird ein Zufallspasswort gesetzt, der Benutzer verifiziert per Token
+    password_hashes = _hash_passwords([
+        user.get('password') or generate_random_string(32) for _, _, user in valid
+    ])
+    
+    rows = []
+    for (_, email, user), password_hash in zip(valid, password_hashes):
+        rows.append((
+            email, password_hash, user['first_name'], user['last_name'],
+            user['is_active'], generate_random_string(64),
+            user.get('role_id') or default_role_id, tenant_id
+        ))
+    
+    created = execute_values(cursor, """
+        INSERT INTO users (
+            email, password_hash, first_name, last_name,
+            is_active, email_verified, verification_token,
+            role_id, tenant_id, created_at
+        )
+        VALUES %s
+        RETURNING id, email, verification_token
+    """, rows,
+        template="(%s, %s, %s, %s, %s, FALSE, %s, %s, %s, NOW())",
+        page_size=BULK_PAGE_SIZE,
+        fetch=True
+    )
+    
+    execute_values(cursor, """
+        INSERT INTO user_settings (user_id, created_at)
+        VALUES %s
+    """, [(row['id'],) for row in created], template="(%s, NOW())", page_size=BULK_PAGE_SIZE)
+    
+    return {'created': [dict(row) for row in created], 'skipped': skipped}
+
+def bulk_create_users(tenant_id: int, users: List[Dict], default_role_id: int) -> Dict:
+    """
+    Legt viele Benutzer in einer Transaktion an
+    """
+    if len(users) > BULK_MAX_USERS:
+        return {'success': False, 'message': f'Maximal {BULK_MAX_USERS} Benutzer pro Anfrage'}
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        result = _insert_users(cursor, tenant_id, users, default_role_id)
+        
+        conn.commit()
+        return {'success': True, **result}
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Bulk create users error: {str(e)}")
+        return {'success': False, 'message': f'Fehler beim Anlegen der Benutzer: {str(e)}'}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+def import_users_csv(tenant_id: int, csv_text: str, default_role_id: int) -> Dict:
+    """
+    Importiert Benutzer aus CSV (Spalten: email, first_name, last_name, optional role_id, password, is_active)
+    """
+    reader = csv.DictReader(io.StringIO(csv_text))
+    required_columns = {'email', 'first_name', 'last_name'}
+    if not reader.fieldnames or not required_columns.issubset({name.strip() for name in reader.fieldnames}):
+        return {'success': False, 'message': 'CSV benötigt die Spalten email, first_name und last_name'}
+    
+    users = []
+    for row in reader:
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        role_id = row.get('role_id')
+        users.append({
+            'email': row.get('email'),
+            'first_name': row.get('first_name'),
+            'last_name': row.get('last_name'),
+            'password': row.get('password') or None,
+            'is_active': row.get('is_active'),
+            'role_id': int(role_id) if role_id and role_id.isdigit() else None
+        })
+    
+    return bulk_create_users(tenant_id, users, default_role_id)
+
+def bulk_update_users(tenant_id: int, updates: List[Dict]) -> Dict:
+    """
+    Aktualisiert viele Benutzer mit einem einzigen UPDATE ... FROM (VALUES ...)
+    
+    Jeder Eintrag enthält die 'id' und beliebige der Felder
+    first_name, last_name, is_active, role_id; fehlende Felder bleiben unverändert.
+    Ungültige Einträge werden mit Index und Grund unter 'skipped' gemeldet.
+    """
+    if len(updates) > BULK_MAX_USERS:
+        return {'success': False, 'message': f'Maximal {BULK_MAX_USERS} Benutzer pro Anfrage'}
+    
+    rows = []
+    skipped = []
+    for index, item in enumerate(updates):
+        if not isinstance(item, dict):
+            skipped.append({'index': index, 'reason': 'Eintrag ist kein Objekt'})
+            continue
+        user_id = _parse_id(item.get('id'))
+        role_id = _parse_id(item.get('role_id'))
+        if user_id is None:
+            skipped.append({'index': index, 'reason': 'id fehlt oder ist ungültig'})
+            continue
+        if item.get('role_id') is not None and role_id is None:
+            skipped.append({'index': index, 'id': user_id, 'reason': 'Ungültige role_id'})
+            continue
+        try:
+            is_active = _parse_bool(item.get('is_active'))
+        except ValueError:
+            skipped.append({'index': index, 'id': user_id, 'reason': 'Ungültiger Wert für is_active'})
+            continue
+        rows.append((user_id, item.get('first_name'), item.get('last_name'), is_active, role_id, tenant_id))
+    if not rows:
+        return {'success': False, 'message': 'Keine gültigen Einträge zum Aktualisieren', 'skipped': skipped}
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        updated = execute_values(cursor, """
+            UPDATE users u
+            SET first_name = COALESCE(v.first_name, u.first_name),
+                last_name = COALESCE(v.last_name, u.last_name),
+                is_active = COALESCE(v.is_active, u.is_active),
+                role_id = COALESCE(v.role_id, u.role_id),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(id, first_name, last_name, is_active, role_id, tenant_id)
+            WHERE u.id = v.id AND u.tenant_id = v.tenant_id
+            RETURNING u.id
+        """, rows,
+            template="(%s::int, %s::varchar, %s::varchar, %s::boolean, %s::int, %s::int)",
+            page_size=BULK_PAGE_SIZE,
+            fetch=True
+        )
+        updated_ids = [row['id'] for row in updated]
+        
+        conn.commit()
+        if updated_ids:
+            invalidate_user_cache(*updated_ids)
+        return {'success': True, 'updated': updated_ids, 'skipped': skipped}
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Bulk update users error: {str(e)}")
+        return {'success': False, 'message': f'Fehler beim Aktualisieren der Benutzer: {str(e)}'}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+def bulk_set_active(tenant_id: int, user_ids: List[int], is_active: bool) -> Dict:
+    """
+    Aktiviert bzw. deaktiviert viele Benutzer mit einem Statement
+    """
+    if len(user_ids) > BULK_MAX_USERS:
+        return {'success': False, 'message': f'Maximal {BULK_MAX_USERS} Benutzer pro Anfrage'}
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE users
+            SET is_active = %s, updated_at = NOW()
+            WHERE id = ANY(%s) AND tenant_id = %s
+            RETURNING id
+        """, (is_active, list(user_ids), tenant_id))
+        updated_ids = [row['id'] for row in cursor.fetchall()]
+        
+        if not is_active and updated_ids:
+            # Offene Sessions deaktivierter Benutzer beenden
+            cursor.execute("DELETE FROM sessions WHERE user_id = ANY(%s)", (updated_ids,))
+        
+        conn.commit()
+        if updated_ids:
+            invalidate_user_cache(*updated_ids)
+        return {'success': True, 'updated': updated_ids}
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Bulk set active error: {str(e)}")
+        return {'success': False, 'message': f'Fehler beim Ändern des Benutzerstatus: {str(e)}'}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
+def bulk_delete_users(tenant_id: int, user_ids: List[int]) -> Dict:
+    """
+    Löscht viele Benutzer eines Mandanten in einer Transaktion
+    """
+    if len(user_ids) > BULK_MAX_USERS:
+        return {'success': False, 'message': f'Maximal {BULK_MAX_USERS} Benutzer pro Anfrage'}
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Nur Benutzer des eigenen Mandanten berücksichtigen
+        cursor.execute("""
+            SELECT id FROM users WHERE id = ANY(%s) AND tenant_id = %s
+        """, (list(user_ids), tenant_id))
+        ids = [row['id'] for row in cursor.fetchall()]
+        
+        if ids:
+            cursor.execute("DELETE FROM sessions WHERE user_id = ANY(%s)", (ids,))
+            cursor.execute("DELETE FROM user_settings WHERE user_id = ANY(%s)", (ids,))
+            cursor.execute("DELETE FROM users WHERE id = ANY(%s)", (ids,))
+        
+        conn.commit()
+        if ids:
+            invalidate_user_cache(*ids)
+        return {
+            'success': True,
+            'deleted': ids,
+            'not_found': sorted(set(user_ids) - set(ids))
+        }
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Bulk delete users error: {str(e)}")
+        return {'success': False, 'message': f'Fehler beim Löschen der Benutzer: {str(e)}'}
+    finally:
+        if conn:
+            release_db_connection(conn)
+
 def create_tenant(name: str, subdomain: str, logo_url: str = None, primary_color: str = None) -> Dict:
     """
     Erstellt einen neuen Mandanten
@@ -694,6 +1170,7 @@ def create_tenant(name: str, subdomain: str, logo_url: str = None, primary_color
         tenant_id = cursor.fetchone()['id']
         
         conn.commit()
+        invalidate_tenant_cache(tenant_id, subdomain)
         return {'success': True, 'tenant_id': tenant_id}
     except Exception as e:
         if conn:
@@ -708,6 +1185,10 @@ def get_tenant(tenant_id: int) -> Dict:
     """
     Gibt die Informationen eines Mandanten zurück
     """
+    cached = tenant_cache.get(('id', tenant_id))
+    if cached is not None:
+        return {'success': True, 'tenant': dict(cached)}
+    
     conn = None
     try:
         conn = get_db_connection()
@@ -723,6 +1204,8 @@ def get_tenant(tenant_id: int) -> Dict:
         if tenant is None:
             return {'success': False, 'message': 'Mandant nicht gefunden'}
         
+        tenant = dict(tenant)
+        _cache_tenant(tenant)
         return {
             'success': True,
             'tenant': dict(tenant)
@@ -738,6 +1221,12 @@ def get_tenant_by_subdomain(subdomain: str) -> Dict:
     """
     Gibt die Informationen eines Mandanten anhand der Subdomain zurück
     """
+    cached = tenant_cache.get(('subdomain', subdomain))
+    if cached is _TENANT_MISSING:
+        return {'success': False, 'message': 'Mandant nicht gefunden'}
+    if cached is not None:
+        return {'success': True, 'tenant': dict(cached)}
+    
     conn = None
     try:
         conn = get_db_connection()
@@ -751,8 +1240,12 @@ def get_tenant_by_subdomain(subdomain: str) -> Dict:
         tenant = cursor.fetchone()
         
         if tenant is None:
+            # create_tenant/update_tenant entfernen den Eintrag, wenn die Subdomain angelegt wird
+            tenant_cache.set(('subdomain', subdomain), _TENANT_MISSING, ttl=TENANT_MISSING_TTL)
             return {'success': False, 'message': 'Mandant nicht gefunden'}
         
+        tenant = dict(tenant)
+        _cache_tenant(tenant)
         return {
             'success': True,
             'tenant': dict(tenant)
@@ -808,7 +1301,7 @@ def update_tenant(tenant_id: int, data: Dict) -> Dict:
         cursor = conn.cursor()
         
         # Prüfen, ob Mandant existiert
-        cursor.execute("SELECT id FROM tenants WHERE id = %s", (tenant_id,))
+        cursor.execute("SELECT id, subdomain FROM tenants WHERE id = %s", (tenant_id,))
         tenant = cursor.fetchone()
         
         if tenant is None:
@@ -853,6 +1346,8 @@ def update_tenant(tenant_id: int, data: Dict) -> Dict:
         """, tuple(values))
         
         conn.commit()
+        # Alte und neue Subdomain dürfen nicht mehr auf den veralteten Eintrag zeigen
+        invalidate_tenant_cache(tenant_id, tenant['subdomain'], data.get('subdomain'))
         return {'success': True, 'tenant_id': tenant_id}
     except Exception as e:
         if conn:
@@ -873,7 +1368,7 @@ def delete_tenant(tenant_id: int) -> Dict:
         cursor = conn.cursor()
         
         # Prüfen, ob Mandant existiert
-        cursor.execute("SELECT id FROM tenants WHERE id = %s", (tenant_id,))
+        cursor.execute("SELECT id, subdomain FROM tenants WHERE id = %s", (tenant_id,))
         tenant = cursor.fetchone()
         
         if tenant is None:
@@ -883,6 +1378,9 @@ def delete_tenant(tenant_id: int) -> Dict:
         cursor.execute("DELETE FROM tenants WHERE id = %s", (tenant_id,))
         
         conn.commit()
+        invalidate_tenant_cache(tenant_id, tenant['subdomain'])
+        # Benutzer des Mandanten wurden per Cascade mitgelöscht
+        invalidate_user_cache()
         return {'success': True}
     except Exception as e:
         if conn:
@@ -995,6 +1493,8 @@ def update_role_permissions(role_id: int, permission_ids: List[int]) -> Dict:
             """, (role_id, permission_id))
         
         conn.commit()
+        # Berechtigungen sind Teil jedes Profils dieser Rolle
+        invalidate_user_cache()
         return {'success': True}
     except Exception as e:
         if conn:
@@ -1008,6 +1508,8 @@ def update_role_permissions(role_id: int, permission_ids: List[int]) -> Dict:
 def has_permission(user_id: int, permission_name: str) -> bool:
     """
     Prüft, ob ein Benutzer eine bestimmte Berechtigung hat
+
+    Immer aus der Datenbank, damit entzogene Berechtigungen in allen Workern sofort gelten
     """
     conn = None
     try:
@@ -1065,7 +1567,7 @@ class AuthService:
     def create_user(username: str, email: str, password: str) -> Optional[int]:
         """Erstellt einen neuen Benutzer"""
         try:
-            conn = DatabaseManager.get_connection()
+            conn = db.get_connection()
             if not conn:
                 return None
                 
@@ -1103,7 +1605,7 @@ class AuthService:
     def login(username: str, password: str) -> Tuple[Optional[Dict], Optional[str]]:
         """Authentifiziert einen Benutzer und erstellt eine Session"""
         try:
-            conn = DatabaseManager.get_connection()
+            conn = db.get_connection()
             if not conn:
                 return None, "Datenbankverbindung fehlgeschlagen"
                 
@@ -1162,7 +1664,7 @@ class AuthService:
     def logout(user_id: int, session_token: str) -> bool:
         """Beendet eine Benutzersession"""
         try:
-            conn = DatabaseManager.get_connection()
+            conn = db.get_connection()
             if not conn:
                 return False
                 
@@ -1187,7 +1689,7 @@ class AuthService:
     def get_user_by_id(user_id: int) -> Optional[Dict]:
         """Holt Benutzerinformationen nach ID"""
         try:
-            conn = DatabaseManager.get_connection()
+            conn = db.get_connection()
             if not conn:
                 return None
                 
@@ -1222,7 +1724,7 @@ class AuthService:
     def update_user(user_id: int, data: Dict) -> bool:
         """Aktualisiert Benutzerinformationen"""
         try:
-            conn = DatabaseManager.get_connection()
+            conn = db.get_connection()
             if not conn:
                 return False
                 
@@ -0,0 +1,337 @@
+import os
+import io
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager, closing
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: refcount updates are only serialized within the process
+    fcntl = None
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional dependency, only needed for BLOB_STORE=s3
+    boto3 = None
+    ClientError = Exception
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'blobs')
+
+
+@dataclass
+class BlobInfo:
+    """A stored file, addressed by the SHA-256 of its content"""
+    sha256: str
+    size: int
+    # Local file path, None for remote backends
+    path: Optional[str]
+    # False when the same content was already stored (nothing was written)
+    new: bool
+
+
+def blob_name(sha256: str, suffix: str = '') -> str:
+    """Sharded object name, e.g. 'ab/cd/abcd…' (two levels of 256 folders)"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}"
+
+
+class LocalBlobBackend:
+    """Blobs as files below a root folder, written atomically (temp file + rename)"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.temp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def local_path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split('/'))
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.local_path(name))
+
+    def put_file(self, temp_path: str, name: str):
+        path = self.local_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Same file system as temp_dir, so the rename is atomic
+        os.replace(temp_path, path)
+
+    def put_bytes(self, name: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        self.put_file(temp_path, name)
+
+    def get_bytes(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self.local_path(name), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def open(self, name: str) -> BinaryIO:
+        return open(self.local_path(name), 'rb')
+
+    def delete(self, name: str):
+        try:
+            os.remove(self.local_path(name))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock across processes sharing the root folder"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class S3BlobBackend:
+    """Blobs in an S3-compatible bucket (AWS S3, MinIO, …)
+
+    Reference counts are plain objects, updated without a cross-process lock:
+    run a single writer process or accept that counts may drift.
+    """
+
+    def __init__(self, bucket: str, prefix: str = 'blobs/', endpoint_url: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for BLOB_STORE=s3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.temp_dir = None
+
+    def local_path(self, name: str) -> None:
+        return None
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + name)
+            return True
+        except ClientError:
+            return False
+
+    def put_file(self, temp_path: str, name: str):
+        self.client.upload_file(temp_path, self.bucket, self.prefix + name)
+        os.remove(temp_path)
+
+    def put_bytes(self, name: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + name, Body=data)
+
+    def get_bytes(self, name: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body'].read()
+        except ClientError:
+            return None
+
+    def open(self, name: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body']
+
+    def delete(self, name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + name)
+
+    def url(self, name: str, expires: int = 3600, **response_headers) -> str:
+        """Presigned GET URL; S3 serves ranges and conditional requests itself
+
+        response_headers are S3 response overrides, e.g. ResponseContentDisposition
+        """
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.prefix + name, **response_headers},
+            ExpiresIn=expires)
+
+    @contextmanager
+    def lock(self):
+        yield
+
+
+class BlobStore:
+    """Content-addressed file store with reference counting
+
+    Every upload is hashed while it is spooled to a temp file; content that is
+    already stored is not written again. Each put() adds a reference that the
+    owner gives back with release(); the blob and its derived data are
+    deleted with the last reference. Derived data (e.g. extraction results)
+    is kept next to the blob, so a repeated upload can skip the extraction.
+    """
+
+    def __init__(self, backend: Union[LocalBlobBackend, S3BlobBackend]):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'puts': 0, 'deduplicated': 0, 'bytes_written': 0, 'bytes_saved': 0, 'deleted': 0}
+
+    def put(self, source: Union[bytes, str, BinaryIO]) -> BlobInfo:
+        """Store content (bytes, a file path or a readable stream) and add a reference"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.backend.temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                with self._reader(source) as reader:
+                    for chunk in iter(lambda: reader.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        temp_file.write(chunk)
+                        size += len(chunk)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+            sha256 = digest.hexdigest()
+            name = blob_name(sha256)
+            with self._locked():
+                new = not self.backend.exists(name)
+                if new:
+                    self.backend.put_file(temp_path, name)
+                self._addref(sha256)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        with self._stats_lock:
+            self._stats['puts'] += 1
+            self._stats['bytes_written' if new else 'bytes_saved'] += size
+            self._stats['deduplicated'] += int(not new)
+        return BlobInfo(sha256, size, self.backend.local_path(name), new)
+
+    def exists(self, sha256: str) -> bool:
+        return self.backend.exists(blob_name(sha256))
+
+    def open(self, sha256: str) -> BinaryIO:
+        return self.backend.open(blob_name(sha256))
+
+    def resolve(self, reference: Optional[str]) -> Optional[str]:
+        """SHA-256 of a stored file reference ('blob:<sha256>' or a blob path), None for other paths"""
+        if not reference:
+            return None
+        if reference.startswith('blob:'):
+            return reference[len('blob:'):]
+        sha256 = os.path.basename(reference)
+        if len(sha256) == 64 and self.local_path(sha256) == os.path.abspath(reference):
+            return sha256
+        return None
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        """Path of the blob file, None for remote backends"""
+        return self.backend.local_path(blob_name(sha256))
+
+    @contextmanager
+    def local_file(self, sha256: str) -> Iterator[str]:
+        """A local path of the blob for libraries that need a file (downloaded for remote backends)"""
+        path = self.local_path(sha256)
+        if path is not None:
+            yield path
+            return
+        fd, temp_path = tempfile.mkstemp(suffix='.blob')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file, closing(self.open(sha256)) as blob:
+                shutil.copyfileobj(blob, temp_file, CHUNK_SIZE)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    def get_derived(self, sha256: str, kind: str) -> Optional[Any]:
+        """Cached result computed from a blob (JSON), None if missing"""
+        data = self.backend.get_bytes(blob_name(sha256, f'.{kind}.json'))
+        return json.loads(data) if data is not None else None
+
+    def set_derived(self, sha256: str, kind: str, value: Any):
+        """Cache a result computed from a blob; removed together with the blob"""
+        self.backend.put_bytes(blob_name(sha256, f'.{kind}.json'),
+                               json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        with self._locked():
+            kinds = self._read_meta(sha256).get('derived', [])
+            if kind not in kinds:
+                self._write_meta(sha256, derived=kinds + [kind])
+
+    def addref(self, sha256: str) -> int:
+        """Add a reference to a stored blob, returns the new count"""
+        with self._locked():
+            return self._addref(sha256)
+
+    def release(self, sha256: str) -> int:
+        """Drop a reference; the blob is deleted with the last one. Returns the remaining count"""
+        with self._locked():
+            meta = self._read_meta(sha256)
+            refs = max(0, meta.get('refs', 0) - 1)
+            if refs:
+                self._write_meta(sha256, refs=refs)
+                return refs
+            for kind in meta.get('derived', []):
+                self.backend.delete(blob_name(sha256, f'.{kind}.json'))
+            self.backend.delete(blob_name(sha256))
+            self.backend.delete(blob_name(sha256, '.meta'))
+        with self._stats_lock:
+            self._stats['deleted'] += 1
+        return 0
+
+    def stats(self) -> dict:
+        """Deduplication counters for monitoring"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, self.backend.lock():
+            yield
+
+    @staticmethod
+    @contextmanager
+    def _reader(source):
+        if isinstance(source, bytes):
+            yield io.BytesIO(source)
+        elif isinstance(source, str):
+            with open(source, 'rb') as file:
+                yield file
+        else:
+            # e.g. werkzeug FileStorage
+            yield getattr(source, 'stream', source)
+
+    def _addref(self, sha256: str) -> int:
+        refs = self._read_meta(sha256).get('refs', 0) + 1
+        self._write_meta(sha256, refs=refs)
+        return refs
+
+    def _read_meta(self, sha256: str) -> dict:
+        data = self.backend.get_bytes(blob_name(sha256, '.meta'))
+        return json.loads(data) if data else {}
+
+    def _write_meta(self, sha256: str, **changes):
+        meta = {**self._read_meta(sha256), **changes}
+        self.backend.put_bytes(blob_name(sha256, '.meta'), json.dumps(meta).encode('utf-8'))
+
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store configured by BLOB_STORE (local or s3)"""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            if os.getenv('BLOB_STORE', 'local').lower() == 's3':
+                backend = S3BlobBackend(
+                    bucket=os.environ['BLOB_S3_BUCKET'],
+                    prefix=os.getenv('BLOB_S3_PREFIX', 'blobs/'),
+                    endpoint_url=os.getenv('BLOB_S3_ENDPOINT')  # e.g. http://localhost:9000 for MinIO
+                )
+            else:
+                backend = LocalBlobBackend(os.getenv('BLOB_STORE_ROOT', DEFAULT_ROOT))
+            _blob_store = BlobStore(backend)
+            logger.info(f"Blob store initialized ({type(backend).__name__})")
+        return _blob_store
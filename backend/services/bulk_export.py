@@ -0,0 +1,237 @@
+import io
+import json
+import time
+import uuid
+import logging
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from werkzeug.utils import secure_filename
+
+from services import cv_pdf
+from services.cache import TTLCache
+from services.template_engine import EXPORT_WORKERS, get_export_pool
+
+logger = logging.getLogger(__name__)
+
+# Jobs stay queryable for an hour after they were started
+JOB_TTL = 3600
+
+
+class ExportJob:
+    """Progress of one bulk export, polled by the client while the zip downloads"""
+
+    def __init__(self, title: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.title = title
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.errors: Dict[str, str] = {}
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, error: Optional[str] = None):
+        with self._lock:
+            if error:
+                self.failed += 1
+                self.errors[name] = error
+            else:
+                self.done += 1
+
+    def finish(self, status: str):
+        with self._lock:
+            self.status = status
+            self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            processed = self.done + self.failed
+            return {
+                'job_id': self.id,
+                'title': self.title,
+                'status': self.status,
+                'total': self.total,
+                'done': self.done,
+                'failed': self.failed,
+                'progress': round(processed / self.total, 3) if self.total else 1.0,
+                'errors': dict(self.errors),
+                'elapsed': round((self.finished_at or time.time()) - self.started_at, 2)
+            }
+
+
+_jobs = TTLCache(ttl=JOB_TTL, maxsize=256)
+
+
+def create_job(title: str, total: int) -> ExportJob:
+    job = ExportJob(title, total)
+    _jobs.set(job.id, job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[ExportJob]:
+    return _jobs.get(job_id)
+
+
+def load_bid_cvs(conn, bid_id: int) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """A tender (ausschreibungen) and the tailored CVs of its employees (angepasste_cvs)
+
+    Projects and trainings are loaded with one query each for all employees.
+    Tailored skills and projects of a CV replace the employee's full lists.
+
+    Returns:
+        (bid, employees), bid is None if the tender does not exist
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, titel, kunde, deadline FROM ausschreibungen WHERE id = %s", (bid_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None, []
+        bid = dict(zip(('id', 'titel', 'kunde', 'deadline'), row))
+
+        cursor.execute("""
+            SELECT m.id, m.vorname, m.nachname, m.position, m.email, m.telefon, a.name,
+                   m.skills, m.sprachen, m.zertifikate, ac.angepasste_skills, ac.angepasste_projekte
+            FROM angepasste_cvs ac
+            JOIN mitarbeiter m ON m.id = ac.mitarbeiter_id
+            LEFT JOIN abteilungen a ON a.id = m.abteilung_id
+            WHERE ac.ausschreibung_id = %s
+            ORDER BY m.nachname, m.vorname
+        """, (bid_id,))
+        columns = ('id', 'vorname', 'nachname', 'position', 'email', 'telefon', 'abteilung',
+                   'skills', 'sprachen', 'zertifikate', 'angepasste_skills', 'angepasste_projekte')
+        employees = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not employees:
+            return bid, []
+        ids = [employee['id'] for employee in employees]
+
+        cursor.execute("""
+            SELECT mitarbeiter_id, projektname, rolle, kunde, start_datum, end_datum,
+                   beschreibung, verwendete_technologien
+            FROM projekterfahrungen
+            WHERE mitarbeiter_id = ANY(%s)
+            ORDER BY start_datum DESC NULLS LAST
+        """, (ids,))
+        projects: Dict[int, list] = {}
+        for row in cursor.fetchall():
+            projects.setdefault(row[0], []).append(dict(zip(
+                ('projektname', 'rolle', 'kunde', 'start_datum', 'end_datum', 'beschreibung',
+                 'verwendete_technologien'), row[1:])))
+
+        cursor.execute("""
+            SELECT mitarbeiter_id, thema, anbieter, datum, zertifikat
+            FROM weiterbildungen
+            WHERE mitarbeiter_id = ANY(%s)
+            ORDER BY datum DESC NULLS LAST
+        """, (ids,))
+        trainings: Dict[int, list] = {}
+        for row in cursor.fetchall():
+            trainings.setdefault(row[0], []).append(dict(zip(('thema', 'anbieter', 'datum', 'zertifikat'), row[1:])))
+    finally:
+        cursor.close()
+
+    for employee in employees:
+        selected = set(employee.pop('angepasste_projekte') or [])
+        employee['projects'] = [project for project in projects.get(employee['id'], [])
+                                if not selected or project['projektname'] in selected]
+        employee['skills'] = employee.pop('angepasste_skills') or employee['skills'] or []
+        employee['trainings'] = trainings.get(employee['id'], [])
+    return bid, employees
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Write-only sink for ZipFile; the written bytes are taken out after every entry"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_name(employee: Dict[str, Any]) -> str:
+    name = secure_filename(f"{employee['nachname']}_{employee['vorname']}") or 'cv'
+    return f"{name}_{employee['id']}.pdf"
+
+
+def _render(employee: Dict[str, Any], subtitle: str):
+    try:
+        return cv_pdf.render_employee_cv(employee, subtitle)
+    except Exception as e:
+        logger.error(f"CV PDF for employee {employee['id']} failed: {str(e)}")
+        return e
+
+
+def _rendered(employees: List[Dict[str, Any]], subtitle: str) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """(employee, PDF bytes or exception) in completion order
+
+    At most two CVs per worker are in flight, so memory stays bounded by the
+    pool size rather than the number of CVs.
+    """
+    if EXPORT_WORKERS < 2:
+        for employee in employees:
+            yield employee, _render(employee, subtitle)
+        return
+
+    pool = get_export_pool()
+    queue = iter(employees)
+    pending = {}
+    try:
+        while True:
+            while len(pending) < 2 * EXPORT_WORKERS:
+                employee = next(queue, None)
+                if employee is None:
+                    break
+                pending[pool.submit(_render, employee, subtitle)] = employee
+            if not pending:
+                return
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield pending.pop(future), future.result()
+    finally:
+        # Client went away: do not render the rest
+        for future in pending:
+            future.cancel()
+
+
+def stream_bid_export(job: ExportJob, employees: List[Dict[str, Any]], subtitle: str = '') -> Iterator[bytes]:
+    """Zip of the employees' CV PDFs, yielded entry by entry
+
+    Each PDF is written to the zip and handed to the response as soon as it
+    is rendered; errors.json lists the CVs that failed.
+    """
+    buffer = _ZipBuffer()
+    try:
+        # PDFs are compressed already, storing them saves CPU
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for employee, result in _rendered(employees, subtitle):
+                name = _file_name(employee)
+                if isinstance(result, Exception):
+                    job.record(name, str(result))
+                else:
+                    archive.writestr(name, result)
+                    job.record(name)
+                yield buffer.take()
+            if job.errors:
+                archive.writestr('errors.json', json.dumps(job.errors, ensure_ascii=False, indent=2))
+        job.finish('completed')
+        yield buffer.take()
+    finally:
+        if job.status == 'running':
+            job.finish('cancelled')
+            logger.info(f"Bulk export {job.id} cancelled after {job.done} of {job.total} CVs")
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-sicherer In-Memory-Cache mit Ablaufzeit (TTL) und LRU-Verdrängung"""
+
+    def __init__(self, ttl: float = 300, maxsize: int = 1024):
+        """
+        Args:
+            ttl: Lebensdauer eines Eintrags in Sekunden
+            maxsize: Maximale Anzahl an Einträgen, danach wird der älteste verdrängt
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Gibt den Wert zurück oder `default`, wenn er fehlt oder abgelaufen ist"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Speichert einen Wert, optional mit abweichender TTL"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        """Entfernt die angegebenen Schlüssel (fehlende werden ignoriert)"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Leert den Cache vollständig"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        """Gibt Trefferstatistiken für Monitoring zurück"""
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
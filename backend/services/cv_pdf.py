@@ -0,0 +1,121 @@
+import io
+from typing import Any, Dict
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+except ImportError:  # optional dependency, only needed for PDF generation with reportlab
+    colors = None
+
+
+def available() -> bool:
+    return colors is not None
+
+
+def cv_styles() -> Dict[str, Any]:
+    """Paragraph styles of the generated CVs (title, section, normal, item)"""
+    if colors is None:
+        raise RuntimeError("reportlab is required to generate CV PDFs")
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#1a365d')
+        ),
+        'section': ParagraphStyle(
+            'Section',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceBefore=20,
+            spaceAfter=10,
+            textColor=colors.HexColor('#2c5282')
+        ),
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=8
+        ),
+        'item': styles['Heading3'],
+    }
+
+
+def _period(start, end) -> str:
+    start_text = start.strftime('%m/%Y') if start else ''
+    end_text = end.strftime('%m/%Y') if end else 'heute'
+    return f"{start_text} - {end_text}" if start_text else ''
+
+
+def render_employee_cv(employee: Dict[str, Any], subtitle: str = '') -> bytes:
+    """PDF of an employee CV (see services.bulk_export.load_bid_cvs for the fields)"""
+    styles = cv_styles()
+    story = []
+
+    def text(value, style='normal'):
+        story.append(Paragraph(escape(str(value)), styles[style]))
+
+    def section(title):
+        story.append(Paragraph(escape(title), styles['section']))
+
+    # Header
+    text(f"{employee['vorname']} {employee['nachname']}", 'title')
+    if employee.get('position'):
+        text(employee['position'])
+    if subtitle:
+        text(subtitle)
+
+    # Kontaktinformationen
+    section("Kontaktinformationen")
+    if employee.get('email'):
+        text(f"Email: {employee['email']}")
+    if employee.get('telefon'):
+        text(f"Telefon: {employee['telefon']}")
+    text(f"Abteilung: {employee.get('abteilung') or 'Nicht zugewiesen'}")
+    story.append(Spacer(1, 12))
+
+    skills = employee.get('skills') or []
+    if skills:
+        section("Fähigkeiten & Kompetenzen")
+        for skill in skills:
+            text(f"• {skill}")
+        story.append(Spacer(1, 12))
+
+    if employee.get('sprachen'):
+        section("Sprachen")
+        text(", ".join(employee['sprachen']))
+
+    if employee.get('projects'):
+        section("Projekterfahrung")
+        for project in employee['projects']:
+            text(project['projektname'], 'item')
+            details = " · ".join(part for part in (project.get('rolle'), project.get('kunde'),
+                                                   _period(project.get('start_datum'), project.get('end_datum'))) if part)
+            if details:
+                text(details)
+            if project.get('beschreibung'):
+                text(project['beschreibung'])
+            if project.get('verwendete_technologien'):
+                text(f"Technologien: {', '.join(project['verwendete_technologien'])}")
+        story.append(Spacer(1, 12))
+
+    trainings = employee.get('trainings') or []
+    if trainings or employee.get('zertifikate'):
+        section("Weiterbildungen & Zertifizierungen")
+        for name in employee.get('zertifikate') or []:
+            text(f"• {name}")
+        for training in trainings:
+            text(training['thema'], 'item')
+            details = " · ".join(part for part in (training.get('anbieter'), training.get('zertifikat'),
+                                                   training['datum'].strftime('%d.%m.%Y') if training.get('datum') else None) if part)
+            if details:
+                text(details)
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title=f"CV {employee['vorname']} {employee['nachname']}").build(story)
+    return buffer.getvalue()
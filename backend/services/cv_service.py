@@ -3,13 +3,29 @@ from typing import Optional, Dict, Any
 from services.pdf_extractor import PDFExtractor
 from services.openai_extractor import OpenAIExtractor
 from services.mock_extractor import MockExtractor
+from services.ollama_extractor import OllamaExtractor
+from services.local_extractor import LocalExtractor
+from services.extraction_router import ExtractionRouter
+from services.prompt_builder import compact_pages, compact_text
+from services.json_provider import RawJSON
+from services.blob_store import get_blob_store
+from services.dedupe import Fingerprint, get_duplicate_index
+from services.cv_summary import SUMMARY_COLUMNS, summary_row
+from services.template_engine import TemplateSource, TemplateVariable, TemplateRenderError, MIMETYPES, get_template_engine
 import os
+import threading
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.extras import Json
 from datetime import datetime
 
 load_dotenv()
 
+# JSONB columns of cv_data
+CV_JSON_COLUMNS = ('extracted_data', 'skills', 'projects', 'languages', 'certifications')
+
+_fingerprints_lock = threading.Lock()
+
 class CVService:
     def __init__(self):
         """Initialize the CV Service"""
@@ -17,10 +33,36 @@ class CVService:
         
         # Initialize PDF Extractor
         self.pdf_extractor = PDFExtractor()
+        self.layout_mode = os.getenv('PDF_LAYOUT_MODE', 'false').lower() == 'true'
+        # Near-duplicates at least this similar are linked instead of extracted again
+        self.link_threshold = float(os.getenv('DEDUPE_LINK_THRESHOLD', '0.95'))
         
         # Choose extractor based on environment variables
         self.use_openai = os.getenv('USE_OPENAI', 'false').lower() == 'true'
         self.use_mock = os.getenv('USE_MOCK_EXTRACTION', 'false').lower() == 'true'
+        self.use_local = os.getenv('USE_LOCAL_EXTRACTION', 'false').lower() == 'true'
+        self.use_tiered = os.getenv('USE_TIERED_EXTRACTION', 'false').lower() == 'true'
+        self.use_ollama = os.getenv('USE_OLLAMA', 'false').lower() == 'true'
+        
+        if self.use_tiered:
+            # Local rules first, the LLM (if configured) only for low-confidence fields
+            llm_extractor = None
+            if self.use_ollama:
+                llm_extractor = OllamaExtractor()
+            elif self.use_openai:
+                try:
+                    llm_extractor = OpenAIExtractor()
+                except Exception as e:
+                    self.logger.error(f"Error initializing OpenAI, tiered extraction stays local: {str(e)}")
+            self.extractor = ExtractionRouter(LocalExtractor(), llm_extractor)
+            self.logger.info("Extraction Router initialized")
+            return
+        
+        if self.use_ollama:
+            # Self-hosted model, no API key needed
+            self.extractor = OllamaExtractor()
+            self.logger.info("Ollama Extractor initialized")
+            return
         
         if self.use_openai:
             try:
@@ -29,15 +71,27 @@ class CVService:
             except Exception as e:
                 self.logger.error(f"Error initializing OpenAI: {str(e)}")
                 self.use_openai = False
-                self.use_mock = True
+                self.use_mock = not self.use_local
                 
-        if self.use_mock:
+        if not self.use_openai and self.use_local:
+            self.extractor = LocalExtractor()
+            self.logger.info("Local Extractor initialized")
+        elif self.use_mock:
             self.extractor = MockExtractor()
             self.logger.info("Mock Extractor initialized")
             
         if not hasattr(self, 'extractor'):
             raise RuntimeError("No extractor available")
             
+    def get_extraction_metrics(self) -> Dict[str, Any]:
+        """Metrics of the tiered extraction router and the LLM extractor"""
+        metrics = getattr(self.extractor, 'metrics', None)
+        result = metrics.stats() if metrics else {}
+        llm = getattr(self.extractor, 'llm', self.extractor)
+        if hasattr(llm, 'stats'):
+            result['llm'] = llm.stats()
+        return result
+            
     def get_db_connection(self):
         """Get database connection"""
         return psycopg2.connect(
@@ -48,31 +102,211 @@ class CVService:
             port=os.getenv('DB_PORT', '5432')
         )
             
-    def process_cv(self, file_path):
+    def extract_cv_text(self, file_path) -> str:
+        """
+        Extract the text of a CV as it is passed to the extractor
+        
+        Args:
+            file_path (str): Path to the PDF file
+            
+        Returns:
+            str: Text without page numbers and running headers/footers
+        """
+        if self.layout_mode:
+            # Sections with headings in reading order (two-column aware)
+            extracted_text, error = self.pdf_extractor.extract_text(file_path, layout=True)
+            if error:
+                raise Exception(f"PDF extraction failed: {error}")
+            return compact_text(extracted_text)
+        
+        # Extract text per page and drop page numbers and running headers/footers
+        pages, error = self.pdf_extractor.extract_pages(file_path)
+        if error:
+            raise Exception(f"PDF extraction failed: {error}")
+        return compact_pages(pages)
+            
+    def process_cv(self, file_path, content_hash: Optional[str] = None, text: Optional[str] = None):
         """
         Process a CV from a file path
         
         Args:
             file_path (str): Path to the PDF file
+            content_hash (str): SHA-256 of a file in the blob store; the result is
+                cached with the blob, so uploading the same file again skips extraction
+            text (str): Text already extracted with extract_cv_text
             
         Returns:
             dict: Extracted CV data
         """
+        cache_kind = f"cv_extraction_{type(self.extractor).__name__.lower()}"
+        if content_hash:
+            cached = get_blob_store().get_derived(content_hash, cache_kind)
+            if cached is not None:
+                self.logger.info(f"Using cached extraction for {content_hash[:12]}")
+                return cached
+                
         try:
-            # Extract text from PDF
-            extracted_text, error = self.pdf_extractor.extract_text(file_path)
-            if error:
-                raise Exception(f"PDF extraction failed: {error}")
+            if text is None:
+                text = self.extract_cv_text(file_path)
                 
             # Process text with configured extractor
-            cv_data = self.extractor.extract_cv_data(extracted_text)
+            cv_data = self.extractor.extract_cv_data(text)
             
+            if content_hash:
+                get_blob_store().set_derived(content_hash, cache_kind, cv_data)
             return cv_data
             
         except Exception as e:
             self.logger.error(f"CV processing failed: {str(e)}")
             raise
             
+    def ingest_cv(self, user_id: int, file_path, file_name: str,
+                  content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extract and store an uploaded CV unless the user already has it
+        
+        The same file or the same text is linked to the existing CV: nothing is
+        extracted or stored. A near-duplicate (e.g. an updated version) is
+        extracted and merged into the existing CV instead of adding a second one.
+        
+        Args:
+            user_id (int): User ID
+            file_path (str): Path to the PDF file
+            file_name (str): Original file name
+            content_hash (str): SHA-256 of the file in the blob store
+            
+        Returns:
+            dict: cv_id (None if saving failed), cv_data, action ('created',
+                'merged' or 'linked'), duplicate (match details or None) and
+                replaced_hash (file hash of the merged CV before the upload)
+        """
+        index = self._duplicate_index()
+        
+        # Identical file: not even the text needs to be extracted
+        match = index.find_file(content_hash, user_id) if content_hash else None
+        linked = self._linked_cv(match, user_id)
+        if linked:
+            return linked
+        
+        text = self.extract_cv_text(file_path)
+        fingerprint = Fingerprint.from_text(text, content_hash)
+        match = index.find(fingerprint, user_id)
+        if match and (match.kind != 'similar' or match.similarity >= self.link_threshold):
+            linked = self._linked_cv(match, user_id)
+            if linked:
+                return linked
+            match = index.find(fingerprint, user_id)
+        
+        cv_data = self.process_cv(file_path, content_hash=content_hash, text=text)
+        record = {
+            'file_name': file_name,
+            'extracted_data': cv_data,
+            'skills': cv_data.get('skills', {}),
+            'projects': cv_data.get('experience', []),
+            'languages': cv_data.get('skills', {}).get('languages', []),
+            'certifications': []
+        }
+        replaced = None
+        if match:
+            # Merge the new version into the existing CV
+            record['id'] = match.cv_id
+            replaced = index.get(match.cv_id)
+            
+        cv_id = self.create_or_update_cv(user_id, record)
+        if cv_id:
+            self._save_fingerprint(cv_id, user_id, fingerprint)
+            self.logger.info(f"CV {cv_id} {'merged' if match else 'created'}"
+                             + (f" ({match.kind} duplicate, similarity {match.similarity:.2f})" if match else ""))
+        return {
+            'cv_id': cv_id,
+            'cv_data': cv_data,
+            'action': 'merged' if match else 'created',
+            'duplicate': match.__dict__ if match else None,
+            'replaced_hash': replaced.content_hash if replaced else None
+        }
+        
+    def _linked_cv(self, match, user_id: int) -> Optional[Dict[str, Any]]:
+        """Result for an upload that duplicates an existing CV, None if that CV is gone"""
+        if not match:
+            return None
+        existing = self.get_cv_by_id(match.cv_id, user_id)
+        if not existing:
+            # Deleted since it was indexed
+            self._duplicate_index().remove(match.cv_id)
+            return None
+        self.logger.info(f"Upload is a {match.kind} duplicate of CV {match.cv_id}, linked without extraction")
+        return {
+            'cv_id': match.cv_id,
+            'cv_data': existing.get('extracted_data'),
+            'action': 'linked',
+            'duplicate': match.__dict__,
+            'replaced_hash': None
+        }
+        
+    def _duplicate_index(self):
+        """Duplicate index, filled from cv_fingerprints on first use"""
+        index = get_duplicate_index()
+        with _fingerprints_lock:
+            if index.loaded:
+                return index
+            conn = None
+            cursor = None
+            try:
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT f.cv_id, d.user_id, f.content_hash, f.text_hash, f.minhash, f.simhash
+                    FROM cv_fingerprints f
+                    JOIN cv_data d ON d.id = f.cv_id
+                """)
+                for cv_id, owner_id, content_hash, text_hash, minhash, simhash in cursor.fetchall():
+                    # simhash is stored as signed BIGINT
+                    index.add(cv_id, owner_id, Fingerprint(content_hash, text_hash,
+                                                           Fingerprint.minhash_from_bytes(minhash),
+                                                           simhash & ((1 << 64) - 1)))
+                index.loaded = True
+                self.logger.info(f"Duplicate index loaded with {len(index)} CVs")
+            except Exception as e:
+                # Retried on the next upload; until then only new CVs are compared
+                self.logger.error(f"Database error loading CV fingerprints: {str(e)}")
+            finally:
+                if cursor:
+                    cursor.close()
+                if conn:
+                    conn.close()
+        return index
+        
+    def _save_fingerprint(self, cv_id: int, user_id: int, fingerprint: Fingerprint):
+        """Store the fingerprint of a CV and add it to the duplicate index"""
+        self._duplicate_index().add(cv_id, user_id, fingerprint)
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            simhash = fingerprint.simhash - (1 << 64) if fingerprint.simhash >= 1 << 63 else fingerprint.simhash
+            cursor.execute("""
+                INSERT INTO cv_fingerprints (cv_id, content_hash, text_hash, minhash, simhash)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (cv_id) DO UPDATE SET
+                    content_hash = EXCLUDED.content_hash,
+                    text_hash = EXCLUDED.text_hash,
+                    minhash = EXCLUDED.minhash,
+                    simhash = EXCLUDED.simhash,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (cv_id, fingerprint.content_hash, fingerprint.text_hash,
+                  psycopg2.Binary(fingerprint.minhash_bytes()), simhash))
+            conn.commit()
+        except Exception as e:
+            self.logger.error(f"Database error in _save_fingerprint: {str(e)}")
+            if conn:
+                conn.rollback()
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+            
     def create_or_update_cv(self, user_id: int, cv_data: Dict[str, Any]) -> Optional[int]:
         """
         Create or update a CV entry in the database
@@ -101,17 +335,20 @@ class CVService:
                         projects = %s,
                         languages = %s,
                         certifications = %s,
+                        display_name = %s,
+                        current_position = %s,
+                        current_company = %s,
+                        top_skills = %s,
+                        skill_count = %s,
+                        summary_version = %s,
                         last_modified_by = %s,
                         updated_at = %s
                     WHERE id = %s AND user_id = %s
                     RETURNING id
                 """, (
                     cv_data['file_name'],
-                    cv_data['extracted_data'],
-                    cv_data['skills'],
-                    cv_data['projects'],
-                    cv_data['languages'],
-                    cv_data['certifications'],
+                    *self._json_values(cv_data),
+                    *summary_row(cv_data['extracted_data']),
                     user_id,
                     datetime.now(),
                     cv_id,
@@ -128,19 +365,22 @@ class CVService:
                         projects,
                         languages,
                         certifications,
+                        display_name,
+                        current_position,
+                        current_company,
+                        top_skills,
+                        skill_count,
+                        summary_version,
                         last_modified_by,
                         created_at,
                         updated_at
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """, (
                     user_id,
                     cv_data['file_name'],
-                    cv_data['extracted_data'],
-                    cv_data['skills'],
-                    cv_data['projects'],
-                    cv_data['languages'],
-                    cv_data['certifications'],
+                    *self._json_values(cv_data),
+                    *summary_row(cv_data['extracted_data']),
                     user_id,
                     datetime.now(),
                     datetime.now()
@@ -165,30 +405,29 @@ class CVService:
             if conn:
                 conn.close()
                 
-    def get_cv_by_id(self, cv_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+    def get_cv_by_id(self, cv_id: int, user_id: int, raw_json: bool = False) -> Optional[Dict[str, Any]]:
         """
         Get CV by ID
         
         Args:
             cv_id (int): CV ID
             user_id (int): User ID for authorization
+            raw_json (bool): Return JSONB columns as RawJSON text instead of decoded objects
             
         Returns:
             Optional[Dict[str, Any]]: CV data if found, None otherwise
         """
+        conn = None
+        cursor = None
         try:
             conn = self.get_db_connection()
             cursor = conn.cursor()
             
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
                     id,
                     file_name,
-                    extracted_data,
-                    skills,
-                    projects,
-                    languages,
-                    certifications,
+                    {self._json_columns(CV_JSON_COLUMNS, raw_json)},
                     created_at,
                     updated_at
                 FROM cv_data
@@ -199,17 +438,8 @@ class CVService:
             if not result:
                 return None
                 
-            return {
-                'id': result[0],
-                'file_name': result[1],
-                'extracted_data': result[2],
-                'skills': result[3],
-                'projects': result[4],
-                'languages': result[5],
-                'certifications': result[6],
-                'created_at': result[7].isoformat(),
-                'updated_at': result[8].isoformat()
-            }
+            # Timestamps are serialized to ISO 8601 by the JSON provider
+            return self._row_to_dict(cursor, result, raw_json)
             
         except Exception as e:
             self.logger.error(f"Database error in get_cv_by_id: {str(e)}")
@@ -221,29 +451,209 @@ class CVService:
             if conn:
                 conn.close()
                 
-    def search_cvs(self, query: Dict[str, Any]) -> list:
+    def get_cv_file(self, cv_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the uploaded file of a CV
+        
+        Args:
+            cv_id (int): CV ID
+            user_id (int): User ID for authorization
+            
+        Returns:
+            Optional[Dict[str, Any]]: file_name and content_hash (blob store), None if unknown
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT d.file_name, f.content_hash
+                FROM cv_data d
+                JOIN cv_fingerprints f ON f.cv_id = d.id
+                WHERE d.id = %s AND d.user_id = %s AND f.content_hash IS NOT NULL
+            """, (cv_id, user_id))
+            result = cursor.fetchone()
+            if not result:
+                return None
+            return {'file_name': result[0], 'content_hash': result[1]}
+            
+        except Exception as e:
+            self.logger.error(f"Database error in get_cv_file: {str(e)}")
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+                
+    def get_template(self, template_id: int) -> Optional[TemplateSource]:
+        """
+        Get an active export template with its variables
+        
+        Args:
+            template_id (int): Template ID
+            
+        Returns:
+            Optional[TemplateSource]: Template content and version (updated_at), None if not found
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, updated_at, content
+                FROM templates
+                WHERE id = %s AND is_active
+            """, (template_id,))
+            result = cursor.fetchone()
+            if not result:
+                return None
+            cursor.execute("""
+                SELECT name, required, default_value
+                FROM template_variables
+                WHERE template_id = %s
+            """, (template_id,))
+            variables = [TemplateVariable(*row) for row in cursor.fetchall()]
+            return TemplateSource(result[0], result[1], result[2], variables)
+            
+        except Exception as e:
+            self.logger.error(f"Database error in get_template: {str(e)}")
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+                
+    def export_cv(self, cv_id: int, user_id: int, template_id: int, fmt: str = 'pdf') -> Optional[Dict[str, Any]]:
+        """
+        Render a CV with a template
+        
+        Args:
+            cv_id (int): CV ID
+            user_id (int): User ID for authorization
+            template_id (int): Template ID
+            fmt (str): 'pdf', 'html' or 'docx'
+            
+        Returns:
+            Optional[Dict[str, Any]]: file_name, mimetype and content, None if CV or template is missing
+            
+        Raises:
+            TemplateRenderError: If the template cannot be rendered
+        """
+        exports = self.export_cvs([cv_id], user_id, template_id, fmt)
+        if not exports:
+            return None
+        if isinstance(exports[0]['content'], TemplateRenderError):
+            raise exports[0]['content']
+        return exports[0]
+        
+    def export_cvs(self, cv_ids: list, user_id: int, template_id: int, fmt: str = 'pdf') -> list:
+        """
+        Render many CVs with one template (in parallel worker processes)
+        
+        Args:
+            cv_ids (list): CV IDs; CVs that do not exist are skipped
+            user_id (int): User ID for authorization
+            template_id (int): Template ID
+            fmt (str): 'pdf', 'html' or 'docx'
+            
+        Returns:
+            list: One dict per CV with cv_id, file_name, mimetype and content
+                (bytes, or the TemplateRenderError of a CV that failed);
+                empty if the template does not exist
+        """
+        template = self.get_template(template_id)
+        if not template:
+            return []
+        
+        cvs = [cv for cv in (self.get_cv_by_id(cv_id, user_id) for cv_id in cv_ids) if cv]
+        contexts = [self._template_context(cv) for cv in cvs]
+        documents = get_template_engine().render_many(template, contexts, fmt)
+        return [{
+            'cv_id': cv['id'],
+            'file_name': f"{os.path.splitext(cv['file_name'] or 'cv')[0]}_{cv['id']}.{fmt}",
+            'mimetype': MIMETYPES.get(fmt),
+            'content': document
+        } for cv, document in zip(cvs, documents)]
+        
+    @staticmethod
+    def _template_context(cv: Dict[str, Any]) -> Dict[str, Any]:
+        """Template variables: the extracted fields at top level and as 'cv', plus the record metadata"""
+        extracted = cv.get('extracted_data') or {}
+        return {
+            **extracted,
+            'cv': extracted,
+            'cv_id': cv['id'],
+            'file_name': cv['file_name'],
+            'created_at': cv.get('created_at'),
+            'updated_at': cv.get('updated_at')
+        }
+            
+    def list_cvs(self, user_id: int, limit: int = 50, offset: int = 0) -> list:
+        """
+        List the CVs of a user, most recently updated first
+        
+        Args:
+            user_id (int): User ID
+            limit (int): Maximum number of CVs
+            offset (int): Number of CVs to skip
+            
+        Returns:
+            list: CV summaries (see services/cv_summary.py), without extracted data
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self._summary_columns()}
+                FROM cv_data
+                WHERE user_id = %s
+                ORDER BY updated_at DESC, id DESC
+                LIMIT %s OFFSET %s
+            """, (user_id, limit, offset))
+            return [self._row_to_dict(cursor, row, False) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            self.logger.error(f"Database error in list_cvs: {str(e)}")
+            return []
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+            
+    def search_cvs(self, query: Dict[str, Any], raw_json: bool = False, full: bool = False) -> list:
         """
         Search CVs based on query parameters
         
         Args:
             query (Dict[str, Any]): Search parameters
+            raw_json (bool): Return JSONB columns as RawJSON text instead of decoded objects
+            full (bool): Include extracted_data and skills in addition to the summary
             
         Returns:
             list: List of matching CVs
         """
+        conn = None
+        cursor = None
         try:
             conn = self.get_db_connection()
             cursor = conn.cursor()
             
             # Base query
-            sql = """
-                SELECT 
-                    id,
-                    file_name,
-                    extracted_data,
-                    skills,
-                    created_at,
-                    updated_at
+            columns = self._summary_columns()
+            if full:
+                columns += f", {self._json_columns(('extracted_data', 'skills'), raw_json)}"
+            sql = f"""
+                SELECT {columns}
                 FROM cv_data
                 WHERE 1=1
             """
@@ -262,14 +672,7 @@ class CVService:
             cursor.execute(sql, params)
             results = cursor.fetchall()
             
-            return [{
-                'id': row[0],
-                'file_name': row[1],
-                'extracted_data': row[2],
-                'skills': row[3],
-                'created_at': row[4].isoformat(),
-                'updated_at': row[5].isoformat()
-            } for row in results]
+            return [self._row_to_dict(cursor, row, raw_json) for row in results]
             
         except Exception as e:
             self.logger.error(f"Database error in search_cvs: {str(e)}")
@@ -279,4 +682,32 @@ class CVService:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close() 
\ No newline at end of file
+                conn.close()
+
+    @staticmethod
+    def _summary_columns() -> str:
+        """Select list of list and search rows: record metadata and the summary columns"""
+        return ', '.join(('id', 'file_name', *SUMMARY_COLUMNS[:-1], 'created_at', 'updated_at'))
+
+    @staticmethod
+    def _json_values(cv_data: Dict[str, Any]) -> tuple:
+        """Values of the JSONB columns, adapted for psycopg2"""
+        return tuple(Json(cv_data[column]) for column in CV_JSON_COLUMNS)
+
+    @staticmethod
+    def _json_columns(columns, raw_json: bool) -> str:
+        """Select list for JSONB columns, cast to text when they are passed through raw"""
+        if raw_json:
+            return ', '.join(f"{column}::text AS {column}" for column in columns)
+        return ', '.join(columns)
+
+    @staticmethod
+    def _row_to_dict(cursor, row, raw_json: bool) -> Dict[str, Any]:
+        """Map a result row to a dict keyed by column name"""
+        columns = [desc[0] for desc in cursor.description]
+        data = dict(zip(columns, row))
+        if raw_json:
+            for column in CV_JSON_COLUMNS:
+                if data.get(column) is not None:
+                    data[column] = RawJSON(data[column])
+        return data
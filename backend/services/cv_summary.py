@@ -0,0 +1,134 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+# Bump when summarize() changes, backfill_summaries() then recomputes older rows
+SUMMARY_VERSION = 1
+TOP_SKILLS = 5
+# Columns of cv_data holding the summary, in the order of summary_row()
+SUMMARY_COLUMNS = ('display_name', 'current_position', 'current_company', 'top_skills', 'skill_count',
+                   'summary_version')
+
+_ONGOING = {'', 'present', 'current', 'heute', 'aktuell', 'now'}
+
+
+def _text(value: Any) -> Optional[str]:
+    """A scalar or a list of scalars as stripped text; other shapes (dicts, nested lists) give None"""
+    if isinstance(value, (list, tuple)):
+        value = " ".join(part for part in map(_text, value) if part)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    return value.strip()[:255] or None
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _name(extracted: Dict[str, Any]) -> Optional[str]:
+    personal = _dict(extracted.get('personal_data')) or _dict(extracted.get('personal_info'))
+    return _text(personal.get('name')) or _text([personal.get('first_name'), personal.get('last_name')])
+
+
+def _latest_position(experience: Any) -> Dict[str, Any]:
+    """Ongoing positions first, then by end and start date (YYYY-MM sorts as text)"""
+    if isinstance(experience, dict):
+        experience = [experience]
+    if not isinstance(experience, list):
+        return {}
+    entries = [entry for entry in experience if isinstance(entry, dict) and _text(entry.get('title'))]
+    if not entries:
+        return {}
+    return max(entries, key=lambda entry: (
+        (_text(entry.get('end_date')) or '').lower() in _ONGOING,
+        _text(entry.get('end_date')) or '',
+        _text(entry.get('start_date')) or ''
+    ))
+
+
+def _technical_skills(skills: Any) -> List[str]:
+    if isinstance(skills, dict):
+        skills = skills.get('technical')
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    if not isinstance(skills, list):
+        return []
+    return [skill for skill in map(_text, skills) if skill]
+
+
+def summarize(extracted: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compact projection of extracted CV data for list and search views
+
+    Name, latest position and the first TOP_SKILLS technical skills, i.e.
+    everything a list row shows, so lists do not load extracted_data.
+    Extracted data comes from LLMs and users, so every field is type-checked:
+    values of an unexpected shape are left out rather than failing.
+    """
+    extracted = _dict(extracted)
+    technical = _technical_skills(extracted.get('skills'))
+    position = _latest_position(extracted.get('experience'))
+    return {
+        'display_name': _name(extracted),
+        'current_position': _text(position.get('title')),
+        'current_company': _text(position.get('company')),
+        'top_skills': technical[:TOP_SKILLS],
+        'skill_count': len(technical),
+        'summary_version': SUMMARY_VERSION
+    }
+
+
+def summary_row(extracted: Optional[Dict[str, Any]]) -> tuple:
+    """summarize() as values in the order of SUMMARY_COLUMNS"""
+    summary = summarize(extracted)
+    return tuple(summary[column] for column in SUMMARY_COLUMNS)
+
+
+def _backfill_row(cv_id: int, extracted: Any) -> tuple:
+    try:
+        return summary_row(extracted)
+    except Exception as e:
+        # An empty summary marks the row as done, so the backfill does not select it again
+        logger.warning(f"CV {cv_id}: summary could not be computed, stored empty: {str(e)}")
+        return summary_row(None)
+
+
+def backfill_summaries(conn, batch_size: int = 500) -> int:
+    """Compute missing or outdated summaries of cv_data rows
+
+    Returns:
+        The number of updated rows
+    """
+    updated = 0
+    assignments = ', '.join(f"{column} = v.{column}" for column in SUMMARY_COLUMNS)
+    cursor = conn.cursor()
+    try:
+        while True:
+            cursor.execute("""
+                SELECT id, extracted_data
+                FROM cv_data
+                WHERE summary_version IS NULL OR summary_version < %s
+                ORDER BY id
+                LIMIT %s
+            """, (SUMMARY_VERSION, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            execute_values(cursor, f"""
+                UPDATE cv_data AS d
+                SET {assignments}
+                FROM (VALUES %s) AS v (id, {', '.join(SUMMARY_COLUMNS)})
+                WHERE d.id = v.id
+            """, [(cv_id, *_backfill_row(cv_id, extracted)) for cv_id, extracted in rows],
+                template="(%s, %s, %s, %s, %s::text[], %s, %s)")
+            conn.commit()
+            updated += len(rows)
+    finally:
+        cursor.close()
+    if updated:
+        logger.info(f"CV summaries computed for {updated} CVs")
+    return updated
@@ -0,0 +1,170 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a snapshot is served before it is recomputed
+REFRESH_INTERVAL = int(os.getenv('STATS_REFRESH_SECONDS', '300'))
+# Minimum age of a snapshot before an explicit refresh request recomputes it
+MIN_REFRESH_AGE = int(os.getenv('STATS_MIN_REFRESH_SECONDS', '10'))
+# Number of skills in the distribution, the rest is summed up as 'other'
+TOP_SKILLS = int(os.getenv('STATS_TOP_SKILLS', '20'))
+
+
+class DashboardStats:
+    """Precomputed dashboard statistics of the employee database (MySQL)
+
+    Headcount per department, skill distribution and project count are
+    computed together into one snapshot that requests read from memory.
+    MySQL has no materialized views, so the snapshot is materialized here:
+    once it is older than refresh_interval the next request starts a
+    recomputation in the background and is still answered from the old
+    snapshot, so only the very first request waits for the queries.
+    """
+
+    def __init__(self, connect: Callable[[], Any], refresh_interval: int = REFRESH_INTERVAL):
+        """
+        Args:
+            connect: Returns a new DB-API connection (tuple rows)
+            refresh_interval: Maximum age of a snapshot in seconds
+        """
+        self.connect = connect
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._stats = {'reads': 0, 'refreshes': 0, 'refresh_errors': 0, 'last_refresh_ms': 0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current statistics with 'refreshed_at' and their age in seconds"""
+        with self._lock:
+            snapshot, computed_at = self._snapshot, self._computed_at
+            self._stats['reads'] += 1
+        if snapshot is None:
+            # Concurrent first requests wait for one computation
+            with self._refreshing:
+                snapshot = self._snapshot or self.refresh()
+        elif time.monotonic() - computed_at > self.refresh_interval and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, name='dashboard-stats', daemon=True).start()
+        with self._lock:
+            age = time.monotonic() - self._computed_at
+        return {**snapshot, 'age': round(age, 1)}
+
+    def refresh(self) -> Dict[str, Any]:
+        """Recompute the snapshot now (e.g. after bulk imports)"""
+        started = time.monotonic()
+        try:
+            snapshot = self._compute()
+        except Exception as e:
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+            logger.error(f"Dashboard statistics could not be computed: {str(e)}")
+            raise
+        with self._lock:
+            self._snapshot = snapshot
+            self._computed_at = time.monotonic()
+            self._stats['refreshes'] += 1
+            self._stats['last_refresh_ms'] = round((self._computed_at - started) * 1000, 1)
+        return snapshot
+
+    def request_refresh(self) -> bool:
+        """Recompute now on request, unless a refresh is running or the snapshot is younger than MIN_REFRESH_AGE
+
+        Uses the same lock as the background refresh, so concurrent requests
+        start at most one computation; the others keep the current snapshot.
+
+        Returns:
+            True if this call recomputed the snapshot
+        """
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._computed_at < MIN_REFRESH_AGE:
+                return False
+        if not self._refreshing.acquire(blocking=False):
+            return False
+        try:
+            self.refresh()
+        finally:
+            self._refreshing.release()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass  # logged in refresh(), the old snapshot stays in use
+        finally:
+            self._refreshing.release()
+
+    def _compute(self) -> Dict[str, Any]:
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            # Departments without employees are listed with 0, employees without department as NULL
+            cursor.execute("""
+                SELECT a.name, COUNT(m.mitarbeiter_id)
+                FROM abteilungen a
+                LEFT JOIN mitarbeiter m ON m.abteilungs_id = a.abteilungs_id
+                GROUP BY a.abteilungs_id, a.name
+                UNION ALL
+                SELECT NULL, COUNT(*) FROM mitarbeiter WHERE abteilungs_id IS NULL
+            """)
+            rows = cursor.fetchall()
+
+            cursor.execute("SELECT faehigkeiten FROM mitarbeiter WHERE faehigkeiten IS NOT NULL AND faehigkeiten <> ''")
+            skill_rows = cursor.fetchall()
+
+            cursor.execute("SELECT COUNT(*) FROM projekte")
+            project_count = cursor.fetchone()[0]
+            cursor.close()
+        finally:
+            connection.close()
+
+        departments = sorted(((name, count) for name, count in rows if name is not None),
+                             key=lambda item: (-item[1], item[0]))
+        unassigned = sum(count for name, count in rows if name is None)
+
+        # faehigkeiten is a comma separated list; skills are counted case-insensitively
+        skills: Counter = Counter()
+        labels: Dict[str, str] = {}
+        for (text,) in skill_rows:
+            for skill in {part.strip() for part in text.split(',') if part.strip()}:
+                key = skill.lower()
+                labels.setdefault(key, skill)
+                skills[key] += 1
+        top = skills.most_common(TOP_SKILLS)
+
+        return {
+            'employees': sum(count for _, count in departments) + unassigned,
+            'departments': len(departments),
+            'projects': project_count,
+            'headcount': [{'department': name, 'count': count} for name, count in departments],
+            'unassigned': unassigned,
+            'skills': [{'skill': labels[key], 'count': count} for key, count in top],
+            'other_skills': sum(skills.values()) - sum(count for _, count in top),
+            'distinct_skills': len(skills),
+            'refreshed_at': datetime.now(timezone.utc).isoformat()
+        }
+
+
+_dashboard_stats: Optional[DashboardStats] = None
+_dashboard_stats_lock = threading.Lock()
+
+
+def get_dashboard_stats(connect: Callable[[], Any]) -> DashboardStats:
+    """Process-wide statistics; connect is used by the first call"""
+    global _dashboard_stats
+    with _dashboard_stats_lock:
+        if _dashboard_stats is None:
+            _dashboard_stats = DashboardStats(connect)
+        return _dashboard_stats
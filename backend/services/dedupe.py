@@ -0,0 +1,215 @@
+import os
+import re
+import random
+import hashlib
+import threading
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+# MinHash signature length and LSH banding (16 bands x 8 rows: candidates from ~0.7 Jaccard)
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# SimHash: 64 bits in 4 blocks; two hashes within distance 3 share at least one block
+SIMHASH_BITS = 64
+SIMHASH_BLOCKS = 4
+SIMHASH_MAX_DISTANCE = 3
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_rng = random.Random(20240501)  # fixed seed: signatures must stay comparable across restarts
+_PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens; layout, punctuation and case do not matter"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def minhash(tokens: List[str]) -> List[int]:
+    """MinHash signature of the word shingles of a text"""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashes = [_hash64(shingle) & MAX_HASH for shingle in shingles]
+    return [min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over token frequencies (insensitive to section order)"""
+    weights = [0] * SIMHASH_BITS
+    for token, count in Counter(tokens).items():
+        value = _hash64(token)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def jaccard(left: List[int], right: List[int]) -> float:
+    """Jaccard similarity estimated from two MinHash signatures"""
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+def hamming(left: int, right: int) -> int:
+    return bin(left ^ right).count('1')
+
+
+@dataclass
+class Fingerprint:
+    """Exact and similarity signatures of one CV"""
+    content_hash: Optional[str]   # SHA-256 of the file
+    text_hash: str                # SHA-256 of the normalized text
+    minhash: List[int]
+    simhash: int
+
+    @classmethod
+    def from_text(cls, text: str, content_hash: Optional[str] = None) -> 'Fingerprint':
+        tokens = tokenize(text)
+        text_hash = hashlib.sha256(" ".join(tokens).encode('utf-8')).hexdigest()
+        return cls(content_hash, text_hash, minhash(tokens), simhash(tokens))
+
+    def minhash_bytes(self) -> bytes:
+        return array('I', self.minhash).tobytes()
+
+    @staticmethod
+    def minhash_from_bytes(data: bytes) -> List[int]:
+        values = array('I')
+        values.frombytes(bytes(data))
+        return values.tolist()
+
+
+@dataclass
+class DuplicateMatch:
+    cv_id: int
+    # 'file' (same bytes), 'text' (same normalized text) or 'similar'
+    kind: str
+    similarity: float
+    simhash_distance: int
+
+
+class DuplicateIndex:
+    """In-memory index of CV fingerprints
+
+    Exact matches are dictionary lookups. Near-duplicates are found without
+    comparing against every CV: MinHash LSH buckets (bands of the signature)
+    and SimHash block tables only return candidates that share a bucket,
+    which are then verified.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        # Set once the stored fingerprints have been added (see CVService)
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[Optional[int], Fingerprint]] = {}
+        self._by_content: Dict[str, Set[int]] = defaultdict(set)
+        self._by_text: Dict[str, Set[int]] = defaultdict(set)
+        self._bands: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = defaultdict(set)
+        self._blocks: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, cv_id: int, owner_id: Optional[int], fingerprint: Fingerprint):
+        with self._lock:
+            self._remove(cv_id)
+            self._entries[cv_id] = (owner_id, fingerprint)
+            for key in self._keys(fingerprint):
+                key[0][key[1]].add(cv_id)
+
+    def remove(self, cv_id: int):
+        with self._lock:
+            self._remove(cv_id)
+
+    def get(self, cv_id: int) -> Optional[Fingerprint]:
+        entry = self._entries.get(cv_id)
+        return entry[1] if entry else None
+
+    def find_file(self, content_hash: str, owner_id: Optional[int] = None) -> Optional[DuplicateMatch]:
+        """CV of the same owner uploaded from the identical file (checked before any extraction)"""
+        with self._lock:
+            return self._find_exact('file', self._by_content, content_hash, owner_id)
+
+    def find(self, fingerprint: Fingerprint, owner_id: Optional[int] = None) -> Optional[DuplicateMatch]:
+        """Best duplicate of a fingerprint among the CVs of the same owner"""
+        with self._lock:
+            exact = (self._find_exact('file', self._by_content, fingerprint.content_hash, owner_id)
+                     or self._find_exact('text', self._by_text, fingerprint.text_hash, owner_id))
+            if exact:
+                return exact
+
+            candidates = set()
+            for band in range(BANDS):
+                candidates |= self._bands.get((band, self._band(fingerprint, band)), set())
+            for block in range(SIMHASH_BLOCKS):
+                candidates |= self._blocks.get((block, self._block(fingerprint, block)), set())
+
+            best = None
+            for cv_id in candidates:
+                stored_owner, stored = self._entries[cv_id]
+                if stored_owner != owner_id:
+                    continue
+                similarity = jaccard(fingerprint.minhash, stored.minhash)
+                distance = hamming(fingerprint.simhash, stored.simhash)
+                if similarity < self.threshold and distance > SIMHASH_MAX_DISTANCE:
+                    continue
+                if best is None or similarity > best.similarity:
+                    best = DuplicateMatch(cv_id, 'similar', similarity, distance)
+            return best
+
+    def _find_exact(self, kind: str, table: Dict[str, Set[int]], key: Optional[str],
+                    owner_id: Optional[int]) -> Optional[DuplicateMatch]:
+        for cv_id in sorted(table.get(key, ())) if key else ():
+            if self._entries[cv_id][0] == owner_id:
+                return DuplicateMatch(cv_id, kind, 1.0, 0)
+        return None
+
+    def _keys(self, fingerprint: Fingerprint):
+        if fingerprint.content_hash:
+            yield self._by_content, fingerprint.content_hash
+        yield self._by_text, fingerprint.text_hash
+        for band in range(BANDS):
+            yield self._bands, (band, self._band(fingerprint, band))
+        for block in range(SIMHASH_BLOCKS):
+            yield self._blocks, (block, self._block(fingerprint, block))
+
+    def _remove(self, cv_id: int):
+        entry = self._entries.pop(cv_id, None)
+        if entry is None:
+            return
+        for table, key in self._keys(entry[1]):
+            table[key].discard(cv_id)
+            if not table[key]:
+                del table[key]
+
+    @staticmethod
+    def _band(fingerprint: Fingerprint, band: int) -> Tuple[int, ...]:
+        return tuple(fingerprint.minhash[band * ROWS:(band + 1) * ROWS])
+
+    @staticmethod
+    def _block(fingerprint: Fingerprint, block: int) -> int:
+        width = SIMHASH_BITS // SIMHASH_BLOCKS
+        return fingerprint.simhash >> (block * width) & ((1 << width) - 1)
+
+
+_duplicate_index = None
+_duplicate_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    """Process-wide index, near-duplicate threshold from DEDUPE_THRESHOLD (MinHash Jaccard)"""
+    global _duplicate_index
+    with _duplicate_index_lock:
+        if _duplicate_index is None:
+            _duplicate_index = DuplicateIndex(float(os.getenv('DEDUPE_THRESHOLD', '0.8')))
+        return _duplicate_index
@@ -0,0 +1,215 @@
+import os
+import json
+import hashlib
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# A new full snapshot at the latest after this many versions (bounds the patch chain)
+SNAPSHOT_INTERVAL = int(os.getenv('VERSION_SNAPSHOT_INTERVAL', '20'))
+# ... or once the deltas since the last snapshot add up to this share of its size
+SNAPSHOT_DELTA_RATIO = float(os.getenv('VERSION_SNAPSHOT_DELTA_RATIO', '0.5'))
+# Namespace of the advisory locks that serialize version numbers per document
+LOCK_NAMESPACE = 4611
+
+# Versions never change, so reconstructed contents can be cached without invalidation
+_contents = TTLCache(ttl=600, maxsize=256)
+
+
+def make_delta(base: str, target: str) -> str:
+    """Line-based delta from base to target as compact JSON
+
+    Operations: n > 0 copies n lines of base, n < 0 skips -n lines of base,
+    a list inserts its lines.
+    """
+    old, new = base.splitlines(keepends=True), target.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new[j1:j2])
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """Inverse of make_delta: the target text"""
+    lines = base.splitlines(keepends=True)
+    result: List[str] = []
+    position = 0
+    for op in json.loads(delta):
+        if isinstance(op, list):
+            result.extend(op)
+        elif op > 0:
+            result.extend(lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(result)
+
+
+def _sha256(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class DocumentVersionService:
+    """Version history of documents in document_versions, stored as snapshots and deltas
+
+    Every version is stored either in full ('full') or as a delta to the
+    previous version ('delta'); snapshot_version points to the full version
+    its chain starts from, so a version is rebuilt from one query: the
+    snapshot plus at most SNAPSHOT_INTERVAL - 1 deltas. Rows written before
+    these columns existed count as full versions.
+    """
+
+    def __init__(self, db_connection):
+        self.conn = db_connection
+
+    def add_version(self, document_id: int, content: str, created_by: Optional[int] = None) -> int:
+        """Store a new version of a document
+
+        Returns:
+            The new version number; the latest version number if the content is unchanged
+        """
+        cursor = self.conn.cursor()
+        try:
+            # Concurrent writers of the same document wait here until the commit
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (LOCK_NAMESPACE, document_id))
+            cursor.execute("""
+                SELECT version_number, COALESCE(snapshot_version, version_number)
+                FROM document_versions
+                WHERE document_id = %s
+                ORDER BY version_number DESC
+                LIMIT 1
+            """, (document_id,))
+            latest = cursor.fetchone()
+
+            storage, stored, snapshot = 'full', content, None
+            if latest:
+                latest_version, snapshot = latest
+                previous = self._reconstruct(cursor, document_id, latest_version)
+                if previous == content:
+                    self.conn.rollback()
+                    return latest_version
+                delta = make_delta(previous, content)
+                if self._delta_fits(cursor, document_id, snapshot, delta, content):
+                    storage, stored = 'delta', delta
+            version = latest[0] + 1 if latest else 1
+
+            cursor.execute("""
+                INSERT INTO document_versions (
+                    document_id, version_number, content, storage, snapshot_version,
+                    content_size, content_hash, created_by
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, (document_id, version, stored, storage, snapshot if storage == 'delta' else version,
+                  len(content), _sha256(content), created_by))
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Error storing version of document {document_id}: {str(e)}")
+            raise
+        finally:
+            cursor.close()
+
+        _contents.set((document_id, version), content)
+        return version
+
+    def get_version(self, document_id: int, version_number: Optional[int] = None) -> Optional[str]:
+        """Content of a version (the latest if version_number is None), None if it does not exist"""
+        cursor = self.conn.cursor()
+        try:
+            if version_number is None:
+                cursor.execute("SELECT MAX(version_number) FROM document_versions WHERE document_id = %s",
+                               (document_id,))
+                version_number = cursor.fetchone()[0]
+                if version_number is None:
+                    return None
+            return self._reconstruct(cursor, document_id, version_number)
+        finally:
+            cursor.close()
+
+    def list_versions(self, document_id: int) -> List[Dict[str, Any]]:
+        """Versions of a document, newest first, without their contents"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT version_number, storage, content_size, content_hash, created_at, created_by
+                FROM document_versions
+                WHERE document_id = %s
+                ORDER BY version_number DESC
+            """, (document_id,))
+            columns = ('version_number', 'storage', 'content_size', 'content_hash', 'created_at', 'created_by')
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def storage_stats(self, document_id: int) -> Dict[str, int]:
+        """Stored characters vs. the size of all versions in full"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT COUNT(*),
+                       COUNT(*) FILTER (WHERE storage = 'full'),
+                       COALESCE(SUM(LENGTH(content)), 0),
+                       COALESCE(SUM(COALESCE(content_size, LENGTH(content))), 0)
+                FROM document_versions
+                WHERE document_id = %s
+            """, (document_id,))
+            versions, snapshots, stored, full = cursor.fetchone()
+            return {'versions': versions, 'snapshots': snapshots, 'stored_chars': stored, 'full_chars': full}
+        finally:
+            cursor.close()
+
+    def _delta_fits(self, cursor, document_id: int, snapshot: int, delta: str, content: str) -> bool:
+        """Whether the new version should extend the current chain instead of starting a snapshot"""
+        if len(delta) >= len(content):
+            return False
+        cursor.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(LENGTH(content)) FILTER (WHERE storage = 'delta'), 0),
+                   MAX(COALESCE(content_size, LENGTH(content))) FILTER (WHERE version_number = %s)
+            FROM document_versions
+            WHERE document_id = %s
+              AND COALESCE(snapshot_version, version_number) = %s
+        """, (snapshot, document_id, snapshot))
+        chain_length, delta_chars, snapshot_size = cursor.fetchone()
+        if chain_length >= SNAPSHOT_INTERVAL:
+            return False
+        return delta_chars + len(delta) <= SNAPSHOT_DELTA_RATIO * (snapshot_size or 0)
+
+    def _reconstruct(self, cursor, document_id: int, version_number: int) -> Optional[str]:
+        cached = _contents.get((document_id, version_number))
+        if cached is not None:
+            return cached
+
+        # The snapshot of the requested version and all deltas up to it
+        cursor.execute("""
+            SELECT v.version_number, v.storage, v.content, target.content_hash
+            FROM document_versions target
+            JOIN document_versions v
+              ON v.document_id = target.document_id
+             AND v.version_number BETWEEN COALESCE(target.snapshot_version, target.version_number)
+                                      AND target.version_number
+            WHERE target.document_id = %s AND target.version_number = %s
+            ORDER BY v.version_number
+        """, (document_id, version_number))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+
+        content = None
+        for _, storage, stored, _ in rows:
+            content = apply_delta(content, stored) if storage == 'delta' else stored
+        expected = rows[-1][3]
+        if expected and _sha256(content) != expected:
+            raise ValueError(f"Version {version_number} of document {document_id} could not be restored")
+
+        _contents.set((document_id, version_number), content)
+        return content
@@ -0,0 +1,234 @@
+import os
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.local_extractor import LocalExtractor
+from services.prompt_builder import FIELD_SECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Sections many CVs do not have a heading for; their absence does not mean the data is elsewhere
+OPTIONAL_SECTIONS = {'header', 'personal_data', 'summary', 'languages', 'certifications', 'projects'}
+
+# Rough token estimate for budgeting/metrics (OpenAI: ~4 characters per token)
+CHARS_PER_TOKEN = 4
+# Fixed part of the extraction prompt (system prompt and schema) in tokens
+PROMPT_OVERHEAD_TOKENS = 450
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of prompt tokens for a text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class ExtractionMetrics:
+    """Thread-safe counters for the extraction router"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.llm_calls = 0
+        self.llm_calls_avoided = 0
+        self.llm_errors = 0
+        self.fields_local = 0
+        self.fields_llm = 0
+        self.tokens_sent = 0
+        self.tokens_avoided = 0
+
+    def record(self, fields_local: int, fields_llm: int, tokens_full: int, tokens_sent: int, error: bool = False):
+        with self._lock:
+            self.documents += 1
+            self.fields_local += fields_local
+            self.fields_llm += fields_llm
+            if tokens_sent:
+                self.llm_calls += 1
+            else:
+                self.llm_calls_avoided += 1
+            self.llm_errors += int(error)
+            self.tokens_sent += tokens_sent
+            self.tokens_avoided += tokens_full - tokens_sent
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the counters for monitoring"""
+        with self._lock:
+            total_tokens = self.tokens_sent + self.tokens_avoided
+            return {
+                'documents': self.documents,
+                'llm_calls': self.llm_calls,
+                'llm_calls_avoided': self.llm_calls_avoided,
+                'llm_errors': self.llm_errors,
+                'fields_local': self.fields_local,
+                'fields_llm': self.fields_llm,
+                'tokens_sent': self.tokens_sent,
+                'tokens_avoided': self.tokens_avoided,
+                'token_savings_ratio': round(self.tokens_avoided / total_tokens, 3) if total_tokens else 0.0,
+            }
+
+
+class ExtractionRouter:
+    """Tiered CV extraction: local rules first, LLM only for low-confidence fields
+
+    Every document goes through the LocalExtractor. Fields whose confidence is
+    below the threshold are sent to the LLM extractor together with only the
+    CV sections they need, and the LLM result replaces the local one for
+    exactly those fields. Implements the `extract_cv_data` contract.
+    """
+
+    def __init__(self, local_extractor: Optional[LocalExtractor] = None, llm_extractor=None,
+                 threshold: Optional[float] = None):
+        """Initialize the router
+
+        Args:
+            local_extractor: Fast first tier (default: a new LocalExtractor)
+            llm_extractor: Extractor with `extract_cv_data(text, fields=...)`, None keeps everything local
+            threshold: Minimum confidence to accept a local field (EXTRACTION_CONFIDENCE_THRESHOLD, default 0.75)
+        """
+        self.local = local_extractor or LocalExtractor()
+        self.llm = llm_extractor
+        if threshold is None:
+            threshold = float(os.getenv('EXTRACTION_CONFIDENCE_THRESHOLD', '0.75'))
+        self.threshold = threshold
+        self.metrics = ExtractionMetrics()
+        logger.info(f"Extraction router initialized (threshold {self.threshold}, LLM tier {'on' if llm_extractor else 'off'})")
+
+    def test_connection(self) -> bool:
+        """The router works without the LLM tier, so only a configured LLM is tested"""
+        return self.llm.test_connection() if self.llm else True
+
+    def extract_cv_data(self, text: str) -> Dict[str, Any]:
+        """Extract structured data from CV text
+
+        Args:
+            text: The CV text to analyze
+
+        Returns:
+            Dict with extracted data in standardized format
+        """
+        data, _ = self.extract_with_confidence(text)
+        return data
+
+    def extract_from_text(self, text: str) -> Dict[str, Any]:
+        """Wrapper method for text extraction"""
+        return self.extract_cv_data(text)
+
+    def extract_with_confidence(self, text: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Extract CV data and return the per-field confidence of the local pass
+
+        Returns:
+            Tuple of (extracted data, {field: confidence})
+        """
+        sections = self.local.segment_sections(text)
+        data = self.local.extract_sections(text, sections)
+        confidence = self.score(data, sections)
+
+        unresolved = [field for field, score in confidence.items() if score < self.threshold]
+        tokens_full = estimate_tokens(text) + PROMPT_OVERHEAD_TOKENS
+        if not unresolved or self.llm is None:
+            self.metrics.record(len(confidence), 0, tokens_full, 0)
+            return data, confidence
+
+        prompt_text = self.build_partial_text(text, sections, unresolved)
+        tokens_sent = estimate_tokens(prompt_text) + PROMPT_OVERHEAD_TOKENS * len(unresolved) // len(FIELD_SECTIONS)
+        try:
+            llm_data = self.llm.extract_cv_data(prompt_text, fields=unresolved)
+        except Exception as e:
+            # Keep the local result rather than failing the upload
+            logger.error(f"LLM extraction failed, using local result: {str(e)}")
+            self.metrics.record(len(confidence), 0, tokens_full, tokens_sent, error=True)
+            return data, confidence
+
+        for field in unresolved:
+            data[field] = self.merge_field(field, data.get(field), llm_data.get(field))
+        self.metrics.record(len(confidence) - len(unresolved), len(unresolved), tokens_full, tokens_sent)
+        return data, confidence
+
+    @staticmethod
+    def build_partial_text(text: str, sections: Dict[str, str], fields: List[str]) -> str:
+        """Collect the CV sections needed for the given fields
+
+        Falls back to the full text when a needed section was not found by the
+        segmentation, since the information may then be anywhere in the CV.
+        """
+        parts = []
+        for field in fields:
+            for section in FIELD_SECTIONS[field]:
+                content = sections.get(section)
+                if content is None:
+                    if section not in OPTIONAL_SECTIONS:
+                        return text
+                    continue
+                if content and content not in parts:
+                    parts.append(content)
+        return "\n\n".join(parts) if parts else text
+
+    def score(self, data: Dict[str, Any], sections: Dict[str, str]) -> Dict[str, float]:
+        """Confidence in [0, 1] per top-level field of the local result"""
+        return {
+            'personal_data': self._score_personal_data(data.get('personal_data') or {}),
+            'education': self._score_entries(data.get('education') or [], 'education' in sections, ('degree', 'institution'), ('start_date',)),
+            'experience': self._score_entries(data.get('experience') or [], 'experience' in sections, ('title', 'company'), ('start_date',)),
+            'skills': self._score_skills(data.get('skills') or {}, sections),
+        }
+
+    @staticmethod
+    def _score_personal_data(personal: Dict[str, Any]) -> float:
+        location = personal.get('location') or {}
+        weights = (
+            (personal.get('first_name') and personal.get('last_name'), 0.4),
+            (personal.get('email'), 0.3),
+            (personal.get('phone'), 0.15),
+            (location.get('city'), 0.15),
+        )
+        return round(float(sum(weight for present, weight in weights if present)), 3)
+
+    @staticmethod
+    def _score_entries(entries: List[Dict[str, Any]], has_section: bool, content_keys, date_keys) -> float:
+        if not entries:
+            # Either the CV has none or the rules missed them, the LLM decides
+            return 0.0
+        per_entry = []
+        for entry in entries:
+            content = sum(1 for key in content_keys if entry.get(key)) / len(content_keys)
+            dates = sum(1 for key in date_keys if entry.get(key)) / len(date_keys)
+            per_entry.append(0.6 * content + 0.4 * dates)
+        score = sum(per_entry) / len(per_entry)
+        # Entries found outside a recognized section are less trustworthy
+        return round(score if has_section else score * 0.7, 3)
+
+    @staticmethod
+    def _score_skills(skills: Dict[str, Any], sections: Dict[str, str]) -> float:
+        technical = skills.get('technical') or []
+        languages = skills.get('languages') or []
+        score = min(len(technical), 5) / 5 * 0.6
+        if languages:
+            score += 0.4 * sum(1 for language in languages if language.get('level')) / len(languages)
+        elif 'languages' not in sections:
+            # Languages are optional in many CVs, do not penalize a missing section fully
+            score += 0.2
+        if 'skills' not in sections:
+            score *= 0.8
+        return round(score, 3)
+
+    @staticmethod
+    def merge_field(field: str, local_value: Any, llm_value: Any) -> Any:
+        """Merge the LLM result for a field into the local one"""
+        if not llm_value:
+            return local_value
+        if field != 'skills' or not isinstance(local_value, dict):
+            return llm_value
+
+        merged = {}
+        for key in ('technical', 'soft'):
+            seen = {}
+            for item in (llm_value.get(key) or []) + (local_value.get(key) or []):
+                seen.setdefault(item.lower(), item)
+            merged[key] = list(seen.values())
+        languages = {item.get('language', '').lower(): item for item in local_value.get('languages') or []}
+        for item in llm_value.get('languages') or []:
+            # LLM wins unless it returned no level
+            key = item.get('language', '').lower()
+            if item.get('level') or key not in languages:
+                languages[key] = item
+        merged['languages'] = [item for key, item in languages.items() if key]
+        return merged
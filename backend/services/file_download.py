@@ -0,0 +1,78 @@
+import io
+import os
+import hashlib
+from typing import Optional
+from urllib.parse import quote
+
+from flask import redirect, send_file
+
+from services.blob_store import BlobStore, get_blob_store, blob_name
+
+# Content-addressed files never change under their hash
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Plain files (uploads from before the blob store) may be replaced in place
+FILE_MAX_AGE = int(os.getenv('DOWNLOAD_MAX_AGE', '3600'))
+PRESIGNED_URL_EXPIRES = int(os.getenv('DOWNLOAD_URL_EXPIRES', '3600'))
+
+
+def send_blob(sha256: str, download_name: Optional[str] = None, mimetype: Optional[str] = None,
+              as_attachment: bool = False, store: Optional[BlobStore] = None):
+    """Response streaming a blob from the store
+
+    Local blobs are sent with send_file: the file is streamed in chunks
+    (os.sendfile through wsgi.file_wrapper, or X-Sendfile when the app sets
+    USE_X_SENDFILE behind a proxy), Range requests get 206 responses and the
+    hash is the ETag, so If-None-Match gets a 304. Remote blobs redirect to a
+    presigned URL, the object store serves ranges itself.
+
+    Raises:
+        FileNotFoundError: If the blob does not exist
+    """
+    store = store or get_blob_store()
+    if not store.exists(sha256):
+        raise FileNotFoundError(sha256)
+
+    path = store.local_path(sha256)
+    if path is None:
+        disposition = 'attachment' if as_attachment else 'inline'
+        headers = {'ResponseContentDisposition':
+                   f"{disposition}; filename*=UTF-8''{quote(download_name or sha256)}"}
+        if mimetype:
+            headers['ResponseContentType'] = mimetype
+        return redirect(store.backend.url(blob_name(sha256), PRESIGNED_URL_EXPIRES, **headers))
+
+    response = send_file(path, mimetype=mimetype,
+                         as_attachment=as_attachment, download_name=download_name or sha256,
+                         conditional=True, etag=sha256, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+
+def send_stored_file(reference: str, download_name: Optional[str] = None, mimetype: Optional[str] = None,
+                     as_attachment: bool = False):
+    """Response for a stored file reference: a blob ('blob:<sha256>' or blob path) or a plain file path
+
+    Plain files are streamed the same way, with an ETag from modification
+    time and size and a shorter cache lifetime.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    store = get_blob_store()
+    sha256 = store.resolve(reference)
+    if sha256:
+        return send_blob(sha256, download_name, mimetype, as_attachment, store)
+
+    if not reference or not os.path.isfile(reference):
+        raise FileNotFoundError(reference)
+    return send_file(os.path.abspath(reference), mimetype=mimetype,
+                     as_attachment=as_attachment, download_name=download_name or os.path.basename(reference),
+                     conditional=True, max_age=FILE_MAX_AGE)
+
+
+def send_bytes(data: bytes, download_name: str, mimetype: Optional[str] = None, as_attachment: bool = False):
+    """Response for file content held in memory (legacy BLOB columns), with ranges and a content ETag"""
+    return send_file(io.BytesIO(data), mimetype=mimetype,
+                     as_attachment=as_attachment, download_name=download_name,
+                     conditional=True, etag=hashlib.sha256(data).hexdigest(), max_age=FILE_MAX_AGE)
+
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import logging
+import datetime
+import decimal
+import uuid
+from typing import Any, Union
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib encoder is used instead
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class RawJSON:
+    """Already serialized JSON (e.g. a JSONB column fetched as ::text)
+
+    Embedded into the response as-is instead of being decoded and
+    re-encoded. Deliberately not a str subclass: both encoders serialize
+    str subclasses natively, which would turn the value into a quoted string.
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: Union[str, bytes]):
+        self.text = text.decode('utf-8') if isinstance(text, bytes) else text
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.text!r})"
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types neither encoder handles natively"""
+    if isinstance(obj, decimal.Decimal):
+        # Same as Flask's default provider: keep full precision
+        return str(obj)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, RawJSON):
+        # orjson.Fragment (orjson >= 3.10) embeds the text without parsing it
+        return orjson.Fragment(obj.text)
+    return _default(obj)
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return _default(obj)
+
+
+def _spliced(encode, default) -> bytes:
+    """Encode with RawJSON values written as placeholder strings, then splice their text in
+
+    For encoders without a raw-value hook (stdlib json, orjson < 3.10). The
+    placeholder carries a random token, so it cannot collide with real data.
+    """
+    token = uuid.uuid4().hex
+    raw = []
+
+    def placeholder(obj: Any) -> Any:
+        if isinstance(obj, RawJSON):
+            raw.append(obj.text)
+            return f"{token}:{len(raw) - 1}"
+        return default(obj)
+
+    encoded = encode(placeholder)
+    if not raw:
+        return encoded
+    return re.sub(f'"{token}:(\\d+)"'.encode('ascii'),
+                  lambda match: raw[int(match.group(1))].encode('utf-8'), encoded)
+
+
+def _use_orjson() -> bool:
+    if orjson is None:
+        return False
+    return os.getenv('JSON_PROVIDER', 'orjson').lower() == 'orjson'
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes with the configured encoder"""
+    if _USE_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if _HAS_FRAGMENT:
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        return _spliced(lambda default: orjson.dumps(obj, default=default, option=option), _default)
+    return _spliced(lambda default: json.dumps(
+        obj, default=default, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys
+    ).encode('utf-8'), _stdlib_default)
+
+
+_USE_ORJSON = _use_orjson()
+_HAS_FRAGMENT = _USE_ORJSON and hasattr(orjson, 'Fragment')
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (falls back to the stdlib encoder)
+
+    Datetimes are written as ISO 8601 (like the previous explicit isoformat()
+    calls in the services), Decimals as strings, and RawJSON values are passed
+    through without a decode/encode round trip.
+    """
+
+    sort_keys = False
+    mimetype = 'application/json'
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if _USE_ORJSON:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the intermediate str: orjson already produces bytes
+        return self._app.response_class(dumps_bytes(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+logger.info(f"JSON provider uses {'orjson' if _USE_ORJSON else 'stdlib json'}")
@@ -0,0 +1,162 @@
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+CODE_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+LITERAL_CHARS = set('-+.0123456789eEtruefalsn')
+
+
+@dataclass
+class RepairResult:
+    """Outcome of parsing a possibly malformed model reply"""
+    data: Any
+    # True when the reply was valid JSON as is
+    valid: bool
+    # False when the reply was cut off and closed by the repair
+    complete: bool = True
+    # Top-level keys whose values were cut off (their data is partial)
+    truncated_keys: List[str] = field(default_factory=list)
+
+
+class JSONRepairError(ValueError):
+    """Raised when no JSON value can be salvaged from the text"""
+
+
+def repair_json(text: str) -> RepairResult:
+    """Parse model output as JSON, salvaging as much as possible
+
+    Handles code fences, text around the JSON value, trailing commas and
+    output that was cut off (e.g. by max_tokens): the text is scanned once,
+    cut back to the last complete value (an open string value is closed
+    instead) and the open objects/arrays are closed.
+
+    Raises:
+        JSONRepairError: If no JSON object or array can be recovered
+    """
+    text = CODE_FENCE_RE.sub('', text.strip())
+    try:
+        return RepairResult(json.loads(text), valid=True)
+    except ValueError:
+        pass
+
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    if start < 0:
+        raise JSONRepairError("No JSON object found in model output")
+    repaired, complete, truncated = _close_truncated(text[start:])
+    try:
+        data = json.loads(repaired)
+    except ValueError as e:
+        raise JSONRepairError(f"Model output could not be repaired: {str(e)}")
+    return RepairResult(data, valid=False, complete=complete, truncated_keys=truncated)
+
+
+def _without(text: str, end: int, positions: List[int]) -> str:
+    """text[:end] without the characters at the given (ascending) positions"""
+    pieces, start = [], 0
+    for position in positions:
+        if position >= end:
+            break
+        pieces.append(text[start:position])
+        start = position + 1
+    pieces.append(text[start:end])
+    return ''.join(pieces)
+
+
+def _close_truncated(text: str):
+    """Cut text back to the last complete value, drop trailing commas and close open containers
+
+    Trailing commas are only recognized outside strings, string values are kept as written.
+
+    Returns:
+        Tuple of (repaired text, complete flag, truncated top-level keys)
+    """
+    stack: List[str] = []          # open containers: '{' or '['
+    expect_key: List[bool] = []    # per container: next string in an object is a key
+    in_string = escape = False
+    string_is_key = False
+    top_key: Optional[str] = None  # key currently being written at depth 1
+    key_start = 0
+    unicode_start = -1             # position of the last \u escape
+    trailing_commas: List[int] = []
+    # Last position after which the text is a valid prefix, with the open containers at that point
+    safe_end, safe_stack, safe_key = 0, [], None
+    index = 0
+
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+                if char == 'u':
+                    unicode_start = index - 1
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+                if string_is_key:
+                    if len(stack) == 1:
+                        top_key = text[key_start + 1:index]
+                else:
+                    safe_end, safe_stack, safe_key = index + 1, list(stack), top_key
+            index += 1
+            continue
+
+        if char == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == '{' and expect_key[-1]
+            key_start = index
+        elif char in '{[':
+            stack.append(char)
+            expect_key.append(char == '{')
+            # Closing it right away gives a valid (empty) value
+            safe_end, safe_stack, safe_key = index + 1, list(stack), top_key
+        elif char in '}]':
+            if not stack:
+                # Text after the JSON value, stop here
+                break
+            stack.pop()
+            expect_key.pop()
+            if not stack:
+                return _without(text, index + 1, trailing_commas), True, []
+            safe_end, safe_stack, safe_key = index + 1, list(stack), top_key
+        elif char == ':':
+            if expect_key:
+                expect_key[-1] = False
+        elif char == ',':
+            if stack and stack[-1] == '{':
+                expect_key[-1] = True
+            following = index + 1
+            while following < len(text) and text[following] in ' \n\r\t':
+                following += 1
+            if following < len(text) and text[following] in '}]':
+                trailing_commas.append(index)
+        elif char in LITERAL_CHARS:
+            end = index
+            while end < len(text) and text[end] in LITERAL_CHARS:
+                end += 1
+            # Only a literal followed by a delimiter is known to be complete
+            if end < len(text) and text[end] in ',}] \n\r\t':
+                safe_end, safe_stack, safe_key = end, list(stack), top_key
+            index = end
+            continue
+        index += 1
+
+    if in_string and not string_is_key:
+        # Keep the partial string value (e.g. a description cut mid-sentence)
+        # Drop an escape sequence that was cut in half
+        if escape:
+            body = text[:index - 1]
+        elif unicode_start >= 0 and index - unicode_start < 6:
+            body = text[:unicode_start]
+        else:
+            body = text[:index]
+        repaired, open_stack, cut_key = _without(body, len(body), trailing_commas) + '"', stack, top_key
+        value_cut = True
+    else:
+        repaired, open_stack, cut_key = _without(text, safe_end, trailing_commas), safe_stack, safe_key
+        value_cut = len(open_stack) > 1
+
+    closing = ''.join('}' if container == '{' else ']' for container in reversed(open_stack))
+    truncated = [cut_key] if cut_key and value_cut else []
+    return repaired.rstrip().rstrip(',') + closing, False, truncated
@@ -0,0 +1,415 @@
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limited, overloaded or transient server errors
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# ~4 characters per token, good enough for rate limiting
+CHARS_PER_TOKEN = 4
+
+
+class LLMError(Exception):
+    """Raised when an LLM request fails after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Wait until `amount` tokens are available and take them
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        # The lock keeps waiters in FIFO order so large requests are not starved
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+    """Estimate prompt plus completion tokens of a chat request"""
+    prompt = sum(len(message.get('content') or '') for message in messages) // CHARS_PER_TOKEN
+    return prompt + (max_tokens or 0) + 1
+
+
+def message_content(response: Dict[str, Any]) -> str:
+    """Text of the first choice of a chat completion response"""
+    try:
+        return response['choices'][0]['message']['content'] or ""
+    except (KeyError, IndexError, TypeError):
+        raise LLMError("Unexpected response format from LLM API")
+
+
+class LLMGateway:
+    """Shared client for OpenAI-compatible chat completion APIs
+
+    Requests run on a private asyncio event loop in a background thread, so the
+    synchronous Flask code can use `chat()`/`chat_many()` while requests from
+    all callers share:
+
+    - bounded concurrency (LLM_MAX_CONCURRENCY)
+    - token bucket rate limits for requests and tokens per minute
+    - exponential backoff with jitter on 429/5xx and transport errors,
+      honoring Retry-After
+    - a timeout per attempt (LLM_TIMEOUT)
+    - coalescing of identical in-flight requests into one API call
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None, timeout: Optional[float] = None):
+        self.api_key = api_key if api_key is not None else os.getenv('OPENAI_API_KEY', '')
+        self.base_url = (base_url or os.getenv('LLM_BASE_URL', 'https://api.openai.com/v1')).rstrip('/')
+        self.model = model or os.getenv('LLM_MODEL', 'gpt-4')
+        self.max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        self.requests_per_minute = requests_per_minute if requests_per_minute is not None else float(os.getenv('LLM_REQUESTS_PER_MINUTE', '60'))
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else float(os.getenv('LLM_TOKENS_PER_MINUTE', '0'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '4'))
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', '60'))
+        self.backoff_base = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+        self.backoff_max = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'api_calls': 0, 'retries': 0, 'coalesced': 0, 'errors': 0,
+                       'timeouts': 0, 'rate_limit_wait_seconds': 0.0, 'streams': 0,
+                       'ttft_samples': 0, 'ttft_seconds_total': 0.0, 'ttft_seconds_max': 0.0}
+
+    # Event loop handling
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name='llm-gateway', daemon=True)
+                self._thread.start()
+                # asyncio primitives have to be created on the loop that uses them
+                asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _setup(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = TokenBucket(self.requests_per_minute / 60, max(1.0, self.requests_per_minute / 60 * 5)) \
+            if self.requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(self.tokens_per_minute / 60, self.tokens_per_minute) \
+            if self.tokens_per_minute > 0 else None
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the gateway loop and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout)
+
+    def close(self):
+        """Close the HTTP client and stop the event loop"""
+        if self._loop is None:
+            return
+        self.run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    # Public API
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Blocking chat completion, see `achat` for the arguments"""
+        return self.run(self.achat(messages, **kwargs))
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Blocking chat completion returning only the message text"""
+        return message_content(self.chat(messages, **kwargs))
+
+    def chat_many(self, requests: List[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """Run several chat requests concurrently (within the gateway limits)
+
+        Args:
+            requests: List of keyword argument dicts for `achat` (each with 'messages')
+            return_exceptions: Return exceptions in the result list instead of raising
+        """
+        async def gather():
+            return await asyncio.gather(*(self.achat(**request) for request in requests),
+                                        return_exceptions=return_exceptions)
+        return self.run(gather())
+
+    def stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Blocking iterator over the content deltas of a streamed chat completion
+
+        Closing the iterator early (e.g. client disconnect) cancels the upstream request.
+        """
+        pieces: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for piece in self.astream(messages, **kwargs):
+                    pieces.put(piece)
+            except Exception as e:
+                pieces.put(e)
+            finally:
+                pieces.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                item = pieces.get(timeout=kwargs.get('timeout') or self.timeout)
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except queue.Empty:
+            raise LLMError("LLM stream stalled")
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def achat(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                    temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                    timeout: Optional[float] = None, coalesce: bool = True, **extra) -> Dict[str, Any]:
+        """Chat completion on the gateway loop
+
+        Args:
+            messages: Chat messages
+            model: Model name (default LLM_MODEL)
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            timeout: Timeout per attempt in seconds (default LLM_TIMEOUT)
+            coalesce: Share the result with identical requests already in flight
+            **extra: Further request fields (e.g. response_format)
+
+        Returns:
+            Parsed chat completion response
+        """
+        payload = {'model': model or self.model, 'messages': messages, **extra}
+        if temperature is not None:
+            payload['temperature'] = temperature
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+        self._count('requests')
+
+        if not coalesce:
+            return await self._request(payload, timeout)
+
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count('coalesced')
+        else:
+            task = asyncio.ensure_future(self._request(payload, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def astream(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                      temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                      timeout: Optional[float] = None, **extra) -> AsyncIterator[str]:
+        """Streamed chat completion on the gateway loop, yields content deltas
+
+        Shares concurrency and rate limits with `achat`. Failures are retried
+        only until the first token arrived; streams are never coalesced.
+        """
+        payload = {'model': model or self.model, 'messages': messages, 'stream': True, **extra}
+        if temperature is not None:
+            payload['temperature'] = temperature
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+        timeout = timeout or self.timeout
+        self._count('requests')
+        self._count('streams')
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            await self._acquire_rate_limits(payload)
+
+            retry_after = None
+            started = time.monotonic()
+            first_token = False
+            async with self._semaphore:
+                self._count('api_calls')
+                try:
+                    # The read timeout of the client applies per chunk
+                    async with self._client.stream('POST', '/chat/completions', json=payload,
+                                                   timeout=httpx.Timeout(timeout, connect=10.0)) as response:
+                        if response.status_code != 200:
+                            body = (await response.aread()).decode('utf-8', 'replace')
+                            last_error = LLMError(f"LLM API error {response.status_code}: {body[:300]}",
+                                                  status_code=response.status_code)
+                            retry_after = response.headers.get('Retry-After')
+                        else:
+                            async for piece in self._iter_stream_content(response):
+                                if not first_token:
+                                    first_token = True
+                                    self._record_ttft(time.monotonic() - started)
+                                yield piece
+                            return
+                except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                    self._count('timeouts')
+                    last_error = LLMError(f"LLM stream timed out after {timeout}s: {str(e) or type(e).__name__}")
+                except httpx.TransportError as e:
+                    last_error = LLMError(f"LLM transport error: {str(e)}")
+
+            # Once tokens went out to the caller a retry would duplicate them
+            if first_token or (last_error.status_code and last_error.status_code not in RETRY_STATUS_CODES):
+                break
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"LLM stream failed ({last_error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        self._count('errors')
+        raise last_error
+
+    @staticmethod
+    async def _iter_stream_content(response) -> AsyncIterator[str]:
+        """Parse server-sent events of a streamed chat completion"""
+        async for line in response.aiter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[5:].strip()
+            if data == '[DONE]':
+                return
+            try:
+                chunk = json.loads(data)
+                piece = chunk['choices'][0].get('delta', {}).get('content')
+            except (ValueError, KeyError, IndexError):
+                logger.warning(f"Skipping malformed stream chunk: {data[:100]}")
+                continue
+            if piece:
+                yield piece
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['in_flight'] = len(self._inflight)
+        samples = stats['ttft_samples']
+        stats['ttft_avg_ms'] = round(stats['ttft_seconds_total'] / samples * 1000, 1) if samples else 0.0
+        return stats
+
+    # Internals
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _record_ttft(self, seconds: float):
+        with self._stats_lock:
+            self._stats['ttft_samples'] += 1
+            self._stats['ttft_seconds_total'] += seconds
+            self._stats['ttft_seconds_max'] = max(self._stats['ttft_seconds_max'], seconds)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter spreads retries of concurrent callers
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _acquire_rate_limits(self, payload: Dict[str, Any]):
+        waited = 0.0
+        if self._request_bucket:
+            waited += await self._request_bucket.acquire(1)
+        if self._token_bucket:
+            waited += await self._token_bucket.acquire(estimate_tokens(payload['messages'], payload.get('max_tokens')))
+        if waited:
+            self._count('rate_limit_wait_seconds', waited)
+
+    async def _request(self, payload: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        timeout = timeout or self.timeout
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            await self._acquire_rate_limits(payload)
+
+            retry_after = None
+            async with self._semaphore:
+                self._count('api_calls')
+                try:
+                    response = await asyncio.wait_for(self._client.post('/chat/completions', json=payload), timeout)
+                except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                    self._count('timeouts')
+                    last_error = LLMError(f"LLM request timed out after {timeout}s: {str(e) or type(e).__name__}")
+                except httpx.TransportError as e:
+                    last_error = LLMError(f"LLM transport error: {str(e)}")
+                else:
+                    if response.status_code == 200:
+                        return response.json()
+                    last_error = LLMError(f"LLM API error {response.status_code}: {response.text[:300]}",
+                                          status_code=response.status_code)
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        break
+                    retry_after = response.headers.get('Retry-After')
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"LLM request failed ({last_error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        self._count('errors')
+        raise last_error
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway shared by the extractors and the chat endpoint"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
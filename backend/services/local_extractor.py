@@ -0,0 +1,562 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Section headings (German and English) mapped to the schema section they open
+SECTION_HEADINGS = {
+    'summary': [
+        'Profil', 'Kurzprofil', 'Zusammenfassung', 'Über mich', 'Summary', 'Profile', 'About me',
+        'Professional Summary',
+    ],
+    'personal_data': [
+        'Persönliche Daten', 'Persönliche Angaben', 'Kontakt', 'Kontaktdaten', 'Personal Information',
+        'Personal Details', 'Contact', 'Contact Information',
+    ],
+    'experience': [
+        'Berufserfahrung', 'Beruflicher Werdegang', 'Berufspraxis', 'Praxiserfahrung', 'Werdegang',
+        'Work Experience', 'Professional Experience', 'Employment History', 'Experience',
+    ],
+    'education': [
+        'Ausbildung', 'Bildungsweg', 'Schulbildung', 'Studium', 'Akademischer Werdegang', 'Education',
+        'Academic Background',
+    ],
+    'skills': [
+        'Kenntnisse', 'Fähigkeiten', 'Kompetenzen', 'IT-Kenntnisse', 'Fachkenntnisse', 'Skills',
+        'Technical Skills', 'Core Competencies',
+    ],
+    'languages': ['Sprachkenntnisse', 'Sprachen', 'Languages', 'Language Skills'],
+    'certifications': ['Zertifikate', 'Zertifizierungen', 'Weiterbildungen', 'Certifications', 'Certificates'],
+    'projects': ['Projekte', 'Projekterfahrung', 'Projects'],
+}
+
+# Technical skills: canonical name -> aliases as they appear in CVs (matched case-insensitively)
+TECHNICAL_SKILLS = {
+    'Python': ['python'], 'Java': ['java'], 'JavaScript': ['javascript', 'js', 'ecmascript'],
+    'TypeScript': ['typescript'], 'C': ['c'], 'C++': ['c++', 'cpp'], 'C#': ['c#', 'csharp'],
+    'Go': ['go', 'golang'], 'Rust': ['rust'], 'Kotlin': ['kotlin'], 'Swift': ['swift'], 'PHP': ['php'],
+    'Ruby': ['ruby'], 'Scala': ['scala'], 'R': ['r'], 'MATLAB': ['matlab'], 'Bash': ['bash', 'shell scripting'],
+    'SQL': ['sql'], 'PostgreSQL': ['postgresql', 'postgres'], 'MySQL': ['mysql'], 'MongoDB': ['mongodb'],
+    'Redis': ['redis'], 'Oracle': ['oracle'], 'Elasticsearch': ['elasticsearch'],
+    'HTML': ['html', 'html5'], 'CSS': ['css', 'css3'], 'React': ['react', 'react.js', 'reactjs'],
+    'Angular': ['angular'], 'Vue.js': ['vue', 'vue.js', 'vuejs'], 'Node.js': ['node.js', 'nodejs', 'node'],
+    'Django': ['django'], 'Flask': ['flask'], 'FastAPI': ['fastapi'], 'Spring': ['spring', 'spring boot'],
+    '.NET': ['.net', 'dotnet', 'asp.net'], 'Docker': ['docker'], 'Kubernetes': ['kubernetes', 'k8s'],
+    'Terraform': ['terraform'], 'Ansible': ['ansible'], 'Jenkins': ['jenkins'], 'Git': ['git'],
+    'GitLab CI': ['gitlab ci', 'gitlab-ci'], 'GitHub Actions': ['github actions'], 'CI/CD': ['ci/cd'],
+    'Linux': ['linux'], 'AWS': ['aws', 'amazon web services'], 'Azure': ['azure', 'microsoft azure'],
+    'GCP': ['gcp', 'google cloud'], 'Machine Learning': ['machine learning', 'maschinelles lernen'],
+    'Deep Learning': ['deep learning'], 'TensorFlow': ['tensorflow'], 'PyTorch': ['pytorch'],
+    'scikit-learn': ['scikit-learn', 'sklearn'], 'Pandas': ['pandas'], 'NumPy': ['numpy'],
+    'Spark': ['spark', 'apache spark'], 'Kafka': ['kafka', 'apache kafka'], 'REST': ['rest', 'restful'],
+    'GraphQL': ['graphql'], 'Microservices': ['microservices', 'microservice'], 'SAP': ['sap'],
+    'Excel': ['excel', 'ms excel'], 'Power BI': ['power bi', 'powerbi'], 'Tableau': ['tableau'],
+    'Jira': ['jira'], 'Scrum': ['scrum'], 'Kanban': ['kanban'], 'Agile': ['agile', 'agil'],
+    'Figma': ['figma'], 'Photoshop': ['photoshop'], 'AutoCAD': ['autocad'], 'SolidWorks': ['solidworks'],
+}
+
+# Names that are also common words or letters only count inside the skills section
+AMBIGUOUS_SKILLS = {'C', 'R', 'Go', 'Rust', 'Swift', 'Node.js', 'Spring', 'Oracle', 'REST', 'Agile'}
+
+SOFT_SKILLS = {
+    'Teamwork': ['teamfähigkeit', 'teamfähig', 'teamwork', 'team player'],
+    'Communication': ['kommunikationsfähigkeit', 'kommunikationsstärke', 'communication skills', 'communication'],
+    'Leadership': ['führungskompetenz', 'führungserfahrung', 'leadership', 'team leadership'],
+    'Problem Solving': ['problemlösungskompetenz', 'problemlösung', 'problem solving', 'problem-solving'],
+    'Project Management': ['projektmanagement', 'projektleitung', 'project management'],
+    'Analytical Thinking': ['analytisches denken', 'analytical thinking', 'analytical skills'],
+    'Self-Organization': ['selbstorganisation', 'selbstständigkeit', 'self-organization', 'self-motivated'],
+    'Adaptability': ['flexibilität', 'anpassungsfähigkeit', 'adaptability', 'flexibility'],
+    'Customer Orientation': ['kundenorientierung', 'customer orientation', 'customer focus'],
+    'Presentation Skills': ['präsentationsfähigkeit', 'präsentation', 'presentation skills'],
+}
+
+# Language names (German and English) -> English name as used by the other extractors
+LANGUAGES = {
+    'German': ['deutsch', 'german'], 'English': ['englisch', 'english'], 'French': ['französisch', 'french'],
+    'Spanish': ['spanisch', 'spanish'], 'Italian': ['italienisch', 'italian'],
+    'Portuguese': ['portugiesisch', 'portuguese'], 'Dutch': ['niederländisch', 'dutch'],
+    'Polish': ['polnisch', 'polish'], 'Russian': ['russisch', 'russian'], 'Turkish': ['türkisch', 'turkish'],
+    'Arabic': ['arabisch', 'arabic'], 'Chinese': ['chinesisch', 'chinese', 'mandarin'],
+    'Japanese': ['japanisch', 'japanese'], 'Swedish': ['schwedisch', 'swedish'],
+    'Czech': ['tschechisch', 'czech'], 'Greek': ['griechisch', 'greek'], 'Croatian': ['kroatisch', 'croatian'],
+    'Ukrainian': ['ukrainisch', 'ukrainian'], 'Hindi': ['hindi'], 'Korean': ['koreanisch', 'korean'],
+}
+
+# Descriptive proficiency wording -> CEFR level
+LANGUAGE_LEVELS = [
+    ('Native', ['muttersprache', 'muttersprachlich', 'native speaker', 'native', 'mother tongue']),
+    ('C2', ['verhandlungssicher', 'business fluent', 'proficient']),
+    ('C1', ['fließend', 'fliessend', 'sehr gut', 'sehr gute', 'fluent', 'advanced']),
+    ('B2', ['gute kenntnisse', 'gut', 'gute', 'good', 'upper intermediate']),
+    ('B1', ['mittel', 'intermediate', 'konversationssicher']),
+    ('A2', ['grundkenntnisse', 'basiskenntnisse', 'basic', 'elementary']),
+    ('A1', ['anfänger', 'beginner']),
+]
+
+DEGREE_PATTERNS = [
+    ('PhD', r'ph\.?\s?d\.?|promotion|doktor(?:at)?|dr\.\s?rer\.\s?\w+\.?'),
+    ('Master of Business Administration', r'mba'),
+    ('Master of Science', r'master of science|m\.\s?sc\.?|msc'),
+    ('Master of Arts', r'master of arts|m\.\s?a\.'),
+    ('Master of Engineering', r'master of engineering|m\.\s?eng\.?'),
+    ('Master', r'master'),
+    ('Bachelor of Science', r'bachelor of science|b\.\s?sc\.?|bsc'),
+    ('Bachelor of Arts', r'bachelor of arts|b\.\s?a\.'),
+    ('Bachelor of Engineering', r'bachelor of engineering|b\.\s?eng\.?'),
+    ('Bachelor', r'bachelor'),
+    ('Diplom', r'dipl(?:om)?\.?(?:-\s?\w+\.?)?|diplom'),
+    ('Staatsexamen', r'staatsexamen'),
+    ('Apprenticeship', r'ausbildung zum|ausbildung zur|berufsausbildung|apprenticeship'),
+    ('Abitur', r'abitur|allgemeine hochschulreife|fachhochschulreife'),
+]
+
+INSTITUTION_RE = re.compile(
+    r"[^,;|\n]*(?:Universität|Universitaet|University|Hochschule|Fachhochschule|\bTU\b|\bFH\b|College|"
+    r"Akademie|Academy|Institut|Institute|Schule|School|Gymnasium|Berufskolleg|IHK)[^,;|\n]*"
+)
+
+CITIES = [
+    'Berlin', 'Hamburg', 'München', 'Munich', 'Köln', 'Cologne', 'Frankfurt', 'Stuttgart', 'Düsseldorf',
+    'Leipzig', 'Dortmund', 'Essen', 'Bremen', 'Dresden', 'Hannover', 'Nürnberg', 'Duisburg', 'Bochum',
+    'Wuppertal', 'Bielefeld', 'Bonn', 'Münster', 'Karlsruhe', 'Mannheim', 'Augsburg', 'Wiesbaden',
+    'Aachen', 'Kiel', 'Freiburg', 'Mainz', 'Heidelberg', 'Regensburg', 'Darmstadt', 'Potsdam', 'Wien',
+    'Vienna', 'Graz', 'Linz', 'Salzburg', 'Zürich', 'Zurich', 'Basel', 'Bern', 'Genf', 'Geneva',
+    'London', 'Paris', 'Amsterdam',
+]
+
+COUNTRIES = {
+    'Germany': ['deutschland', 'germany'], 'Austria': ['österreich', 'austria'],
+    'Switzerland': ['schweiz', 'switzerland'], 'Netherlands': ['niederlande', 'netherlands'],
+    'United Kingdom': ['vereinigtes königreich', 'united kingdom', 'uk'], 'France': ['frankreich', 'france'],
+}
+
+# City -> country for CVs that only name the city
+CITY_COUNTRIES = {
+    'Wien': 'Austria', 'Vienna': 'Austria', 'Graz': 'Austria', 'Linz': 'Austria', 'Salzburg': 'Austria',
+    'Zürich': 'Switzerland', 'Zurich': 'Switzerland', 'Basel': 'Switzerland', 'Bern': 'Switzerland',
+    'Genf': 'Switzerland', 'Geneva': 'Switzerland', 'London': 'United Kingdom', 'Paris': 'France',
+    'Amsterdam': 'Netherlands',
+}
+
+MONTHS = {
+    'jan': 1, 'januar': 1, 'january': 1, 'feb': 2, 'februar': 2, 'february': 2, 'mär': 3, 'mar': 3,
+    'märz': 3, 'march': 3, 'apr': 4, 'april': 4, 'mai': 5, 'may': 5, 'jun': 6, 'juni': 6, 'june': 6,
+    'jul': 7, 'juli': 7, 'july': 7, 'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'okt': 10, 'oct': 10, 'oktober': 10, 'october': 10, 'nov': 11, 'november': 11, 'dez': 12,
+    'dec': 12, 'dezember': 12, 'december': 12,
+}
+
+OPEN_END = r'heute|aktuell|jetzt|laufend|present|current|today|now|dato'
+
+_MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_DATE = rf'(?:(?:0?[1-9]|1[0-2])[./]\s?(?:19|20)\d{{2}}|(?:{_MONTH_NAMES})\.?\s+(?:19|20)\d{{2}}|(?:19|20)\d{{2}})'
+DATE_RANGE_RE = re.compile(
+    rf'(?P<start>{_DATE})\s*(?:-|–|—|bis|to|until)\s*(?P<end>{_DATE}|{OPEN_END})', re.IGNORECASE
+)
+SINGLE_DATE_RE = re.compile(rf'(?:seit|since|ab)?\s*(?P<start>{_DATE})', re.IGNORECASE)
+
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-zA-Z]{2,}')
+PHONE_RE = re.compile(r'(?:(?:\+|00)\d{1,3}[\s/.-]?)?(?:\(0\)\s?)?\(?0?\d{2,5}\)?[\s/.-]?\d{2,}(?:[\s.-]?\d{2,}){0,3}')
+POSTCODE_CITY_RE = re.compile(r'\b(?:[A-Z]{1,2}-)?\d{4,5}\s+(?P<city>[A-ZÄÖÜ][a-zäöüß]+(?:[\s-][A-ZÄÖÜ][a-zäöüß]+)?)')
+NAME_LABEL_RE = re.compile(r'\bName\s*:\s*(?P<name>[A-ZÄÖÜ][\w\'-]+(?:\s+[A-ZÄÖÜ][\w\'-]+){1,3})')
+NAME_TOKEN_RE = re.compile(r"^[A-ZÄÖÜ](?:[a-zäöüßéèáàç'-]+|[A-ZÄÖÜ'-]+)$")
+BULLET_RE = re.compile(r'\s*[•▪●◦■\-*–]\s+')
+GLYPH_BULLET_RE = re.compile(r'\s*[•▪●◦■]\s+')
+
+DOCUMENT_TITLES = {'lebenslauf', 'curriculum', 'vitae', 'cv', 'resume', 'résumé', 'bewerbung'}
+
+ENTRY_SEPARATORS = re.compile(r'\s+(?:bei|at|@)\s+|\s*[|,]\s*|\s+[-–—]\s+')
+
+
+def _alternation(terms) -> str:
+    """Regex alternation, longest terms first so 'spring boot' wins over 'spring'"""
+    return '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+
+
+def _gazetteer(mapping: Dict[str, List[str]]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """Compile a gazetteer into one case-insensitive regex and an alias -> canonical lookup"""
+    lookup = {alias: canonical for canonical, aliases in mapping.items() for alias in aliases}
+    pattern = re.compile(rf'(?<![\w+#.])(?:{_alternation(lookup)})(?![\w+#]|\.\w)', re.IGNORECASE)
+    return pattern, lookup
+
+
+class LocalExtractor:
+    """Rule-based CV extractor that runs offline
+
+    Implements the same `extract_cv_data` contract as OpenAIExtractor using
+    section segmentation, regular expressions and gazetteers. spaCy is used as
+    an optional fallback for the candidate name and location when a model is
+    installed (SPACY_MODEL, default de_core_news_sm).
+    """
+
+    def __init__(self, use_spacy: Optional[bool] = None):
+        """Initialize the local extractor
+
+        Args:
+            use_spacy: Load a spaCy model for the name/location fallback
+                (defaults to the LOCAL_EXTRACTOR_SPACY env variable)
+        """
+        if use_spacy is None:
+            use_spacy = os.getenv('LOCAL_EXTRACTOR_SPACY', 'true').lower() == 'true'
+        self._use_spacy = use_spacy
+        self._nlp = None
+
+        headings = [(section, heading) for section, items in SECTION_HEADINGS.items() for heading in items]
+        self._heading_lookup = {heading.lower(): section for section, heading in headings}
+        alternation = _alternation(heading for _, heading in headings)
+        # Headings on their own line (layout preserved) ...
+        self._line_heading_re = re.compile(rf'^[ \t]*({alternation})[ \t]*:?[ \t]*$', re.IGNORECASE | re.MULTILINE)
+        # ... or inline in whitespace-normalized text, where only the capitalized
+        # or upper case spelling followed by a colon/capitalized word counts
+        inline = '|'.join(
+            re.escape(variant)
+            for heading in sorted((h for _, h in headings), key=len, reverse=True)
+            for variant in (heading, heading.upper())
+        )
+        self._inline_heading_re = re.compile(rf'(?<![\w-])({inline})(?:\s*:|(?=\s+[A-ZÄÖÜ0-9•▪●\-]))')
+
+        self._skill_re, self._skill_lookup = _gazetteer(TECHNICAL_SKILLS)
+        self._soft_skill_re, self._soft_skill_lookup = _gazetteer(SOFT_SKILLS)
+        self._language_re, self._language_lookup = _gazetteer(LANGUAGES)
+        self._country_re, self._country_lookup = _gazetteer(COUNTRIES)
+        self._city_re = re.compile(rf'(?<!\w)(?:{_alternation(CITIES)})(?!\w)')
+        self._level_patterns = [
+            (level, re.compile(rf'(?<!\w)(?:{_alternation(words)})(?!\w)', re.IGNORECASE))
+            for level, words in LANGUAGE_LEVELS
+        ]
+        self._cefr_re = re.compile(r'\b([ABC][12])\b')
+        self._degree_patterns = [
+            (degree, re.compile(rf'(?<!\w)(?:{pattern})(?!\w)', re.IGNORECASE)) for degree, pattern in DEGREE_PATTERNS
+        ]
+        logger.info("Local extractor initialized")
+
+    def test_connection(self) -> bool:
+        """The local extractor has no remote dependency"""
+        return True
+
+    def extract_cv_data(self, text: str) -> Dict[str, Any]:
+        """Extract structured data from CV text
+
+        Args:
+            text: The CV text to analyze
+
+        Returns:
+            Dict with extracted data in standardized format
+        """
+        sections = self.segment_sections(text)
+        return self.extract_sections(text, sections)
+
+    def extract_from_text(self, text: str) -> Dict[str, Any]:
+        """Wrapper method for text extraction"""
+        return self.extract_cv_data(text)
+
+    def extract_sections(self, text: str, sections: Dict[str, str]) -> Dict[str, Any]:
+        """Extract the schema from already segmented text"""
+        skills_text = sections.get('skills', '')
+        return {
+            'personal_data': self.extract_personal_data(sections.get('header', '') or text[:500], text),
+            'education': self.extract_education(sections.get('education', '')),
+            'experience': self.extract_experience(sections.get('experience', '')),
+            'skills': {
+                'technical': self.extract_technical_skills(text, skills_text),
+                'soft': self.extract_soft_skills(text),
+                'languages': self.extract_languages(sections.get('languages', ''), text),
+            },
+        }
+
+    def segment_sections(self, text: str) -> Dict[str, str]:
+        """Split CV text into sections by known headings
+
+        Text before the first heading is returned as 'header'. Works on
+        layout-preserving text (headings on their own line) and on the
+        whitespace-normalized output of PDFExtractor.
+
+        Returns:
+            Dict mapping section name to its text
+        """
+        matches = list(self._line_heading_re.finditer(text))
+        if len(matches) < 2:
+            matches = list(self._inline_heading_re.finditer(text))
+
+        sections = {'header': text[:matches[0].start()].strip() if matches else text.strip()}
+        for index, match in enumerate(matches):
+            section = self._heading_lookup[match.group(1).lower()]
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+            body = text[match.end():end].strip(' \t\n:')
+            # A heading word repeated later (e.g. a second "Projekte" block) extends its section
+            sections[section] = f"{sections[section]}\n{body}" if section in sections else body
+        return sections
+
+    # Personal data
+
+    def extract_personal_data(self, header: str, text: str) -> Dict[str, Any]:
+        """Extract name, contact data and location"""
+        email = EMAIL_RE.search(text)
+        first_name, last_name = self._extract_name(header)
+        city, country = self._extract_location(header or text)
+
+        if (not first_name or not city) and self._use_spacy:
+            spacy_name, spacy_city = self._spacy_entities(header or text[:1000])
+            if not first_name and spacy_name:
+                first_name, last_name = spacy_name
+            if not city and spacy_city:
+                city = spacy_city
+
+        return {
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': email.group(0) if email else "",
+            'phone': self._extract_phone(text),
+            'location': {
+                'city': city,
+                'country': country or CITY_COUNTRIES.get(city, 'Germany' if city else ""),
+            },
+        }
+
+    def _extract_name(self, header: str) -> Tuple[str, str]:
+        label = NAME_LABEL_RE.search(header)
+        if label:
+            return self._split_name(label.group('name').split())
+
+        layout = '\n' in header
+        for line in (header.splitlines() if layout else [header])[:5]:
+            words = line.split()
+            tokens = []
+            # Leading run of capitalized words, stopping at contact data or a heading
+            for token in words[:5]:
+                token = token.rstrip(',;')
+                if token.lower() in DOCUMENT_TITLES and not tokens:
+                    continue
+                if not NAME_TOKEN_RE.match(token) or token.lower() in self._heading_lookup or len(tokens) == 4:
+                    break
+                tokens.append(token)
+            if len(tokens) >= 2:
+                # Middle names are only trusted when the name has a line of its own,
+                # otherwise a job title may follow directly ("Max Mustermann Senior Developer")
+                if not layout or len(tokens) < len(words):
+                    tokens = tokens[:2]
+                return self._split_name([token if not token.isupper() else token.title() for token in tokens])
+        return "", ""
+
+    @staticmethod
+    def _split_name(tokens: List[str]) -> Tuple[str, str]:
+        if len(tokens) < 2:
+            return (tokens[0] if tokens else ""), ""
+        return " ".join(tokens[:-1]), tokens[-1]
+
+    @staticmethod
+    def _extract_phone(text: str) -> str:
+        for match in PHONE_RE.finditer(text):
+            candidate = match.group(0).strip()
+            if DATE_RANGE_RE.search(candidate):
+                continue
+            digits = re.sub(r'\D', '', candidate)
+            international = candidate.startswith(('+', '00'))
+            if 7 <= len(digits) <= 15 and (international or digits.startswith('0')):
+                return candidate
+        return ""
+
+    def _extract_location(self, text: str) -> Tuple[str, str]:
+        country_match = self._country_re.search(text)
+        country = self._country_lookup[country_match.group(0).lower()] if country_match else ""
+
+        postcode = POSTCODE_CITY_RE.search(text)
+        if postcode:
+            return postcode.group('city'), country
+        city = self._city_re.search(text)
+        return (city.group(0) if city else ""), country
+
+    def _spacy_entities(self, text: str) -> Tuple[Optional[Tuple[str, str]], str]:
+        nlp = self._load_spacy()
+        if nlp is None:
+            return None, ""
+        doc = nlp(text)
+        name = next((ent.text.split() for ent in doc.ents if ent.label_ in ('PER', 'PERSON') and len(ent.text.split()) >= 2), None)
+        city = next((ent.text for ent in doc.ents if ent.label_ in ('LOC', 'GPE')), "")
+        return (self._split_name(name) if name else None), city
+
+    def _load_spacy(self):
+        if self._nlp is None and self._use_spacy:
+            try:
+                import spacy
+                self._nlp = spacy.load(os.getenv('SPACY_MODEL', 'de_core_news_sm'), disable=['parser', 'lemmatizer'])
+            except Exception as e:
+                logger.warning(f"spaCy model not available, name/location fallback disabled: {str(e)}")
+                self._use_spacy = False
+        return self._nlp
+
+    # Dated entries
+
+    @staticmethod
+    def _normalize_date(value: str) -> str:
+        """Normalize '03/2020', 'März 2020', '2020' or 'heute' to YYYY-MM / 'present'"""
+        value = value.strip().rstrip('.')
+        if re.fullmatch(OPEN_END, value, re.IGNORECASE):
+            return "present"
+        year = re.search(r'(?:19|20)\d{2}', value)
+        if not year:
+            return ""
+        numeric = re.match(r'(\d{1,2})[./]', value)
+        if numeric:
+            return f"{year.group(0)}-{int(numeric.group(1)):02d}"
+        month = MONTHS.get(re.match(r'[^\W\d]*', value).group(0).lower().rstrip('.'))
+        return f"{year.group(0)}-{month:02d}" if month else year.group(0)
+
+    def _split_entries(self, section: str) -> List[Dict[str, Any]]:
+        """Split a section into entries, each starting at a date range
+
+        Returns:
+            List of dicts with start_date, end_date, heading and lines
+        """
+        if not section:
+            return []
+        if '\n' not in section:
+            # Normalized text: break before each bullet glyph and date range
+            # (dashes are left alone, they also separate dates and titles)
+            section = GLYPH_BULLET_RE.sub("\n• ", section)
+            section = DATE_RANGE_RE.sub(lambda m: f"\n{m.group(0)}\n", section)
+
+        entries, current, preamble = [], None, []
+        for raw_line in section.splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            match = DATE_RANGE_RE.search(line) or (None if current else SINGLE_DATE_RE.search(line))
+            if match:
+                if 'end' in match.groupdict():
+                    end_date = self._normalize_date(match.group('end'))
+                else:
+                    # "seit 2021" is an ongoing entry, a lone year has no end
+                    end_date = "present" if re.match(r'\s*(?:seit|since|ab)\b', match.group(0), re.IGNORECASE) else ""
+                current = {
+                    'start_date': self._normalize_date(match.group('start')),
+                    'end_date': end_date,
+                    'heading': (line[:match.start()] + line[match.end():]).strip(' ,|:-–'),
+                    'lines': [],
+                }
+                if not current['heading'] and not entries and preamble:
+                    # Title written before the first date ("M.Sc. Informatik, TU Berlin 2014 - 2016")
+                    current['heading'] = " ".join(preamble)
+                entries.append(current)
+            elif current is None:
+                preamble.append(line)
+            else:
+                if not current['heading'] and not BULLET_RE.match(raw_line):
+                    current['heading'] = line
+                else:
+                    current['lines'].append(line)
+        return entries
+
+    def extract_experience(self, section: str) -> List[Dict[str, Any]]:
+        """Extract work experience entries"""
+        experience = []
+        for entry in self._split_entries(section):
+            parts = [part.strip() for part in ENTRY_SEPARATORS.split(entry['heading'], maxsplit=2) if part and part.strip()]
+            title = parts[0] if parts else ""
+            company = parts[1] if len(parts) > 1 else ""
+            location = parts[2] if len(parts) > 2 else ""
+            city = self._city_re.search(entry['heading'])
+            if city and not location:
+                location = city.group(0)
+
+            achievements, description = [], []
+            for line in entry['lines']:
+                if BULLET_RE.match(line):
+                    achievements.append(BULLET_RE.sub('', line, count=1).strip())
+                else:
+                    description.append(line)
+
+            experience.append({
+                'title': title,
+                'company': company,
+                'location': location,
+                'start_date': entry['start_date'],
+                'end_date': entry['end_date'],
+                'description': " ".join(description),
+                'achievements': achievements,
+            })
+        return experience
+
+    def extract_education(self, section: str) -> List[Dict[str, Any]]:
+        """Extract education entries"""
+        education = []
+        for entry in self._split_entries(section):
+            block = " ".join([entry['heading']] + entry['lines'])
+            degree, field = "", ""
+            for name, pattern in self._degree_patterns:
+                match = pattern.search(block)
+                if match:
+                    degree = name
+                    # "M.Sc. Informatik" / "Bachelor of Science in Computer Science"
+                    rest = block[match.end():]
+                    field_match = re.match(r'\s*(?:in|im|of)?\s*([A-ZÄÖÜ][\w-]+(?:\s+(?:[A-ZÄÖÜ][\w-]+|und|and|&))*)', rest)
+                    if field_match and not INSTITUTION_RE.fullmatch(field_match.group(1)):
+                        field = field_match.group(1)
+                    break
+
+            institution_match = INSTITUTION_RE.search(block)
+            institution = institution_match.group(0).strip(' -–:') if institution_match else ""
+            if degree and institution.lower().startswith(degree.lower()):
+                institution = institution[len(degree):].strip(' -–:,')
+            city = self._city_re.search(block)
+
+            education.append({
+                'degree': degree,
+                'field': field,
+                'institution': institution,
+                'location': city.group(0) if city else "",
+                'start_date': entry['start_date'],
+                'end_date': entry['end_date'],
+                'description': " ".join(entry['lines']),
+            })
+        return education
+
+    # Skills and languages
+
+    def extract_technical_skills(self, text: str, skills_section: str = "") -> List[str]:
+        """Technical skills from the dictionary, ambiguous names only from the skills section"""
+        found = {}
+        for source, strict in ((skills_section, False), (text, True)):
+            for match in self._skill_re.finditer(source):
+                canonical = self._skill_lookup[match.group(0).lower()]
+                if strict and canonical in AMBIGUOUS_SKILLS:
+                    continue
+                found.setdefault(canonical, None)
+        return list(found)
+
+    def extract_soft_skills(self, text: str) -> List[str]:
+        """Soft skills from the dictionary"""
+        found = {}
+        for match in self._soft_skill_re.finditer(text):
+            found.setdefault(self._soft_skill_lookup[match.group(0).lower()], None)
+        return list(found)
+
+    def extract_languages(self, section: str, text: str) -> List[Dict[str, str]]:
+        """Languages with CEFR level, searched in the languages section first"""
+        source = section or text
+        matches = list(self._language_re.finditer(source))
+        languages = {}
+        for index, match in enumerate(matches):
+            language = self._language_lookup[match.group(0).lower()]
+            if language in languages:
+                continue
+            # The level is the text up to the next language name
+            end = matches[index + 1].start() if index + 1 < len(matches) else min(len(source), match.end() + 60)
+            languages[language] = self._language_level(source[match.end():end])
+        if not section:
+            # Outside a languages section only keep mentions that carry a level
+            languages = {language: level for language, level in languages.items() if level}
+        return [{'language': language, 'level': level} for language, level in languages.items()]
+
+    def _language_level(self, text: str) -> str:
+        cefr = self._cefr_re.search(text)
+        if cefr:
+            return cefr.group(1)
+        for level, pattern in self._level_patterns:
+            if pattern.search(text):
+                return level
+        return ""
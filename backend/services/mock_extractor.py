@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional
 import json
 
 logger = logging.getLogger(__name__)
@@ -16,11 +16,12 @@ class MockExtractor:
         """Mock connection test"""
         return True
         
-    def extract_cv_data(self, text: str) -> Dict[str, Any]:
+    def extract_cv_data(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """Extract mock data from CV text
         
         Args:
             text: The CV text to analyze
+            fields: Top-level schema fields to return (default: all)
             
         Returns:
             Dict with mock data in standardized format
@@ -98,6 +99,9 @@ class MockExtractor:
             }
         }
         
+        if fields is not None:
+            mock_data = {field: mock_data[field] for field in fields}
+            
         logger.info("Mock data created successfully")
         return mock_data
         
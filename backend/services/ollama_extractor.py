@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from services.pdf_extractor import PDFExtractor
+from services.openai_extractor import CV_SCHEMA, SYSTEM_PROMPT, user_prompt
+from services.json_repair import repair_json, JSONRepairError
+from services.prompt_builder import PromptBuilder, compact_pages, compact_text, merge_results
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# A model load shows up as load_duration in the final stream message (nanoseconds)
+COLD_LOAD_NS = 500_000_000
+
+
+class OllamaExtractor:
+    """CV extractor backed by a local model served by Ollama
+
+    One pooled HTTP session is shared by all requests. The model is loaded in
+    the background at startup (warm-up) and every request passes keep_alive,
+    so it stays resident between uploads instead of being reloaded. Replies
+    are streamed and parsed line by line; a semaphore caps the number of
+    generations sent to the server at the same time.
+
+    Any server speaking the Ollama API works, e.g. scripts/llm_stub_server.py
+    for local tests (OLLAMA_BASE_URL=http://localhost:8089).
+    """
+
+    def __init__(self, model: Optional[str] = None, base_url: Optional[str] = None,
+                 warm_up: Optional[bool] = None):
+        self.model = model or os.getenv('OLLAMA_MODEL', 'mistral')
+        self.base_url = (base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')).rstrip('/')
+        self.keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+        self.num_ctx = int(os.getenv('OLLAMA_NUM_CTX', '8192'))
+        self.max_concurrency = int(os.getenv('OLLAMA_MAX_CONCURRENCY', '2'))
+        self.connect_timeout = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '5'))
+        # Applies between two streamed chunks, so long generations are fine as long as tokens arrive
+        self.read_timeout = float(os.getenv('OLLAMA_READ_TIMEOUT', '120'))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency + 1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        self.prompt_builder = PromptBuilder(model=self.model, context_tokens=self.num_ctx)
+        self.pdf_extractor = PDFExtractor()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'cold_loads': 0, 'repaired': 0,
+                       'ttft_total': 0.0, 'eval_tokens': 0, 'eval_seconds': 0.0}
+        self.warm = threading.Event()
+
+        if warm_up is None:
+            warm_up = os.getenv('OLLAMA_WARMUP', 'true').lower() == 'true'
+        if warm_up:
+            threading.Thread(target=self.warm_up, name='ollama-warmup', daemon=True).start()
+        logger.info(f"Ollama Extractor initialized ({self.model} at {self.base_url})")
+
+    def warm_up(self) -> bool:
+        """Load the model into memory so the first CV does not pay for it"""
+        started = time.monotonic()
+        try:
+            # A generate request without prompt only loads the model
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={'model': self.model, 'keep_alive': self.keep_alive},
+                timeout=(self.connect_timeout, self.read_timeout)
+            )
+            response.raise_for_status()
+            self.warm.set()
+            logger.info(f"Ollama model {self.model} loaded in {time.monotonic() - started:.1f}s")
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Ollama warm-up failed: {str(e)}")
+            return False
+
+    def test_connection(self) -> bool:
+        """Check that the server is reachable and the model is installed"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=(self.connect_timeout, 10))
+            response.raise_for_status()
+            names = {model.get('name', '').split(':')[0] for model in response.json().get('models', [])}
+            if self.model.split(':')[0] not in names:
+                logger.error(f"Ollama model {self.model} not installed (scripts/install_model.py {self.model})")
+                return False
+            return True
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Ollama connection test failed: {str(e)}")
+            return False
+
+    def extract_cv_data(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Extract structured data from CV text
+
+        Args:
+            text: The CV text to analyze
+            fields: Top-level schema fields to extract (default: all)
+
+        Returns:
+            Dict with extracted data in standardized format
+        """
+        try:
+            fields = list(CV_SCHEMA) if fields is None else list(fields)
+            text = compact_text(text)
+            overhead = self.prompt_builder.count_tokens(SYSTEM_PROMPT + user_prompt("", fields))
+            # Local models have small context windows, large CVs are split by section
+            chunks = self.prompt_builder.plan(text, fields, overhead)
+
+            results = []
+            for chunk in chunks:
+                content = self.chat([
+                    {'role': 'system', 'content': SYSTEM_PROMPT},
+                    {'role': 'user', 'content': user_prompt(chunk.text, chunk.fields)}
+                ])
+                parsed = repair_json(content)
+                if not parsed.valid:
+                    self._count('repaired')
+                    logger.warning(f"Repaired malformed model output (truncated={parsed.truncated_keys})")
+                results.append(parsed.data if isinstance(parsed.data, dict) else {})
+            return results[0] if len(results) == 1 else merge_results(results)
+
+        except (requests.RequestException, JSONRepairError, ValueError) as e:
+            logger.error(f"Ollama extraction error: {str(e)}")
+            raise ValueError(f"Error during CV extraction: {str(e)}")
+
+    def chat(self, messages, **options) -> str:
+        """Send a chat request and collect the streamed reply
+
+        Raises:
+            requests.RequestException: On connection errors, timeouts or error responses
+            ValueError: If the server reports an error in the stream
+        """
+        payload = {
+            'model': self.model,
+            'messages': messages,
+            'stream': True,
+            'format': 'json',
+            'keep_alive': self.keep_alive,
+            'options': {'temperature': 0.3, 'num_ctx': self.num_ctx,
+                        'num_predict': self.prompt_builder.completion_tokens, **options},
+        }
+        first_token = None
+        parts = []
+        with self._slots:
+            self._count('requests')
+            started = time.monotonic()
+            try:
+                with self.session.post(f"{self.base_url}/api/chat", json=payload, stream=True,
+                                       timeout=(self.connect_timeout, self.read_timeout)) as response:
+                    response.raise_for_status()
+                    # Newline-delimited JSON, one message per chunk and a final one with done=true
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        message = json.loads(line)
+                        if message.get('error'):
+                            raise ValueError(f"Ollama error: {message['error']}")
+                        content = (message.get('message') or {}).get('content')
+                        if content:
+                            if first_token is None:
+                                first_token = time.monotonic() - started
+                            parts.append(content)
+                        if message.get('done'):
+                            self._record(message, first_token)
+                            break
+            except (requests.RequestException, ValueError):
+                self._count('errors')
+                raise
+        self.warm.set()
+        return ''.join(parts)
+
+    def extract_cv(self, text: str) -> Dict[str, Any]:
+        """Extract CV data, returning {'error': ...} instead of raising"""
+        try:
+            return self.extract_cv_data(text)
+        except ValueError as e:
+            return {'error': str(e)}
+
+    def extract_from_file(self, file_path: str) -> Dict[str, Any]:
+        """Extract CV data from a PDF file, returning {'error': ...} on failure"""
+        pages, error = self.pdf_extractor.extract_pages(file_path)
+        if error:
+            return {'error': error}
+        return self.extract_cv(compact_pages(pages))
+
+    def extract_from_text(self, text: str) -> Dict[str, Any]:
+        """Wrapper method for text extraction"""
+        return self.extract_cv_data(text)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, latency and throughput counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        answered = stats['requests'] - stats['errors']
+        stats['ttft_avg_ms'] = round(stats.pop('ttft_total') / answered * 1000) if answered else 0
+        eval_seconds = stats.pop('eval_seconds')
+        stats['tokens_per_second'] = round(stats['eval_tokens'] / eval_seconds, 1) if eval_seconds else 0
+        stats['warm'] = self.warm.is_set()
+        return stats
+
+    def close(self):
+        self.session.close()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _record(self, final: Dict[str, Any], first_token: Optional[float]):
+        """Record timings from the final stream message"""
+        load_ns = final.get('load_duration') or 0
+        with self._stats_lock:
+            self._stats['ttft_total'] += first_token or 0.0
+            self._stats['eval_tokens'] += final.get('eval_count') or 0
+            self._stats['eval_seconds'] += (final.get('eval_duration') or 0) / 1e9
+            if load_ns > COLD_LOAD_NS:
+                self._stats['cold_loads'] += 1
+        if load_ns > COLD_LOAD_NS:
+            logger.warning(f"Ollama reloaded {self.model} ({load_ns / 1e9:.1f}s), consider a longer OLLAMA_KEEP_ALIVE")
@@ -1,9 +1,12 @@
 import os
 import logging
 import json
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterable, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+from services.llm_gateway import get_llm_gateway, message_content, LLMError
+from services.json_repair import repair_json, JSONRepairError
+from services.prompt_builder import PromptBuilder, compact_text, merge_results
 
 # Load environment variables
 load_dotenv()
@@ -12,25 +15,114 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Output schema, also used to build prompts for a subset of the fields
+CV_SCHEMA = {
+    "personal_data": {
+        "first_name": "",
+        "last_name": "",
+        "email": "",
+        "phone": "",
+        "location": {
+            "city": "",
+            "country": ""
+        }
+    },
+    "education": [
+        {
+            "degree": "",
+            "field": "",
+            "institution": "",
+            "location": "",
+            "start_date": "YYYY-MM",
+            "end_date": "YYYY-MM",
+            "description": ""
+        }
+    ],
+    "experience": [
+        {
+            "title": "",
+            "company": "",
+            "location": "",
+            "start_date": "YYYY-MM",
+            "end_date": "YYYY-MM",
+            "description": "",
+            "achievements": []
+        }
+    ],
+    "skills": {
+        "technical": [],
+        "soft": [],
+        "languages": [
+            {
+                "language": "",
+                "level": ""
+            }
+        ]
+    }
+}
+
+# Models that accept response_format={"type": "json_object"}
+JSON_MODE_MODELS = ("gpt-4o", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo")
+
+# System prompt defines the role and task
+SYSTEM_PROMPT = """You are an expert in analyzing resumes.
+Extract precise key information and format it as JSON.
+Pay special attention to completeness and accuracy in:
+- Personal data (name, contact, location)
+- Education (chronological, with exact time periods)
+- Work experience (chronological, with details)
+- Skills (technical, soft skills)
+- Languages (with levels)
+
+Format all dates as 'YYYY-MM'.
+For missing information, leave fields empty ([]/{}/""), but maintain the structure."""
+
+def user_prompt(text: str, fields) -> str:
+    """User prompt with the expected format for the given fields"""
+    schema = {field: CV_SCHEMA[field] for field in fields}
+    # Compact JSON: the indentation of the template alone cost ~150 tokens
+    return f"""Analyze the following resume and extract the data in the specified JSON format:
+
+{json.dumps(schema, separators=(',', ':'))}
+
+Resume:
+{text}"""
+
 class OpenAIExtractor:
     """OpenAI-based CV Extractor"""
     
     def __init__(self):
         """Initialize the OpenAI Extractor"""
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+        # A custom LLM_BASE_URL (local stand-in, proxy) may not need a key
+        if not self.api_key and not os.getenv("LLM_BASE_URL"):
             raise ValueError("OpenAI API Key not found in .env")
             
-        self.client = OpenAI(api_key=self.api_key)
+        # Shared gateway: concurrency limit, rate limiting, retries and timeouts
+        self.gateway = get_llm_gateway()
+        self.model = os.getenv("OPENAI_EXTRACTION_MODEL", "gpt-4")  # GPT-4 for better extraction
+        self.prompt_builder = PromptBuilder(model=self.model)
+        self.json_mode = self._json_mode_enabled(self.model)
+        self._stats_lock = threading.Lock()
+        self._stats = {"valid": 0, "repaired": 0, "failed": 0, "reasked_fields": 0}
         logger.info("OpenAI Extractor initialized")
+
+    @staticmethod
+    def _json_mode_enabled(model: str) -> bool:
+        """JSON mode per OPENAI_JSON_MODE (true/false/auto: by model name)"""
+        setting = os.getenv("OPENAI_JSON_MODE", "auto").lower()
+        if setting in ("true", "false"):
+            return setting == "true"
+        return model.startswith(JSON_MODE_MODELS)
         
     def test_connection(self) -> bool:
         """Test the connection to the OpenAI API"""
         try:
-            response = self.client.chat.completions.create(
+            self.gateway.chat(
+                [{"role": "user", "content": "Test"}],
                 model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Test"}],
-                max_tokens=5
+                max_tokens=5,
+                coalesce=False
             )
             logger.info("OpenAI connection test successful")
             return True
@@ -38,106 +130,141 @@ class OpenAIExtractor:
             logger.error(f"OpenAI connection test failed: {str(e)}")
             return False
             
-    def extract_cv_data(self, text: str) -> Dict[str, Any]:
+    def extract_cv_data(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """Extract structured data from CV text
         
+        The text is compacted first (page numbers, running headers/footers,
+        whitespace). CVs that do not fit the context window are split into
+        section-wise calls that run concurrently and are merged afterwards.
+        
         Args:
             text: The CV text to analyze
+            fields: Top-level schema fields to extract (default: all). A subset
+                keeps the prompt small when only some sections are needed.
             
         Returns:
             Dict with extracted data in standardized format
         """
         try:
-            # System prompt defines the role and task
-            system_prompt = """You are an expert in analyzing resumes.
-            Extract precise key information and format it as JSON.
-            Pay special attention to completeness and accuracy in:
-            - Personal data (name, contact, location)
-            - Education (chronological, with exact time periods)
-            - Work experience (chronological, with details)
-            - Skills (technical, soft skills)
-            - Languages (with levels)
-            
-            Format all dates as 'YYYY-MM'.
-            For missing information, leave fields empty ([]/{}/""), but maintain the structure."""
-
-            # User prompt defines the expected format
-            user_prompt = f"""Analyze the following resume and extract the data in the specified JSON format:
-
-            {{
-                "personal_data": {{
-                    "first_name": "",
-                    "last_name": "",
-                    "email": "",
-                    "phone": "",
-                    "location": {{
-                        "city": "",
-                        "country": ""
-                    }}
-                }},
-                "education": [
-                    {{
-                        "degree": "",
-                        "field": "",
-                        "institution": "",
-                        "location": "",
-                        "start_date": "YYYY-MM",
-                        "end_date": "YYYY-MM",
-                        "description": ""
-                    }}
-                ],
-                "experience": [
-                    {{
-                        "title": "",
-                        "company": "",
-                        "location": "",
-                        "start_date": "YYYY-MM",
-                        "end_date": "YYYY-MM",
-                        "description": "",
-                        "achievements": []
-                    }}
-                ],
-                "skills": {{
-                    "technical": [],
-                    "soft": [],
-                    "languages": [
-                        {{
-                            "language": "",
-                            "level": ""
-                        }}
-                    ]
-                }}
-            }}
-
-            Resume:
-            {text}"""
-
-            # OpenAI API request with new syntax
-            response = self.client.chat.completions.create(
-                model="gpt-4",  # Use GPT-4 for better extraction
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Low temperature for more consistent results
-                max_tokens=2000
+            fields = list(CV_SCHEMA) if fields is None else list(fields)
+            raw_tokens = self.prompt_builder.count_tokens(text)
+            text = compact_text(text)
+
+            overhead = self.prompt_builder.count_tokens(SYSTEM_PROMPT + user_prompt("", fields))
+            chunks = self.prompt_builder.plan(text, fields, overhead)
+            requests = [self._build_request(chunk.text, chunk.fields) for chunk in chunks]
+            report = self.prompt_builder.record(raw_tokens, [
+                self.prompt_builder.count_tokens(SYSTEM_PROMPT + request["messages"][1]["content"])
+                for request in requests
+            ])
+
+            responses = self._send(requests)
+            usage = sum((response.get("usage") or {}).get("prompt_tokens", 0) for response in responses)
+            logger.info(
+                f"CV extraction used {report['prompt_tokens']} prompt tokens in {report['calls']} call(s) "
+                f"(raw text {raw_tokens} tokens, API reported {usage})"
             )
-            
-            # Extract and validate the response
-            result = response.choices[0].message.content.strip()
-            
-            try:
-                extracted_data = json.loads(result)
-                logger.info(f"CV data successfully extracted for: {extracted_data.get('personal_data', {}).get('first_name', '')} {extracted_data.get('personal_data', {}).get('last_name', '')}")
-                return extracted_data
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing error: {str(e)}\nResponse: {result}")
-                raise ValueError(f"Error parsing OpenAI response: {str(e)}")
+
+            results = []
+            followups = []
+            for chunk, response in zip(chunks, responses):
+                data, missing = self._parse_response(response, chunk.fields)
+                results.append(data)
+                if missing:
+                    followups.append((data, self._build_request(chunk.text, missing), missing))
+
+            if followups:
+                # Re-ask only for the fields that were missing or cut off, not the whole CV
+                self._count("reasked_fields", sum(len(missing) for _, _, missing in followups))
+                logger.info(f"Re-asking for missing fields: {[missing for _, _, missing in followups]}")
+                for (data, _, missing), response in zip(followups, self._send([request for _, request, _ in followups])):
+                    try:
+                        retry_data, _ = self._parse_response(response, missing, count=False)
+                    except ValueError:
+                        # Keep what the first reply salvaged
+                        continue
+                    for field in missing:
+                        if retry_data.get(field):
+                            data[field] = retry_data[field]
+
+            extracted_data = results[0] if len(results) == 1 else merge_results(results)
+            logger.info(f"CV data successfully extracted for: {extracted_data.get('personal_data', {}).get('first_name', '')} {extracted_data.get('personal_data', {}).get('last_name', '')}")
+            return extracted_data
                 
         except Exception as e:
             logger.error(f"OpenAI extraction error: {str(e)}")
             raise ValueError(f"Error during CV extraction: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Token and response parsing counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["json_mode"] = self.json_mode
+        stats["tokens"] = self.prompt_builder.stats()
+        return stats
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _build_request(self, text: str, fields) -> Dict[str, Any]:
+        request = {
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt(text, fields)}
+            ],
+            "model": self.model,
+            "temperature": 0.3,  # Low temperature for more consistent results
+            "max_tokens": self.prompt_builder.completion_tokens
+        }
+        if self.json_mode:
+            # Constrains the reply to a single JSON object
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _send(self, requests):
+        """Send requests through the shared LLM gateway (several run concurrently)"""
+        try:
+            if len(requests) == 1:
+                return [self.gateway.chat(**requests[0])]
+            return self.gateway.chat_many(requests)
+        except LLMError as e:
+            if not (self.json_mode and e.status_code == 400 and "response_format" in str(e)):
+                raise
+            # The model does not support JSON mode: switch it off and resend
+            logger.warning(f"JSON mode not supported by {self.model}, falling back to plain prompts")
+            self.json_mode = False
+            for request in requests:
+                request.pop("response_format", None)
+            return self._send(requests)
+
+    def _parse_response(self, response: Dict[str, Any], fields, count: bool = True):
+        """Parse a model reply, repairing malformed or truncated JSON
+
+        Returns:
+            Tuple of (data, fields that are missing or were cut off)
+        """
+        result = message_content(response).strip()
+        try:
+            parsed = repair_json(result)
+        except JSONRepairError as e:
+            if count:
+                self._count("failed")
+            logger.error(f"JSON parsing error: {str(e)}\nResponse: {result}")
+            raise ValueError(f"Error parsing OpenAI response: {str(e)}")
+
+        data = parsed.data if isinstance(parsed.data, dict) else {}
+        if count:
+            self._count("valid" if parsed.valid else "repaired")
+        if not parsed.valid:
+            logger.warning(f"Repaired malformed model output (complete={parsed.complete}, truncated={parsed.truncated_keys})")
+
+        missing = [field for field in fields if field not in data or field in parsed.truncated_keys]
+        finish_reason = (response.get("choices") or [{}])[0].get("finish_reason")
+        if finish_reason == "length" and not parsed.complete and not missing and fields:
+            # Cut off by max_tokens right after a complete value: the last field may be incomplete
+            missing = [list(data)[-1]] if data and list(data)[-1] in fields else []
+        return data, missing
             
     def extract_from_text(self, text: str) -> Dict[str, Any]:
         """Wrapper method for text extraction"""
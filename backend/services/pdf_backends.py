@@ -0,0 +1,141 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+
+import fitz  # PyMuPDF
+
+from services.pdf_ocr import get_page_ocr
+from services.pdf_layout import page_lines, reading_order, build_sections, sections_to_text
+
+try:
+    import PyPDF2
+except ImportError:  # optional backend
+    PyPDF2 = None
+
+logger = logging.getLogger(__name__)
+
+
+class PDFBackendError(Exception):
+    """Raised for PDFs a backend cannot read; the message is shown to users"""
+
+
+class PDFBackend(ABC):
+    """Text extraction backend: one text per page, line breaks kept"""
+
+    name = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def extract_pages(self, file_path: str) -> List[str]:
+        """Extract the text of each page
+
+        Raises:
+            PDFBackendError: If the file is encrypted or not a valid PDF
+        """
+
+
+class PyMuPDFBackend(PDFBackend):
+    """PyMuPDF (MuPDF) text extraction with OCR for image-only pages"""
+
+    name = 'pymupdf'
+
+    def _open(self, file_path: str):
+        try:
+            doc = fitz.open(file_path)
+        except fitz.FileDataError:
+            raise PDFBackendError("Invalid PDF format")
+        if doc.needs_pass:
+            doc.close()
+            raise PDFBackendError("PDF is password protected")
+        return doc
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        doc = self._open(file_path)
+        pages = []
+        scanned = {}
+        ocr = get_page_ocr()
+        try:
+            for page_num, page in enumerate(doc, 1):
+                try:
+                    text = page.get_text()
+
+                    # Image-only page (scanned CV): recognized with OCR below
+                    if ocr.needs_ocr(page, text) and ocr.available():
+                        scanned[len(pages)] = (page_num - 1, ocr.page_key(doc, page))
+
+                    pages.append(text)
+
+                except Exception as e:
+                    logger.warning(f"Error extracting text on page {page_num}: {str(e)}")
+                    continue
+        finally:
+            doc.close()
+
+        if scanned:
+            logger.info(f"Running OCR on {len(scanned)} image-only page(s)")
+            texts = ocr.recognize(file_path, {index: key for index, key in scanned.values()})
+            for position, (index, _) in scanned.items():
+                pages[position] = texts.get(index) or pages[position]
+        return pages
+
+
+class PyMuPDFLayoutBackend(PyMuPDFBackend):
+    """PyMuPDF lines in reading order (columns) with headings, see services.pdf_layout"""
+
+    name = 'pymupdf-layout'
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        doc = self._open(file_path)
+        try:
+            return [sections_to_text(build_sections([reading_order(page_lines(page, page_num), page.rect.width)]))
+                    for page_num, page in enumerate(doc, 1)]
+        finally:
+            doc.close()
+
+
+class PyPDF2Backend(PDFBackend):
+    """Pure-Python extraction with PyPDF2"""
+
+    name = 'pypdf2'
+
+    @classmethod
+    def available(cls) -> bool:
+        return PyPDF2 is not None
+
+    def extract_pages(self, file_path: str) -> List[str]:
+        try:
+            reader = PyPDF2.PdfReader(file_path)
+            if reader.is_encrypted and not reader.decrypt(''):
+                raise PDFBackendError("PDF is password protected")
+            return [page.extract_text() or '' for page in reader.pages]
+        except PyPDF2.errors.PdfReadError:
+            raise PDFBackendError("Invalid PDF format")
+
+
+BACKENDS: Dict[str, Type[PDFBackend]] = {
+    backend.name: backend for backend in (PyMuPDFBackend, PyMuPDFLayoutBackend, PyPDF2Backend)
+}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose libraries are installed"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def get_pdf_backend(name: Optional[str] = None) -> PDFBackend:
+    """Backend by name (default: PDF_BACKEND, otherwise PyMuPDF)
+
+    Raises:
+        ValueError: For unknown backends or backends that are not installed
+    """
+    name = (name or os.getenv('PDF_BACKEND', PyMuPDFBackend.name)).lower()
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown PDF backend '{name}' (available: {', '.join(BACKENDS)})")
+    if not backend.available():
+        raise ValueError(f"PDF backend '{name}' is not installed")
+    return backend()
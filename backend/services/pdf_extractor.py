@@ -1,7 +1,10 @@
 import os
 import logging
 import fitz  # PyMuPDF
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+from services.pdf_ocr import get_page_ocr
+from services.pdf_backends import get_pdf_backend, PDFBackendError
+from services.pdf_layout import LayoutLine, LayoutSection, page_lines, reading_order, build_sections, sections_to_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,63 +14,120 @@ class PDFExtractor:
     """PDF Text Extractor with error handling and fallback options"""
     
     @staticmethod
-    def extract_text(file_path: str) -> Tuple[Optional[str], Optional[str]]:
-        """Extract text from a PDF file
+    def extract_pages(file_path: str, backend: Optional[str] = None) -> Tuple[Optional[List[str]], Optional[str]]:
+        """Extract the text of each page, keeping line breaks
+        
+        Image-only pages (scanned CVs) are recognized with OCR when Tesseract
+        is installed; text PDFs never reach the OCR stage.
         
         Args:
             file_path: Path to the PDF file
+            backend: Extraction backend (default: PDF_BACKEND, see services.pdf_backends)
             
         Returns:
-            Tuple[Optional[str], Optional[str]]: (extracted text, error message)
+            Tuple[Optional[List[str]], Optional[str]]: (page texts, error message)
         """
         if not os.path.exists(file_path):
             return None, "PDF file not found"
             
         try:
-            doc = fitz.open(file_path)
+            pages = get_pdf_backend(backend).extract_pages(file_path)
+            
+            # Check if text was extracted
+            if not any(page.strip() for page in pages):
+                ocr = get_page_ocr()
+                if ocr.enabled and not ocr.available():
+                    return None, "No text found in PDF (scanned document, OCR not available)"
+                return None, "No text found in PDF"
+                
+            return pages, None
+            
+        except PDFBackendError as e:
+            return None, str(e)
+        except Exception as e:
+            logger.error(f"Error processing PDF: {str(e)}")
+            return None, f"PDF processing error: {str(e)}"
+
+    @staticmethod
+    def extract_layout(file_path: str) -> Tuple[Optional[List[LayoutSection]], Optional[str]]:
+        """Extract sections with their headings in reading order
+        
+        Uses font size, weight and position of each line: headings are
+        detected relative to the body font size and two-column layouts are
+        read column by column. Scanned pages fall back to the (OCR) text of
+        extract_pages without heading detection.
+        
+        Args:
+            file_path: Path to the PDF file
             
-            # Check if PDF is encrypted
+        Returns:
+            Tuple[Optional[List[LayoutSection]], Optional[str]]: (sections, error message)
+        """
+        if not os.path.exists(file_path):
+            return None, "PDF file not found"
+            
+        try:
+            doc = fitz.open(file_path)
             if doc.needs_pass:
                 doc.close()
                 return None, "PDF is password protected"
                 
-            extracted_text = ""
-            
-            # Extract text from each page
+            pages = []
             for page_num, page in enumerate(doc, 1):
-                try:
-                    # Try normal text extraction
-                    text = page.get_text()
-                    
-                    # If no text found, try HTML extraction
-                    if not text.strip():
-                        text = page.get_text("html")
-                        logger.info(f"Using HTML extraction for page {page_num}")
-                    
-                    extracted_text += text + "\n"
-                    
-                except Exception as e:
-                    logger.warning(f"Error extracting text on page {page_num}: {str(e)}")
-                    continue
-                    
+                pages.append(reading_order(page_lines(page, page_num), page.rect.width))
             doc.close()
             
-            # Check if text was extracted
-            if not extracted_text.strip():
+            if not all(pages):
+                # Image-only pages: use the plain extraction with OCR
+                plain_pages, error = PDFExtractor.extract_pages(file_path, backend='pymupdf')
+                if error and not any(pages):
+                    return None, error
+                for index, lines in enumerate(pages):
+                    if not lines and plain_pages and index < len(plain_pages):
+                        pages[index] = [LayoutLine(text, 0, 0, 0, 0, page=index + 1)
+                                        for text in plain_pages[index].splitlines() if text.strip()]
+                        
+            sections = build_sections(pages)
+            if not sections:
                 return None, "No text found in PDF"
-                
-            # Normalize the text
-            normalized_text = " ".join(extracted_text.split())
-            logger.info(f"Text successfully extracted: {len(normalized_text)} characters")
-            
-            return normalized_text, None
+            return sections, None
             
         except fitz.FileDataError:
             return None, "Invalid PDF format"
         except Exception as e:
-            logger.error(f"Error processing PDF: {str(e)}")
+            logger.error(f"Error processing PDF layout: {str(e)}")
             return None, f"PDF processing error: {str(e)}"
 
+    @staticmethod
+    def extract_text(file_path: str, layout: bool = False) -> Tuple[Optional[str], Optional[str]]:
+        """Extract text from a PDF file
+        
+        Args:
+            file_path: Path to the PDF file
+            layout: Keep headings and line breaks in reading order (see
+                extract_layout) instead of whitespace-normalized text
+            
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (extracted text, error message)
+        """
+        if layout:
+            sections, error = PDFExtractor.extract_layout(file_path)
+            if error:
+                return None, error
+            text = sections_to_text(sections)
+            logger.info(f"Layout text successfully extracted: {len(sections)} sections, {len(text)} characters")
+            return text, None
+            
+        pages, error = PDFExtractor.extract_pages(file_path)
+        if error:
+            return None, error
+            
+        # Normalize the text
+        normalized_text = " ".join("\n".join(pages).split())
+        logger.info(f"Text successfully extracted: {len(normalized_text)} characters")
+        
+        return normalized_text, None
+
     def is_valid_pdf(self, pdf_path: str) -> bool:
         """
         Check if a file is a valid PDF.
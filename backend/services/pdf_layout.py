@@ -0,0 +1,164 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+BULLET_RE = re.compile(r'^\s*[•●▪■◦‣\-–*]\s')
+
+# Bit of span['flags'] set for bold fonts
+BOLD_FLAG = 16
+# Headings are larger than body text by this factor (or bold at body size)
+HEADING_SIZE_RATIO = 1.15
+HEADING_MAX_CHARS = 60
+# Minimum empty vertical band between two columns (points)
+MIN_GUTTER = 12
+# Only lines narrower than this share of the page are used to find the column gutter
+COLUMN_MAX_RATIO = 0.45
+# Each column holds at least this share of the text (a right-aligned date rail is not a column)
+MIN_COLUMN_SHARE = 0.15
+
+
+@dataclass
+class LayoutLine:
+    """One text line with the font data used for heading detection"""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    size: float = 0.0
+    bold: bool = False
+    page: int = 0
+
+
+@dataclass
+class LayoutSection:
+    """A heading and the lines below it, in reading order"""
+    heading: str
+    level: int
+    page: int
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'heading': self.heading, 'level': self.level, 'page': self.page, 'text': self.text}
+
+
+def page_lines(page, page_number: int = 0) -> List[LayoutLine]:
+    """Text lines of a page with position, font size and weight"""
+    lines = []
+    # TEXTFLAGS_TEXT skips image blocks, which the layout does not need
+    for block in page.get_text('dict', flags=fitz.TEXTFLAGS_TEXT)['blocks']:
+        for line in block.get('lines', []):
+            spans = [span for span in line['spans'] if span['text'].strip()]
+            if not spans:
+                continue
+            text = "".join(span['text'] for span in line['spans']).strip()
+            x0, y0, x1, y1 = line['bbox']
+            lines.append(LayoutLine(
+                text=" ".join(text.split()),
+                x0=x0, y0=y0, x1=x1, y1=y1,
+                size=round(max(span['size'] for span in spans), 1),
+                bold=all(span['flags'] & BOLD_FLAG or 'bold' in span['font'].lower() for span in spans),
+                page=page_number,
+            ))
+    return lines
+
+
+def reading_order(lines: List[LayoutLine], page_width: float) -> List[LayoutLine]:
+    """Order the lines of a page, reading two-column layouts column by column
+
+    A column split is a vertical band near the middle of the page that no
+    narrow line crosses. Full-width lines above the columns (e.g. name and
+    contact line) come first, full-width lines below them last.
+    """
+    lines = sorted(lines, key=lambda line: (round(line.y0), line.x0))
+    narrow = [line for line in lines if line.x1 - line.x0 < page_width * COLUMN_MAX_RATIO]
+    gutter = _find_gutter(narrow, page_width)
+    if gutter is None:
+        return lines
+
+    left = [line for line in lines if line.x1 <= gutter]
+    right = [line for line in lines if line.x0 >= gutter]
+    left_chars = sum(len(line.text) for line in left)
+    right_chars = sum(len(line.text) for line in right)
+    if len(left) < 3 or len(right) < 3 or min(left_chars, right_chars) < MIN_COLUMN_SHARE * (left_chars + right_chars):
+        return lines
+
+    # The columns start where both have begun, everything above is the page header
+    columns_top = max(min(line.y0 for line in left), min(line.y0 for line in right)) - 1
+    above = [line for line in lines if line.y0 < columns_top]
+    in_columns = set(map(id, above + left + right))
+    below = [line for line in lines if id(line) not in in_columns]
+    return above + [line for line in left + right if line.y0 >= columns_top] + below
+
+
+def _find_gutter(lines: List[LayoutLine], page_width: float) -> Optional[float]:
+    """x position of the widest empty band in the middle half of the page"""
+    if len(lines) < 6:
+        return None
+    covered = sorted((line.x0, line.x1) for line in lines)
+    best, best_width = None, MIN_GUTTER
+    reach = covered[0][1]
+    for x0, x1 in covered[1:]:
+        if x0 - reach > best_width and page_width * 0.25 <= (x0 + reach) / 2 <= page_width * 0.75:
+            best, best_width = (x0 + reach) / 2, x0 - reach
+        reach = max(reach, x1)
+    return best
+
+
+def body_font_size(lines: List[LayoutLine]) -> float:
+    """Most common font size, weighted by characters"""
+    sizes = Counter()
+    for line in lines:
+        if line.size:
+            sizes[line.size] += len(line.text)
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def is_heading(line: LayoutLine, body_size: float) -> bool:
+    """Short, larger (or bold) line that does not read like a sentence or bullet"""
+    if not line.size or not body_size or len(line.text) > HEADING_MAX_CHARS:
+        return False
+    if line.text.endswith(('.', ',', ';')) or BULLET_RE.match(line.text) or ':' in line.text[:-1]:
+        return False
+    return line.size >= body_size * HEADING_SIZE_RATIO or (line.bold and line.size >= body_size)
+
+
+def build_sections(pages: List[List[LayoutLine]]) -> List[LayoutSection]:
+    """Group ordered lines of all pages into sections by detected headings
+
+    Heading levels follow font size (largest = 1). Lines before the first
+    heading form a section without heading.
+    """
+    all_lines = [line for lines in pages for line in lines]
+    body_size = body_font_size(all_lines)
+    heading_sizes = sorted({line.size for line in all_lines if is_heading(line, body_size)}, reverse=True)
+
+    sections = []
+    current = None
+    for line in all_lines:
+        if is_heading(line, body_size):
+            current = LayoutSection(line.text, heading_sizes.index(line.size) + 1, line.page)
+            sections.append(current)
+            continue
+        if current is None:
+            current = LayoutSection('', 0, line.page)
+            sections.append(current)
+        current.lines.append(line.text)
+    return sections
+
+
+def sections_to_text(sections: List[LayoutSection]) -> str:
+    """Plain text with each heading on its own line, followed by its content"""
+    parts = []
+    for section in sections:
+        part = "\n".join(([section.heading] if section.heading else []) + section.lines)
+        if part:
+            parts.append(part)
+    return "\n\n".join(parts)
@@ -0,0 +1,190 @@
+import os
+import atexit
+import hashlib
+import logging
+import threading
+import multiprocessing
+from typing import Dict, Optional
+
+import fitz  # PyMuPDF
+
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _ocr_page(file_path: str, page_index: int, language: str, dpi: int) -> str:
+    """OCR one page with Tesseract (runs in a worker process)"""
+    doc = fitz.open(file_path)
+    try:
+        page = doc[page_index]
+        textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+        return page.get_text(textpage=textpage)
+    finally:
+        doc.close()
+
+
+def _tessdata() -> Optional[str]:
+    """Tesseract language data folder, None if OCR is not installed"""
+    if os.getenv('TESSDATA_PREFIX'):
+        return os.getenv('TESSDATA_PREFIX')
+    try:
+        return fitz.get_tessdata()
+    except Exception:
+        return None
+
+
+class PageOCR:
+    """OCR for image-only PDF pages
+
+    Pages are recognized in a process pool so Tesseract neither blocks the
+    request threads nor holds the GIL. A page that exceeds the timeout gets
+    an empty text and its worker is killed (the pool is recreated). Results
+    are cached by a hash of the page content and images, so the same scan
+    uploaded again is not recognized twice.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('PDF_OCR', 'true').lower() == 'true'
+        self.language = os.getenv('OCR_LANGUAGE', 'deu+eng')
+        self.dpi = int(os.getenv('OCR_DPI', '300'))
+        self.page_timeout = float(os.getenv('OCR_PAGE_TIMEOUT', '30'))
+        self.workers = int(os.getenv('OCR_MAX_WORKERS', str(min(4, os.cpu_count() or 1))))
+        # Pages with fewer characters but images are treated as scanned
+        self.min_chars = int(os.getenv('OCR_MIN_CHARS', '20'))
+        self.cache = TTLCache(ttl=float(os.getenv('OCR_CACHE_TTL', '86400')),
+                              maxsize=int(os.getenv('OCR_CACHE_SIZE', '2048')))
+
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'pages': 0, 'cache_hits': 0, 'timeouts': 0, 'failures': 0}
+        self._available = None
+
+    def available(self) -> bool:
+        """OCR is enabled and Tesseract language data is installed"""
+        if self._available is None:
+            self._available = self.enabled and _tessdata() is not None
+            if self.enabled and not self._available:
+                logger.warning("Tesseract language data not found (TESSDATA_PREFIX), OCR fallback disabled")
+        return self._available
+
+    def needs_ocr(self, page, text: str) -> bool:
+        """A page without a (meaningful) text layer that contains images"""
+        return len(text.strip()) < self.min_chars and bool(page.get_images())
+
+    def page_key(self, doc, page) -> str:
+        """Hash of the page content stream and its images"""
+        digest = hashlib.sha256(f"{self.language}:{self.dpi}".encode())
+        digest.update(page.read_contents())
+        for image in page.get_images():
+            digest.update(doc.xref_stream_raw(image[0]) or b'')
+        return digest.hexdigest()
+
+    def recognize(self, file_path: str, pages: Dict[int, str]) -> Dict[int, str]:
+        """OCR pages of a PDF file
+
+        Args:
+            file_path: Path to the PDF file
+            pages: Page index -> page key (see page_key)
+
+        Returns:
+            Page index -> recognized text ('' for pages that failed or timed out)
+        """
+        results = {}
+        pending = {}
+        for index, key in pages.items():
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+                self._count('cache_hits')
+            else:
+                pending[index] = key
+
+        while pending:
+            pool, generation = self._get_pool()
+            jobs = {index: pool.apply_async(_ocr_page, (file_path, index, self.language, self.dpi))
+                    for index in pending}
+            timed_out = None
+            for index, job in jobs.items():
+                try:
+                    text = job.get(timeout=self.page_timeout)
+                except multiprocessing.TimeoutError:
+                    timed_out = index
+                    break
+                except Exception as e:
+                    logger.warning(f"OCR failed on page {index + 1}: {str(e)}")
+                    self._count('failures')
+                    text = ''
+                else:
+                    self.cache.set(pending[index], text)
+                    self._count('pages')
+                results[index] = text
+                del pending[index]
+
+            if timed_out is None:
+                break
+            if generation != self._generation:
+                # Another request recycled the pool while this one waited: resubmit
+                continue
+            # Keep pages that finished meanwhile, then kill the hung worker
+            for index, job in jobs.items():
+                if index in pending and index != timed_out and job.ready() and job.successful():
+                    results[index] = job.get()
+                    self.cache.set(pending.pop(index), results[index])
+                    self._count('pages')
+            logger.warning(f"OCR timed out on page {timed_out + 1} after {self.page_timeout}s")
+            self._count('timeouts')
+            results[timed_out] = ''
+            # Do not retry the same page on every upload of the file
+            self.cache.set(pending.pop(timed_out), '', ttl=600)
+            self._reset_pool(generation)
+        return results
+
+    def stats(self) -> dict:
+        """OCR counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['cache'] = self.cache.stats()
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded web server is not safe
+                context = multiprocessing.get_context('spawn')
+                # Recycle workers regularly, Tesseract holds on to memory
+                self._pool = context.Pool(self.workers, maxtasksperchild=50)
+            return self._pool, self._generation
+
+    def _reset_pool(self, generation: int):
+        with self._lock:
+            if generation == self._generation and self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+                self._generation += 1
+
+
+_page_ocr = None
+_page_ocr_lock = threading.Lock()
+
+
+def get_page_ocr() -> PageOCR:
+    """Process-wide OCR stage (one worker pool per process)"""
+    global _page_ocr
+    with _page_ocr_lock:
+        if _page_ocr is None:
+            _page_ocr = PageOCR()
+            atexit.register(_page_ocr.close)
+        return _page_ocr
@@ -0,0 +1,176 @@
+import io
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency, only needed for employee photos
+    Image = None
+
+from services.blob_store import BlobStore, get_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Square thumbnails (edge in pixels) plus 'full', the photo scaled down without cropping
+SIZES = {'sm': 64, 'md': 160, 'lg': 480}
+FULL_SIZE = 1024
+FORMATS = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+MAX_BYTES = int(os.getenv('PHOTO_MAX_BYTES', str(10 * 1024 * 1024)))
+MAX_PIXELS = int(os.getenv('PHOTO_MAX_PIXELS', str(40 * 1000 * 1000)))
+QUALITY = {'webp': 80, 'jpeg': 85}
+MANIFEST_KIND = 'photo_renditions'
+
+
+class PhotoError(ValueError):
+    """Raised for uploads that are not usable photos; the message is shown to users"""
+
+
+class PhotoPipeline:
+    """Validates uploaded photos and stores resized renditions in the blob store
+
+    The upload is decoded once, turned upright (EXIF orientation) and every
+    size/format is encoded in a thread pool (Pillow releases the GIL while
+    resizing and encoding). Renditions are written without EXIF/ICC metadata.
+    The photo is referenced as 'blob:<sha256 of the upload>'; the blob's
+    derived manifest maps size and format to the rendition blobs.
+    """
+
+    def __init__(self, store: BlobStore, workers: int = 4):
+        if Image is None:
+            raise RuntimeError("Pillow is required for the photo pipeline")
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo')
+        self._lock = threading.Lock()
+        self._stats = {'uploads': 0, 'rejected': 0, 'reused': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def store_photo(self, upload: Union[bytes, BinaryIO]) -> Tuple[str, Dict[str, Dict[str, str]]]:
+        """Validate an upload and store it with its renditions
+
+        Returns:
+            (reference, manifest): the photo reference for photo_url and
+            {size: {format: sha256}} of the renditions
+
+        Raises:
+            PhotoError: If the upload is too large, not an image or an unsupported format
+        """
+        data = upload if isinstance(upload, bytes) else getattr(upload, 'stream', upload).read(MAX_BYTES + 1)
+        try:
+            image = self._open(data)
+        except PhotoError:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise
+
+        original = self.store.put(data)
+        manifest = self.store.get_derived(original.sha256, MANIFEST_KIND)
+        if manifest is not None:
+            # Same photo stored before: this reference holds one more ref on each rendition
+            for renditions in manifest.values():
+                for sha256 in renditions.values():
+                    self.store.addref(sha256)
+            with self._lock:
+                self._stats['reused'] += 1
+            return f"blob:{original.sha256}", manifest
+
+        jobs = {(size, fmt): self.executor.submit(self._encode, image, size, fmt)
+                for size in list(SIZES) + ['full'] for fmt in FORMATS}
+        manifest = {}
+        bytes_out = 0
+        for (size, fmt), job in jobs.items():
+            encoded = job.result()
+            manifest.setdefault(size, {})[fmt] = self.store.put(encoded).sha256
+            bytes_out += len(encoded)
+        self.store.set_derived(original.sha256, MANIFEST_KIND, manifest)
+
+        with self._lock:
+            self._stats['uploads'] += 1
+            self._stats['bytes_in'] += len(data)
+            self._stats['bytes_out'] += bytes_out
+        return f"blob:{original.sha256}", manifest
+
+    def rendition(self, reference: str, size: str = 'md', fmt: str = 'webp') -> Optional[str]:
+        """Blob hash of one rendition of a stored photo, None if unknown"""
+        sha256 = self.store.resolve(reference)
+        manifest = self.store.get_derived(sha256, MANIFEST_KIND) if sha256 else None
+        if not manifest:
+            return None
+        return manifest.get(size, {}).get(fmt)
+
+    def release_photo(self, reference: str):
+        """Drop a photo reference: the upload and its renditions (deleted with the last reference)"""
+        sha256 = self.store.resolve(reference)
+        if not sha256:
+            return
+        manifest = self.store.get_derived(sha256, MANIFEST_KIND) or {}
+        for renditions in manifest.values():
+            for rendition in renditions.values():
+                self.store.release(rendition)
+        self.store.release(sha256)
+
+    def stats(self) -> dict:
+        """Upload counters for monitoring"""
+        with self._lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def _open(data: bytes):
+        if len(data) > MAX_BYTES:
+            raise PhotoError(f"Photo is larger than {MAX_BYTES // (1024 * 1024)} MB")
+        try:
+            with Image.open(io.BytesIO(data)) as probe:
+                if probe.format not in ACCEPTED_FORMATS:
+                    raise PhotoError(f"Unsupported image format {probe.format}")
+                if probe.width * probe.height > MAX_PIXELS:
+                    raise PhotoError("Photo has too many pixels")
+                probe.verify()
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except PhotoError:
+            raise
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            raise PhotoError("File is not a valid image")
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        return image
+
+    @staticmethod
+    def _encode(image, size: str, fmt: str) -> bytes:
+        if size == 'full':
+            resized = image.copy()
+            resized.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+        else:
+            resized = ImageOps.fit(image, (SIZES[size], SIZES[size]), Image.LANCZOS)
+        if fmt == 'jpeg' and resized.mode == 'RGBA':
+            # No alpha channel in JPEG: flatten on white
+            background = Image.new('RGB', resized.size, (255, 255, 255))
+            background.paste(resized, mask=resized.getchannel('A'))
+            resized = background
+        buffer = io.BytesIO()
+        # Encoded from pixels only: EXIF, XMP and ICC metadata are not carried over
+        if fmt == 'webp':
+            resized.save(buffer, 'WEBP', quality=QUALITY['webp'], method=4)
+        else:
+            resized.save(buffer, 'JPEG', quality=QUALITY['jpeg'], optimize=True, progressive=True)
+        return buffer.getvalue()
+
+
+_photo_pipeline = None
+_photo_pipeline_lock = threading.Lock()
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def get_photo_pipeline() -> PhotoPipeline:
+    """Process-wide pipeline, PHOTO_WORKERS threads"""
+    global _photo_pipeline
+    with _photo_pipeline_lock:
+        if _photo_pipeline is None:
+            _photo_pipeline = PhotoPipeline(get_blob_store(), int(os.getenv('PHOTO_WORKERS', '4')))
+        return _photo_pipeline
@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+from services.local_extractor import LocalExtractor
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency, a character based estimate is used instead
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# CV sections that belong to each top-level schema field
+FIELD_SECTIONS = {
+    'personal_data': ('header', 'personal_data', 'summary'),
+    'education': ('education', 'certifications'),
+    'experience': ('experience', 'projects'),
+    'skills': ('skills', 'languages'),
+}
+
+PAGE_NUMBER_RE = re.compile(
+    r'^\s*(?:(?:seite|page|s\.)\s*\d+(?:\s*(?:von|of|/)\s*\d+)?|-\s*\d+\s*-|\d+\s*/\s*\d+|\d{1,3})\s*$',
+    re.IGNORECASE
+)
+INLINE_PAGE_NUMBER_RE = re.compile(r'\b(?:Seite|Page)\s+\d+\s+(?:von|of)\s+\d+\b', re.IGNORECASE)
+
+# Lines at the top/bottom of a page that are checked for running headers/footers
+EDGE_LINES = 3
+# Smallest input budget worth a call; below it the context window is misconfigured
+MIN_CHUNK_TOKENS = 100
+
+
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def compact_pages(pages: List[str]) -> str:
+    """Join page texts without boilerplate
+
+    Removes page numbers and running headers/footers (lines repeated at the top
+    or bottom of most pages), trims whitespace and drops blank lines while
+    keeping the line structure the section segmentation relies on.
+    """
+    page_lines = [[line.strip() for line in page.splitlines()] for page in pages]
+    page_lines = [[line for line in lines if line] for lines in page_lines]
+
+    repeated = set()
+    if len(page_lines) > 1:
+        edges = Counter()
+        for lines in page_lines:
+            edges.update(set(lines[:EDGE_LINES] + lines[-EDGE_LINES:]))
+        threshold = max(2, (len(page_lines) + 1) // 2)
+        repeated = {line for line, count in edges.items() if count >= threshold}
+
+    kept = []
+    for lines in page_lines:
+        for index, line in enumerate(lines):
+            at_edge = index < EDGE_LINES or index >= len(lines) - EDGE_LINES
+            if at_edge and (line in repeated or PAGE_NUMBER_RE.match(line)):
+                continue
+            kept.append(re.sub(r'[ \t]+', ' ', line))
+    return "\n".join(kept)
+
+
+def compact_text(text: str) -> str:
+    """Remove boilerplate from CV text without page structure"""
+    text = INLINE_PAGE_NUMBER_RE.sub(' ', text)
+    if '\n' in text:
+        return compact_pages([text])
+    return " ".join(text.split())
+
+
+@dataclass
+class PromptChunk:
+    """Part of a CV sent in one LLM call, with the schema fields to extract from it"""
+    text: str
+    fields: List[str]
+    tokens: int
+
+
+class PromptBuilder:
+    """Token budgeting for CV extraction prompts
+
+    Measures prompts with tiktoken when installed (otherwise ~4 characters per
+    token) and splits CVs that do not fit the context window into
+    section-wise chunks, each asking only for the fields its sections cover.
+    """
+
+    def __init__(self, model: Optional[str] = None, context_tokens: Optional[int] = None,
+                 completion_tokens: Optional[int] = None):
+        self.model = model or os.getenv('LLM_MODEL', 'gpt-4')
+        self.context_tokens = context_tokens or int(os.getenv('LLM_CONTEXT_TOKENS', '8192'))
+        self.completion_tokens = completion_tokens or int(os.getenv('LLM_MAX_COMPLETION_TOKENS', '2000'))
+        self._encoding = _encoding(self.model)
+        self._segmenter = LocalExtractor(use_spacy=False)
+
+        self._lock = threading.Lock()
+        self._stats = {'cvs': 0, 'calls': 0, 'chunked_cvs': 0, 'raw_tokens': 0, 'prompt_tokens': 0}
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens of a text for the configured model"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def input_budget(self, overhead_tokens: int) -> int:
+        """Tokens left for CV text next to the instructions and the completion"""
+        return self.context_tokens - self.completion_tokens - overhead_tokens
+
+    def plan(self, text: str, fields: List[str], overhead_tokens: int) -> List[PromptChunk]:
+        """Split CV text into prompt chunks that fit the context window
+
+        Args:
+            text: Compacted CV text
+            fields: Schema fields to extract
+            overhead_tokens: Tokens of system prompt and schema for all fields
+
+        Returns:
+            One chunk with all fields if the CV fits, otherwise one or more
+            chunks per field group
+
+        Raises:
+            ValueError: If instructions and completion leave less than MIN_CHUNK_TOKENS for CV text
+        """
+        tokens = self.count_tokens(text)
+        budget = self.input_budget(overhead_tokens)
+        if budget < MIN_CHUNK_TOKENS:
+            raise ValueError(
+                f"Context window too small: {self.context_tokens} tokens leave {budget} for CV text "
+                f"(completion {self.completion_tokens}, instructions {overhead_tokens})"
+            )
+        if tokens <= budget:
+            return [PromptChunk(text, list(fields), tokens)]
+
+        sections = self._segmenter.segment_sections(text)
+        chunks = []
+        unassigned = [field for field in fields if not any(sections.get(name) for name in FIELD_SECTIONS[field])]
+        for field in fields:
+            if field in unassigned:
+                continue
+            field_text = "\n\n".join(sections[name] for name in FIELD_SECTIONS[field] if sections.get(name))
+            for piece in self._split(field_text, budget):
+                chunks.append(PromptChunk(piece, [field], self.count_tokens(piece)))
+
+        if unassigned:
+            # Sections were not recognized, so these fields may be anywhere: scan the whole text
+            for piece in self._split(text, budget):
+                chunks.append(PromptChunk(piece, unassigned, self.count_tokens(piece)))
+        return chunks
+
+    def _split(self, text: str, budget: int) -> List[str]:
+        """Split text at line (or sentence) boundaries into pieces within the budget"""
+        if self.count_tokens(text) <= budget:
+            return [text]
+        units = text.splitlines() if '\n' in text else re.split(r'(?<=[.;•])\s+', text)
+        pieces, current, current_tokens = [], [], 0
+        for unit in units:
+            unit_tokens = self.count_tokens(unit) + 1
+            if unit_tokens > budget:
+                # A single overlong line: cut it by characters, after the lines before it
+                if current:
+                    pieces.append("\n".join(current))
+                    current, current_tokens = [], 0
+                step = max(1, len(unit) * budget // unit_tokens)
+                pieces.extend(unit[i:i + step] for i in range(0, len(unit), step))
+                continue
+            if current and current_tokens + unit_tokens > budget:
+                pieces.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += unit_tokens
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def record(self, raw_tokens: int, prompt_tokens: List[int]) -> Dict[str, int]:
+        """Record the tokens of one CV extraction
+
+        Args:
+            raw_tokens: Tokens of the CV text before compaction
+            prompt_tokens: Full prompt tokens of each call made for the CV
+
+        Returns:
+            Token report of this CV
+        """
+        total = sum(prompt_tokens)
+        with self._lock:
+            self._stats['cvs'] += 1
+            self._stats['calls'] += len(prompt_tokens)
+            self._stats['chunked_cvs'] += int(len(prompt_tokens) > 1)
+            self._stats['raw_tokens'] += raw_tokens
+            self._stats['prompt_tokens'] += total
+        return {'raw_tokens': raw_tokens, 'prompt_tokens': total, 'calls': len(prompt_tokens)}
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregated token counters for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_prompt_tokens_per_cv'] = stats['prompt_tokens'] // stats['cvs'] if stats['cvs'] else 0
+        return stats
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the extraction results of several chunks of one CV"""
+    merged: Dict[str, Any] = {}
+    for result in results:
+        for field, value in result.items():
+            if not value:
+                merged.setdefault(field, value)
+            elif isinstance(value, list):
+                existing = merged.get(field) or []
+                seen = {json.dumps(item, sort_keys=True) for item in existing}
+                merged[field] = existing + [item for item in value if json.dumps(item, sort_keys=True) not in seen]
+            elif field == 'skills' and isinstance(value, dict):
+                skills = merged.get(field) or {}
+                merged[field] = {key: (skills.get(key) or []) + [
+                    item for item in (value.get(key) or []) if item not in (skills.get(key) or [])
+                ] for key in set(skills) | set(value)}
+            elif isinstance(value, dict) and isinstance(merged.get(field), dict):
+                # Fill empty sub-fields (e.g. personal data found in several chunks)
+                merged[field] = {**value, **{k: v for k, v in merged[field].items() if v}}
+            else:
+                merged[field] = value
+    return merged
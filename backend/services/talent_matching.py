@@ -0,0 +1,361 @@
+import os
+import re
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional dependency, only needed for talent matching
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Weight of a profile field relative to free text (descriptions)
+FIELD_WEIGHTS = {'skill': 3.0, 'technology': 2.0, 'certificate': 2.0, 'position': 1.5, 'language': 1.0, 'text': 1.0}
+# Seconds between checks for changed employees (updated_at)
+SYNC_INTERVAL = int(os.getenv('MATCH_SYNC_SECONDS', '30'))
+# Re-read rows changed this long before the last sync: transactions commit after their updated_at
+SYNC_OVERLAP = 60
+EXPLAIN_FEATURES = 5
+
+# Keeps terms like c++, c#, node.js and ci/cd together
+TOKEN_RE = re.compile(r"[a-z0-9äöüß][a-z0-9äöüß+#./-]*[a-z0-9äöüß+#]|[a-z0-9äöüß]")
+STOPWORDS = {
+    'and', 'or', 'the', 'of', 'for', 'in', 'with', 'to', 'on', 'a', 'an', 'at', 'by', 'as', 'is',
+    'und', 'oder', 'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einer', 'eines', 'für',
+    'mit', 'von', 'im', 'in', 'zu', 'zur', 'zum', 'auf', 'bei', 'als', 'ist', 'sind', 'wir', 'sie',
+    'erfahrung', 'kenntnisse', 'sehr', 'gute', 'gut', 'jahre', 'jahren'
+}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def tokens(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens without stop words"""
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def term_features(term: str) -> List[str]:
+    """Features of a skill-like term: the term itself and, for multi-word terms, its words"""
+    words = tokens(term)
+    if len(words) > 1:
+        return [' '.join(words)] + words
+    return words
+
+
+def _add_terms(features: Counter, values: Optional[Iterable[str]], weight: float):
+    for value in values or []:
+        found = term_features(value)
+        if not found:
+            continue
+        # The whole term counts fully, its single words half (partial matches like "deep learning")
+        features[found[0]] += weight
+        for word in found[1:]:
+            features[word] += weight / 2
+
+
+def profile_features(employee: Dict[str, Any]) -> Counter:
+    """Weighted features of an employee: skills, certificates, position, projects and trainings"""
+    features: Counter = Counter()
+    _add_terms(features, employee.get('skills'), FIELD_WEIGHTS['skill'])
+    _add_terms(features, employee.get('zertifikate'), FIELD_WEIGHTS['certificate'])
+    _add_terms(features, employee.get('sprachen'), FIELD_WEIGHTS['language'])
+    _add_terms(features, [employee.get('position') or ''], FIELD_WEIGHTS['position'])
+    for project in employee.get('projects') or []:
+        _add_terms(features, project.get('verwendete_technologien'), FIELD_WEIGHTS['technology'])
+        _add_terms(features, [project.get('rolle') or ''], FIELD_WEIGHTS['position'])
+        for token in tokens(project.get('beschreibung')):
+            features[token] += FIELD_WEIGHTS['text']
+    for training in employee.get('trainings') or []:
+        _add_terms(features, [training.get('thema') or '', training.get('zertifikat') or ''],
+                   FIELD_WEIGHTS['certificate'])
+    return features
+
+
+def posting_features(posting: Dict[str, Any]) -> Counter:
+    """Weighted features of a job posting: requirements as skills plus title and description"""
+    features: Counter = Counter()
+    _add_terms(features, posting.get('anforderungen'), FIELD_WEIGHTS['skill'])
+    _add_terms(features, [posting.get('titel') or ''], FIELD_WEIGHTS['position'])
+    for token in tokens(posting.get('beschreibung')):
+        features[token] += FIELD_WEIGHTS['text']
+    return features
+
+
+def load_profiles(cursor, ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """Employees (mitarbeiter) with projects and trainings, all or the given ids, in three queries"""
+    condition, params = ("WHERE id = ANY(%s)", (ids,)) if ids is not None else ("", ())
+    cursor.execute(f"""
+        SELECT id, vorname, nachname, position, skills, sprachen, zertifikate
+        FROM mitarbeiter
+        {condition}
+    """, params)
+    employees = {row[0]: dict(zip(('id', 'vorname', 'nachname', 'position', 'skills', 'sprachen', 'zertifikate'), row),
+                              projects=[], trainings=[])
+                 for row in cursor.fetchall()}
+    if not employees:
+        return employees
+    selected = list(employees)
+
+    cursor.execute("""
+        SELECT mitarbeiter_id, rolle, beschreibung, verwendete_technologien
+        FROM projekterfahrungen
+        WHERE mitarbeiter_id = ANY(%s)
+    """, (selected,))
+    for employee_id, rolle, beschreibung, technologien in cursor.fetchall():
+        employees[employee_id]['projects'].append(
+            {'rolle': rolle, 'beschreibung': beschreibung, 'verwendete_technologien': technologien})
+
+    cursor.execute("""
+        SELECT mitarbeiter_id, thema, zertifikat
+        FROM weiterbildungen
+        WHERE mitarbeiter_id = ANY(%s)
+    """, (selected,))
+    for employee_id, thema, zertifikat in cursor.fetchall():
+        employees[employee_id]['trainings'].append({'thema': thema, 'zertifikat': zertifikat})
+    return employees
+
+
+def load_posting(conn, bid_id: int):
+    """A tender (ausschreibungen) as posting and the members of its project teams
+
+    Returns:
+        (posting, team_members), posting is None if the tender does not exist
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, titel, beschreibung, anforderungen FROM ausschreibungen WHERE id = %s", (bid_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None, set()
+        cursor.execute("""
+            SELECT tm.mitarbeiter_id
+            FROM team_mitglieder tm
+            JOIN projektteams p ON p.id = tm.projektteam_id
+            WHERE p.ausschreibung_id = %s
+        """, (bid_id,))
+        team_members = {member for (member,) in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return dict(zip(('id', 'titel', 'beschreibung', 'anforderungen'), row)), team_members
+
+
+class TalentMatcher:
+    """Ranks employees against a job posting by TF-IDF cosine similarity
+
+    Every employee is a sparse row of weighted features (skills, project
+    technologies, certificates, descriptions). The rows are kept in memory
+    and only employees changed since the last sync are reloaded: updated_at
+    of mitarbeiter, projekterfahrungen and weiterbildungen, plus employees
+    whose number of projects or trainings changed (deleted rows). The
+    normalized TF-IDF matrix is rebuilt from the rows after changes, and a
+    posting is scored against all employees with one sparse product.
+    """
+
+    def __init__(self, connect: Callable[[], Any], sync_interval: int = SYNC_INTERVAL):
+        """
+        Args:
+            connect: Returns a new connection to the HRMatrix database
+            sync_interval: Seconds between checks for changed employees
+        """
+        if np is None:
+            raise RuntimeError("numpy and scipy are required for talent matching")
+        self.connect = connect
+        self.sync_interval = sync_interval
+        self._vocabulary: Dict[str, int] = {}
+        self._features: List[str] = []
+        self._document_frequency: List[int] = []
+        self._rows: Dict[int, Dict[int, float]] = {}
+        self._names: Dict[int, str] = {}
+        # Number of projects and trainings per employee, to notice deleted rows
+        self._counts: Dict[int, Tuple[int, int]] = {}
+        self._watermark = None
+        self._checked_at = 0.0
+        self._matrix = None
+        self._ids = None
+        self._idf = None
+        self._lock = threading.Lock()
+        self._stats = {'matches': 0, 'syncs': 0, 'reloaded': 0, 'rebuilds': 0, 'last_match_ms': 0}
+
+    def match(self, posting: Dict[str, Any], k: int = 10,
+              team_members: Optional[Set[int]] = None) -> List[Dict[str, Any]]:
+        """Top k employees for a posting (titel, beschreibung, anforderungen)
+
+        Returns:
+            Candidates by descending score with an explanation: the
+            requirements they cover or miss and the features that contributed
+            most. Members of the posting's project teams are flagged in_team.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._sync()
+            matrix, ids, idf = self._weighted_matrix()
+            query = posting_features(posting)
+            columns = [self._vocabulary[feature] for feature in query if feature in self._vocabulary]
+            if matrix.shape[0] == 0 or not columns:
+                return []
+
+            columns_array = np.array(columns)
+            weights = np.array([math.log1p(query[self._features[column]]) for column in columns]) * idf[columns_array]
+            # Features no employee has cannot change the ranking and are left out of the query vector
+            weights /= np.linalg.norm(weights)
+            subset = matrix[:, columns_array].tocsr()
+            scores = np.asarray(subset @ weights).ravel()
+
+            k = min(k, int(np.count_nonzero(scores)))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            results = []
+            for position in top:
+                employee_id = int(ids[position])
+                contributions = subset[position].toarray().ravel() * weights
+                best = np.argsort(-contributions)[:EXPLAIN_FEATURES]
+                matched, missing = self._coverage(posting.get('anforderungen') or [], self._rows[employee_id])
+                results.append({
+                    'mitarbeiter_id': employee_id,
+                    'name': self._names.get(employee_id),
+                    'score': round(float(scores[position]), 4),
+                    'in_team': employee_id in (team_members or ()),
+                    'explanation': {
+                        'matched_requirements': matched,
+                        'missing_requirements': missing,
+                        'top_features': [{'feature': self._features[columns[index]],
+                                          'contribution': round(float(contributions[index]), 4)}
+                                         for index in best if contributions[index] > 0]
+                    }
+                })
+            self._stats['matches'] += 1
+            self._stats['last_match_ms'] = round((time.monotonic() - started) * 1000, 1)
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            return {**self._stats, 'employees': len(self._rows), 'features': len(self._features)}
+
+    def _coverage(self, requirements: List[str], row: Dict[int, float]):
+        matched, missing = [], []
+        for requirement in requirements:
+            found = term_features(requirement)
+            column = self._vocabulary.get(found[0]) if found else None
+            (matched if column is not None and column in row else missing).append(requirement)
+        return matched, missing
+
+    def _sync(self):
+        """Reload employees changed since the last sync (all on the first call)"""
+        if time.monotonic() - self._checked_at < self.sync_interval and self._watermark is not None:
+            return
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT CURRENT_TIMESTAMP")
+            now = cursor.fetchone()[0]
+            if self._watermark is None:
+                changed = load_profiles(cursor)
+                removed = set(self._rows) - set(changed)
+            else:
+                since = self._watermark - timedelta(seconds=SYNC_OVERLAP)
+                cursor.execute("""
+                    SELECT id FROM mitarbeiter WHERE updated_at > %s
+                    UNION SELECT mitarbeiter_id FROM projekterfahrungen WHERE updated_at > %s
+                    UNION SELECT mitarbeiter_id FROM weiterbildungen WHERE updated_at > %s
+                """, (since, since, since))
+                ids = {row[0] for row in cursor.fetchall() if row[0] is not None}
+
+                # Deleted employees, projects and trainings leave no updated_at behind
+                cursor.execute("""
+                    SELECT m.id, COALESCE(p.count, 0), COALESCE(w.count, 0)
+                    FROM mitarbeiter m
+                    LEFT JOIN (SELECT mitarbeiter_id, COUNT(*) AS count FROM projekterfahrungen
+                               GROUP BY mitarbeiter_id) p ON p.mitarbeiter_id = m.id
+                    LEFT JOIN (SELECT mitarbeiter_id, COUNT(*) AS count FROM weiterbildungen
+                               GROUP BY mitarbeiter_id) w ON w.mitarbeiter_id = m.id
+                """)
+                counts = {employee_id: (projects, trainings) for employee_id, projects, trainings in cursor.fetchall()}
+                ids |= {employee_id for employee_id, count in counts.items() if self._counts.get(employee_id) != count}
+                ids |= set(self._rows) - set(counts)
+                changed = load_profiles(cursor, list(ids)) if ids else {}
+                removed = ids - set(changed)
+            self._apply(changed, removed)
+            cursor.close()
+        finally:
+            connection.close()
+
+        self._watermark = now
+        self._checked_at = time.monotonic()
+        self._stats['syncs'] += 1
+
+    def _apply(self, changed: Dict[int, Dict[str, Any]], removed: Set[int]):
+        for employee_id in removed:
+            self._remove(employee_id)
+        for employee_id, employee in changed.items():
+            self._remove(employee_id)
+            self._add(employee_id, employee)
+        if changed or removed:
+            self._matrix = None
+            self._stats['reloaded'] += len(changed)
+            logger.info(f"Talent matching: {len(changed)} employees reloaded, {len(removed)} removed")
+
+    def _add(self, employee_id: int, employee: Dict[str, Any]):
+        row = {}
+        for feature, weight in profile_features(employee).items():
+            column = self._vocabulary.get(feature)
+            if column is None:
+                column = self._vocabulary[feature] = len(self._features)
+                self._features.append(feature)
+                self._document_frequency.append(0)
+            self._document_frequency[column] += 1
+            row[column] = math.log1p(weight)
+        self._rows[employee_id] = row
+        self._counts[employee_id] = (len(employee.get('projects') or []), len(employee.get('trainings') or []))
+        self._names[employee_id] = f"{employee.get('vorname') or ''} {employee.get('nachname') or ''}".strip()
+
+    def _remove(self, employee_id: int):
+        for column in self._rows.pop(employee_id, {}):
+            self._document_frequency[column] -= 1
+        self._names.pop(employee_id, None)
+        self._counts.pop(employee_id, None)
+
+    def _weighted_matrix(self):
+        """Row-normalized TF-IDF matrix (CSR), employee ids per row and the idf vector"""
+        if self._matrix is not None:
+            return self._matrix, self._ids, self._idf
+        ids = np.fromiter(self._rows, dtype=np.int64, count=len(self._rows))
+        lengths = np.fromiter((len(self._rows[employee_id]) for employee_id in ids), dtype=np.int64, count=len(ids))
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.fromiter((column for employee_id in ids for column in self._rows[employee_id]),
+                              dtype=np.int64, count=int(indptr[-1]))
+        data = np.fromiter((weight for employee_id in ids for weight in self._rows[employee_id].values()),
+                           dtype=np.float64, count=int(indptr[-1]))
+        idf = np.log((1 + len(ids)) / (1 + np.array(self._document_frequency, dtype=np.float64))) + 1
+        matrix = sparse.csr_matrix((data * idf[indices], indices, indptr), shape=(len(ids), len(self._features)))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        matrix = sparse.diags(1 / norms) @ matrix
+        self._matrix, self._ids, self._idf = matrix.tocsc(), ids, idf
+        self._stats['rebuilds'] += 1
+        return self._matrix, self._ids, self._idf
+
+
+_talent_matcher: Optional[TalentMatcher] = None
+_talent_matcher_lock = threading.Lock()
+
+
+def get_talent_matcher(connect: Callable[[], Any]) -> TalentMatcher:
+    """Process-wide matcher; connect is used by the first call"""
+    global _talent_matcher
+    with _talent_matcher_lock:
+        if _talent_matcher is None:
+            _talent_matcher = TalentMatcher(connect)
+        return _talent_matcher
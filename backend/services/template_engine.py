@@ -0,0 +1,256 @@
+import io
+import os
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from jinja2 import ChainableUndefined, TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+
+try:
+    import docx
+except ImportError:  # optional dependency, only needed for DOCX export
+    docx = None
+
+logger = logging.getLogger(__name__)
+
+MIMETYPES = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+PAGE_MARGIN = 48  # points around the content of each PDF page
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+
+class TemplateRenderError(Exception):
+    """Raised for templates that cannot be compiled or rendered; the message is shown to users"""
+
+
+@dataclass
+class TemplateVariable:
+    name: str
+    required: bool = False
+    default: Optional[str] = None
+
+
+@dataclass
+class TemplateSource:
+    """A stored template: the cache key is (template_id, updated_at)"""
+    template_id: int
+    updated_at: Any
+    content: str
+    variables: List[TemplateVariable] = field(default_factory=list)
+
+    @property
+    def key(self) -> Tuple[int, str]:
+        return self.template_id, str(self.updated_at)
+
+
+class TemplateEngine:
+    """Renders CV data with stored templates into HTML, PDF or DOCX
+
+    Templates use Jinja syntax ({{ cv.personal_info.name }}, {% for %} …),
+    run in a sandbox because they are edited by users, and are compiled once
+    per version: the compiled callable is cached by template id and
+    updated_at, so editing a template invalidates its entry.
+    """
+
+    def __init__(self, cache_size: int = 128):
+        self.cache_size = cache_size
+        self.environment = SandboxedEnvironment(autoescape=True, undefined=ChainableUndefined,
+                                                trim_blocks=True, lstrip_blocks=True)
+        self._compiled: 'OrderedDict[Tuple[int, str], Callable[..., str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'compiled': 0, 'cache_hits': 0, 'rendered': 0}
+
+    def compile(self, source: TemplateSource) -> Callable[..., str]:
+        """Compiled render function of a template version (cached)"""
+        with self._lock:
+            render = self._compiled.get(source.key)
+            if render is not None:
+                self._compiled.move_to_end(source.key)
+                self._stats['cache_hits'] += 1
+                return render
+
+        try:
+            render = self.environment.from_string(source.content).render
+        except TemplateError as e:
+            raise TemplateRenderError(f"Template {source.template_id} is invalid: {e}")
+
+        with self._lock:
+            self._compiled[source.key] = render
+            self._stats['compiled'] += 1
+            while len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        return render
+
+    def render(self, source: TemplateSource, data: Dict[str, Any], fmt: str = 'html') -> bytes:
+        """Render one CV; data is the template context (see CVService.export_cv)
+
+        Raises:
+            TemplateRenderError: For invalid templates, missing required variables or unknown formats
+        """
+        if fmt not in MIMETYPES:
+            raise TemplateRenderError(f"Unknown export format '{fmt}' (available: {', '.join(MIMETYPES)})")
+        render = self.compile(source)
+
+        context = {variable.name: variable.default for variable in source.variables if variable.default is not None}
+        context.update(data)
+        missing = [variable.name for variable in source.variables if variable.required and not context.get(variable.name)]
+        if missing:
+            raise TemplateRenderError(f"Missing template variables: {', '.join(missing)}")
+
+        try:
+            html = render(**context)
+        except TemplateError as e:
+            raise TemplateRenderError(f"Template {source.template_id} could not be rendered: {e}")
+
+        with self._lock:
+            self._stats['rendered'] += 1
+        if fmt == 'pdf':
+            return html_to_pdf(html)
+        if fmt == 'docx':
+            return html_to_docx(html)
+        return html.encode('utf-8')
+
+    def render_many(self, source: TemplateSource, contexts: List[Dict[str, Any]], fmt: str = 'pdf') -> List[Any]:
+        """Render many CVs with one template, in the worker pool (EXPORT_WORKERS > 1)
+
+        Returns the documents in order; a CV that fails is returned as its
+        TemplateRenderError instead of failing the whole batch.
+        """
+        if len(contexts) < 2 or EXPORT_WORKERS < 2:
+            return [self._render_or_error(source, context, fmt) for context in contexts]
+        # Every worker compiles the template once and reuses it for its share of the batch
+        return list(get_export_pool().map(_render_job, [source] * len(contexts), contexts, [fmt] * len(contexts),
+                                          chunksize=max(1, len(contexts) // (4 * EXPORT_WORKERS))))
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {**self._stats, 'cached_templates': len(self._compiled)}
+
+    def _render_or_error(self, source, context, fmt):
+        try:
+            return self.render(source, context, fmt)
+        except TemplateRenderError as e:
+            return e
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Lay out HTML on A4 pages with PyMuPDF's Story"""
+    story = fitz.Story(html=html)
+    buffer = io.BytesIO()
+    writer = fitz.DocumentWriter(buffer)
+    mediabox = fitz.paper_rect('a4')
+    where = mediabox + (PAGE_MARGIN, PAGE_MARGIN, -PAGE_MARGIN, -PAGE_MARGIN)
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return buffer.getvalue()
+
+
+class _DocxBuilder(HTMLParser):
+    """Maps the block structure of rendered HTML to Word paragraphs (headings, lists, bold/italic runs)"""
+
+    HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+    BLOCKS = {'p', 'div', 'li', 'tr', 'section', 'header', 'footer', 'article', 'ul', 'ol', 'table'}
+    SKIP = {'style', 'script', 'head', 'title'}
+
+    def __init__(self, document):
+        super().__init__()
+        self.document = document
+        self.paragraph = None
+        self.bold = self.italic = self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif tag in self.HEADINGS:
+            self.paragraph = self.document.add_heading(level=self.HEADINGS[tag])
+        elif tag == 'li':
+            self.paragraph = self.document.add_paragraph(style='List Bullet')
+        elif tag in self.BLOCKS:
+            self.paragraph = None
+        elif tag == 'br' and self.paragraph is not None:
+            self.paragraph.add_run().add_break()
+        elif tag in ('b', 'strong'):
+            self.bold += 1
+        elif tag in ('i', 'em'):
+            self.italic += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif tag in self.HEADINGS or tag in self.BLOCKS:
+            self.paragraph = None
+        elif tag in ('b', 'strong'):
+            self.bold = max(0, self.bold - 1)
+        elif tag in ('i', 'em'):
+            self.italic = max(0, self.italic - 1)
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if self.skip or not text:
+            return
+        if self.paragraph is None:
+            self.paragraph = self.document.add_paragraph()
+        elif self.paragraph.runs:
+            text = " " + text
+        run = self.paragraph.add_run(text)
+        run.bold = bool(self.bold)
+        run.italic = bool(self.italic)
+
+
+def html_to_docx(html: str) -> bytes:
+    """Word document with the text structure of the HTML (styling is not carried over)"""
+    if docx is None:
+        raise TemplateRenderError("DOCX export requires python-docx")
+    document = docx.Document()
+    builder = _DocxBuilder(document)
+    builder.feed(html)
+    builder.close()
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_job(source: TemplateSource, context: Dict[str, Any], fmt: str):
+    # Runs in a pool worker: the process-wide engine keeps the compiled template between jobs
+    return get_template_engine()._render_or_error(source, context, fmt)
+
+
+_template_engine = None
+_export_pool = None
+_engine_lock = threading.Lock()
+
+
+def get_template_engine() -> TemplateEngine:
+    """Process-wide engine, cache size from TEMPLATE_CACHE_SIZE"""
+    global _template_engine
+    with _engine_lock:
+        if _template_engine is None:
+            _template_engine = TemplateEngine(int(os.getenv('TEMPLATE_CACHE_SIZE', '128')))
+        return _template_engine
+
+
+def get_export_pool() -> ProcessPoolExecutor:
+    """Worker processes for batch exports (EXPORT_WORKERS), started on first use"""
+    global _export_pool
+    with _engine_lock:
+        if _export_pool is None:
+            # spawn: workers do not inherit the server's sockets and locks
+            _export_pool = ProcessPoolExecutor(EXPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"Export pool started with {EXPORT_WORKERS} workers")
+        return _export_pool
@@ -2,6 +2,8 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
+from services.blob_store import get_blob_store
+
 logger = logging.getLogger(__name__)
 
 class WorkflowService:
@@ -234,6 +236,15 @@ class WorkflowService:
         try:
             cur = self.conn.cursor()
             
+            # Dateien der Anhänge merken, die Einträge werden mit den Tasks gelöscht
+            cur.execute("""
+            SELECT a.file_path
+            FROM task_attachments a
+            JOIN tasks t ON a.task_id = t.id
+            WHERE t.workflow_id = %s
+            """, (workflow_id,))
+            file_paths = [row[0] for row in cur.fetchall()]
+            
             # Löschen aller zugehörigen Tasks
             cur.execute("DELETE FROM tasks WHERE workflow_id = %s", (workflow_id,))
             
@@ -245,12 +256,29 @@ class WorkflowService:
             
             self.conn.commit()
             cur.close()
+            self._release_files(file_paths)
             return True
         except Exception as e:
             self.conn.rollback()
             logger.error(f"Fehler beim Löschen des Workflows {workflow_id}: {str(e)}")
             return False
     
+    def _release_files(self, file_paths: List[str]):
+        """Gibt die Blob-Referenzen gelöschter Anhänge frei (Dateien außerhalb des Blob-Stores bleiben liegen).
+        
+        Args:
+            file_paths: Die file_path-Werte der gelöschten Anhänge
+        """
+        blob_store = get_blob_store()
+        for file_path in file_paths:
+            sha256 = blob_store.resolve(file_path)
+            if not sha256:
+                continue
+            try:
+                blob_store.release(sha256)
+            except Exception as e:
+                logger.warning(f"Anhang {file_path} konnte nicht freigegeben werden: {str(e)}")
+    
     # Task-Management-Methoden
     
     def get_task_by_id(self, task_id: int) -> Dict[str, Any]:
@@ -663,6 +691,32 @@ class WorkflowService:
             logger.error(f"Fehler beim Hinzufügen des Anhangs zu Task {task_id}: {str(e)}")
             raise
     
+    def get_task_attachment(self, attachment_id: int) -> Optional[Dict[str, Any]]:
+        """Holt einen Anhang (Metadaten und Speicherort, nicht den Inhalt).
+        
+        Args:
+            attachment_id: Die ID des Anhangs
+            
+        Returns:
+            Das Anhang-Dictionary oder None, wenn es den Anhang nicht gibt
+        """
+        try:
+            cur = self.conn.cursor(dictionary=True)
+            
+            query = """
+            SELECT id, task_id, file_name, file_path, file_type, file_size
+            FROM task_attachments
+            WHERE id = %s
+            """
+            cur.execute(query, (attachment_id,))
+            attachment = cur.fetchone()
+            
+            cur.close()
+            return attachment
+        except Exception as e:
+            logger.error(f"Fehler beim Abrufen des Anhangs {attachment_id}: {str(e)}")
+            raise
+    
     def get_user_tasks(self, user_id: int, status: Optional[str] = None) -> List[Dict[str, Any]]:
         """Holt alle Tasks eines Benutzers.
         
@@ -0,0 +1,37 @@
+import argparse
+import importlib.util
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+STUB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'llm_stub_server.py')
+STUB_DEFAULTS = {'latency': 0.0, 'token_delay': 0.0, 'load_time': 0.0, 'fail_first': 0, 'error_rate': 0.0}
+
+
+@pytest.fixture
+def llm_stub():
+    """Starts scripts/llm_stub_server.py on a free port: llm_stub(reply=None, **options)
+
+    The server has .url and .stats (the request counters of its own module copy).
+    """
+    servers = []
+
+    def start(reply=None, **options):
+        spec = importlib.util.spec_from_file_location('llm_stub_server', STUB_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), module.StubHandler)
+        server.options = argparse.Namespace(**{**STUB_DEFAULTS, **options}, quiet=True)
+        server.reply = reply
+        server.url = f"http://127.0.0.1:{server.server_port}"
+        server.stats = module.STATS
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
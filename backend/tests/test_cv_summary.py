@@ -0,0 +1,39 @@
+import pytest
+
+from services.cv_summary import SUMMARY_COLUMNS, SUMMARY_VERSION, summarize, summary_row
+
+
+def test_summary_of_well_formed_data():
+    summary = summarize({
+        'personal_data': {'first_name': 'Anna', 'last_name': 'Muster'},
+        'experience': [{'title': 'Developer', 'company': 'A', 'end_date': '2020-01'},
+                       {'title': 'Lead', 'company': 'B', 'end_date': 'heute'}],
+        'skills': {'technical': ['Python', 'SQL', 'Go', 'Rust', 'Java', 'C']}
+    })
+
+    assert summary['display_name'] == 'Anna Muster'
+    assert (summary['current_position'], summary['current_company']) == ('Lead', 'B')
+    assert summary['top_skills'] == ['Python', 'SQL', 'Go', 'Rust', 'Java']
+    assert summary['skill_count'] == 6
+
+
+@pytest.mark.parametrize('extracted', [
+    None, 'text', [], {'personal_info': 'Anna'}, {'personal_data': {'name': {'first': 'Anna'}}},
+    {'experience': 'Developer'}, {'experience': [None, 'x', {'title': {'de': 'Lead'}}]},
+    {'skills': 5}, {'skills': {'technical': [None, {'name': 'Go'}]}}
+])
+def test_malformed_data_gives_empty_fields(extracted):
+    assert summary_row(extracted) == (None, None, None, [], 0, SUMMARY_VERSION)
+
+
+def test_scalars_and_lists_are_coerced():
+    summary = summarize({
+        'personal_data': {'name': ['Anna', 'Muster']},
+        'experience': {'title': 42, 'company': 7},
+        'skills': 'Python, SQL'
+    })
+
+    assert summary['display_name'] == 'Anna Muster'
+    assert (summary['current_position'], summary['current_company']) == ('42', '7')
+    assert summary['top_skills'] == ['Python', 'SQL']
+    assert len(summary_row({})) == len(SUMMARY_COLUMNS)
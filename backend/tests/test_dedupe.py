@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from services.dedupe import DuplicateIndex, Fingerprint, NUM_PERM, hamming, jaccard
+
+WORDS = ("python java sql docker kubernetes projekt leitung entwicklung kunde bank versicherung "
+         "architektur migration cloud azure aws scrum team analyse betrieb wartung schnittstelle "
+         "datenbank frontend backend react angular test automatisierung beratung konzept").split()
+
+
+def cv_text(seed, length=400):
+    generator = random.Random(seed)
+    return " ".join(generator.choice(WORDS) for _ in range(length))
+
+
+def edited(text, changes, seed=0):
+    """text with `changes` words replaced"""
+    generator = random.Random(seed)
+    words = text.split()
+    for index in generator.sample(range(len(words)), changes):
+        words[index] = f"neu{index}"
+    return " ".join(words)
+
+
+@pytest.fixture
+def index():
+    index = DuplicateIndex(threshold=0.8)
+    index.add(1, 10, Fingerprint.from_text(cv_text(1), content_hash='a' * 64))
+    index.add(2, 10, Fingerprint.from_text(cv_text(2)))
+    return index
+
+
+def test_same_file_of_the_same_owner(index):
+    assert index.find_file('a' * 64, 10).cv_id == 1
+    assert index.find_file('a' * 64, 11) is None
+
+
+def test_layout_and_case_do_not_matter(index):
+    text = cv_text(1).upper().replace(' ', '\n  ', 50)
+
+    match = index.find(Fingerprint.from_text(text), 10)
+
+    assert (match.cv_id, match.kind, match.similarity) == (1, 'text', 1.0)
+
+
+def test_small_edit_is_a_near_duplicate(index):
+    match = index.find(Fingerprint.from_text(edited(cv_text(1), 4)), 10)
+
+    assert (match.cv_id, match.kind) == (1, 'similar')
+    assert match.similarity >= 0.8
+
+
+def test_other_cvs_and_other_owners_do_not_match(index):
+    assert index.find(Fingerprint.from_text(cv_text(3)), 10) is None
+    assert index.find(Fingerprint.from_text(edited(cv_text(1), 4)), 11) is None
+
+
+def test_heavy_edit_is_not_a_duplicate(index):
+    assert index.find(Fingerprint.from_text(edited(cv_text(1), 200)), 10) is None
+
+
+def test_removed_cv_is_not_found(index):
+    index.remove(1)
+
+    assert index.find(Fingerprint.from_text(cv_text(1)), 10) is None
+    assert index.find_file('a' * 64, 10) is None
+    assert len(index) == 1
+
+
+def test_reordered_sections_keep_the_simhash():
+    sections = [cv_text(seed, 80) for seed in range(4)]
+
+    original = Fingerprint.from_text("\n".join(sections))
+    reordered = Fingerprint.from_text("\n".join(reversed(sections)))
+
+    assert hamming(original.simhash, reordered.simhash) == 0
+    assert jaccard(original.minhash, reordered.minhash) > 0.9
+
+
+def test_minhash_bytes_round_trip():
+    fingerprint = Fingerprint.from_text(cv_text(1))
+
+    restored = Fingerprint.minhash_from_bytes(fingerprint.minhash_bytes())
+
+    assert restored == fingerprint.minhash
+    assert len(restored) == NUM_PERM
@@ -0,0 +1,129 @@
+import pytest
+
+from services import document_versions
+from services.cache import TTLCache
+from services.document_versions import DocumentVersionService, apply_delta, make_delta
+
+
+class FakeCursor:
+    """The queries of DocumentVersionService on an in-memory document_versions table"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        if query.startswith('SELECT pg_advisory_xact_lock'):
+            self.result = [(None,)]
+        elif query.startswith('SELECT version_number, COALESCE(snapshot_version'):
+            rows = [row for row in self.rows if row['document_id'] == params[0]]
+            self.result = [(rows[-1]['version_number'], rows[-1]['snapshot_version'])] if rows else []
+        elif query.startswith('SELECT COUNT(*), COALESCE(SUM(LENGTH(content)) FILTER'):
+            snapshot, document_id, _ = params
+            chain = [row for row in self.rows
+                     if row['document_id'] == document_id and row['snapshot_version'] == snapshot]
+            self.result = [(len(chain),
+                            sum(len(row['content']) for row in chain if row['storage'] == 'delta'),
+                            max(row['content_size'] for row in chain if row['version_number'] == snapshot))]
+        elif query.startswith('INSERT INTO document_versions'):
+            columns = ('document_id', 'version_number', 'content', 'storage', 'snapshot_version',
+                       'content_size', 'content_hash', 'created_by')
+            self.rows.append(dict(zip(columns, params)))
+        elif query.startswith('SELECT v.version_number, v.storage'):
+            document_id, version_number = params
+            target = next((row for row in self.rows if row['document_id'] == document_id
+                           and row['version_number'] == version_number), None)
+            self.result = [] if target is None else [
+                (row['version_number'], row['storage'], row['content'], target['content_hash'])
+                for row in self.rows if row['document_id'] == document_id
+                and target['snapshot_version'] <= row['version_number'] <= version_number]
+        elif query.startswith('SELECT version_number, storage, content_size'):
+            self.result = [(row['version_number'], row['storage'], row['content_size'], row['content_hash'],
+                            None, row['created_by'])
+                           for row in reversed(self.rows) if row['document_id'] == params[0]]
+        elif query.startswith('SELECT MAX(version_number)'):
+            versions = [row['version_number'] for row in self.rows if row['document_id'] == params[0]]
+            self.result = [(max(versions) if versions else None,)]
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rows = []
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(document_versions, '_contents', TTLCache(ttl=600, maxsize=256))
+    monkeypatch.setattr(document_versions, 'SNAPSHOT_INTERVAL', 3)
+    return DocumentVersionService(FakeConnection())
+
+
+def document(changed=()):
+    return "".join(f"Zeile {number}{' geändert' if number in changed else ''}\n" for number in range(40))
+
+
+@pytest.mark.parametrize('base, target', [
+    ('', ''),
+    ('', 'neu\n'),
+    ('a\nb\nc\n', ''),
+    ('a\nb\nc\n', 'a\nx\nc\n'),
+    ('a\nb\nc', 'a\nb\nc\nd'),
+    ('a\r\nb\r\n', 'a\r\nc\r\nb\r\n'),
+    ('Müller\nÄrger\n', 'Ärger\nMüller\n'),
+    (document(), document(changed={0, 17, 39})),
+])
+def test_delta_round_trip(base, target):
+    assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_delta_of_small_change_is_small():
+    delta = make_delta(document(), document(changed={17}))
+
+    assert len(delta) < 50
+
+
+def test_versions_roll_over_to_snapshots(service):
+    contents = [document(changed={number}) for number in range(7)]
+    versions = [service.add_version(1, content) for content in contents]
+
+    assert versions == list(range(1, 8))
+    storages = [version['storage'] for version in reversed(service.list_versions(1))]
+    assert storages == ['full', 'delta', 'delta', 'full', 'delta', 'delta', 'full']
+
+    document_versions._contents.clear()
+    assert [service.get_version(1, version) for version in versions] == contents
+    assert service.get_version(1) == contents[-1]
+
+
+def test_large_change_starts_a_snapshot(service):
+    service.add_version(1, document())
+    service.add_version(1, document() + "Anhang\n" * 40)
+
+    assert [version['storage'] for version in service.list_versions(1)] == ['full', 'full']
+
+
+def test_unchanged_content_adds_no_version(service):
+    assert service.add_version(1, document()) == 1
+    assert service.add_version(1, document()) == 1
+    assert service.get_version(2) is None
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from services import json_provider
+from services.json_provider import FastJSONProvider, RawJSON, dumps_bytes
+
+# (use orjson, orjson.Fragment available)
+ENCODERS = {'stdlib': (False, False), 'orjson-spliced': (True, False), 'orjson-fragment': (True, True)}
+
+
+@pytest.fixture(params=list(ENCODERS.values()), ids=list(ENCODERS))
+def encoder(request, monkeypatch):
+    use_orjson, has_fragment = request.param
+    if use_orjson and json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    if has_fragment and not hasattr(json_provider.orjson, 'Fragment'):
+        pytest.skip("orjson.Fragment requires orjson >= 3.10")
+    monkeypatch.setattr(json_provider, '_USE_ORJSON', use_orjson)
+    monkeypatch.setattr(json_provider, '_HAS_FRAGMENT', has_fragment)
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+
+    @app.route('/cv')
+    def cv():
+        return jsonify({'id': 1, 'extracted_data': RawJSON('{"name": "Anna", "skills": ["Python"]}'),
+                        'skills': RawJSON(b'["SQL"]'), 'file_name': 'a.pdf'})
+
+    return app.test_client()
+
+
+def test_raw_json_is_embedded_as_object(encoder, client):
+    data = json.loads(client.get('/cv').data)
+
+    assert data['extracted_data'] == {'name': 'Anna', 'skills': ['Python']}
+    assert data['skills'] == ['SQL']
+    assert data['file_name'] == 'a.pdf'
+
+
+def test_raw_json_in_lists_and_nested(encoder):
+    data = json.loads(dumps_bytes([RawJSON('1'), {'a': [RawJSON('{"b": null}')]}, 'text']))
+
+    assert data == [1, {'a': [{'b': None}]}, 'text']
+
+
+def test_placeholder_lookalikes_are_left_alone(encoder):
+    data = json.loads(dumps_bytes({'text': '"0:1"', 'raw': RawJSON('true')}))
+
+    assert data == {'text': '"0:1"', 'raw': True}
@@ -0,0 +1,75 @@
+import pytest
+
+from services.json_repair import JSONRepairError, repair_json
+
+
+def test_valid_json_in_code_fence():
+    result = repair_json('```json\n{"name": "Anna", "skills": ["Python"]}\n```')
+
+    assert result.valid and result.complete
+    assert result.data == {'name': 'Anna', 'skills': ['Python']}
+
+
+def test_text_around_the_value():
+    result = repair_json('Here is the data: {"a": [1, 2]} Hope this helps!')
+
+    assert not result.valid and result.complete
+    assert result.data == {'a': [1, 2]}
+
+
+def test_trailing_commas_are_dropped():
+    result = repair_json('{"a": [1, 2, ], "b": {"c": "d",\n},}')
+
+    assert result.complete
+    assert result.data == {'a': [1, 2], 'b': {'c': 'd'}}
+
+
+def test_commas_inside_strings_are_kept():
+    result = repair_json('{"skills": ["C, ]", "Go"], "note": "a,}", "x": "y')
+
+    assert result.data == {'skills': ['C, ]', 'Go'], 'note': 'a,}', 'x': 'y'}
+
+
+def test_truncated_string_value_is_closed():
+    result = repair_json('{"name": "Anna", "summary": "Developer with ten ye')
+
+    assert not result.complete
+    assert result.data == {'name': 'Anna', 'summary': 'Developer with ten ye'}
+    assert result.truncated_keys == ['summary']
+
+
+def test_truncated_key_is_dropped():
+    result = repair_json('{"name": "Anna", "experience": [{"title": "Dev"}], "ski')
+
+    assert result.data == {'name': 'Anna', 'experience': [{'title': 'Dev'}]}
+    assert result.truncated_keys == []
+
+
+def test_truncated_nested_value_reports_its_top_level_key():
+    result = repair_json('{"name": "Anna", "experience": [{"title": "Dev", "years": 3}, {"title": "Le')
+
+    assert result.data['experience'] == [{'title': 'Dev', 'years': 3}, {'title': 'Le'}]
+    assert result.truncated_keys == ['experience']
+
+
+def test_cut_literal_is_dropped():
+    result = repair_json('{"a": [1, 2, 3')
+
+    assert result.data == {'a': [1, 2]}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"city": "M\\u00fcnchen", "x": "a\\u00f', 'a'),
+    ('{"city": "M\\u00fcnchen", "x": "a\\u', 'a'),
+    ('{"city": "M\\u00fcnchen", "x": "a\\', 'a'),
+    ('{"city": "M\\u00fcnchen", "x": "a\\u00fc', 'aü'),
+])
+def test_cut_escape_sequences_are_dropped(text, expected):
+    result = repair_json(text)
+
+    assert result.data == {'city': 'München', 'x': expected}
+
+
+def test_no_json_raises():
+    with pytest.raises(JSONRepairError):
+        repair_json('Sorry, I cannot help with that.')
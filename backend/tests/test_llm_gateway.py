@@ -0,0 +1,95 @@
+import pytest
+
+from services.llm_gateway import LLMError, LLMGateway, message_content
+
+MESSAGES = [{'role': 'user', 'content': 'Hallo'}]
+
+
+@pytest.fixture
+def gateway_for(monkeypatch):
+    """LLMGateway against a stub server, without rate limits and with short backoff"""
+    monkeypatch.setenv('LLM_BACKOFF_BASE', '0.01')
+    gateways = []
+
+    def create(server, **options):
+        gateway = LLMGateway(api_key='test', base_url=f"{server.url}/v1", model='stub',
+                             requests_per_minute=0, **{'max_retries': 3, **options})
+        gateways.append(gateway)
+        return gateway
+
+    yield create
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_rate_limited_requests_are_retried(llm_stub, gateway_for):
+    server = llm_stub('Antwort', fail_first=2)
+    gateway = gateway_for(server)
+
+    assert gateway.complete(MESSAGES) == 'Antwort'
+    assert server.stats['requests'] == 3
+    stats = gateway.stats()
+    assert (stats['api_calls'], stats['retries'], stats['errors']) == (3, 2, 0)
+
+
+def test_error_after_the_last_retry(llm_stub, gateway_for):
+    server = llm_stub('Antwort', fail_first=5)
+    gateway = gateway_for(server, max_retries=1)
+
+    with pytest.raises(LLMError) as error:
+        gateway.chat(MESSAGES)
+
+    assert error.value.status_code == 429
+    assert server.stats['requests'] == 2
+    assert gateway.stats()['errors'] == 1
+
+
+def test_identical_requests_in_flight_are_coalesced(llm_stub, gateway_for):
+    server = llm_stub('Antwort', latency=0.3)
+    gateway = gateway_for(server)
+
+    responses = gateway.chat_many([{'messages': MESSAGES}] * 5)
+
+    assert [message_content(response) for response in responses] == ['Antwort'] * 5
+    assert server.stats['requests'] == 1
+    assert gateway.stats()['coalesced'] == 4
+
+
+def test_coalescing_can_be_disabled(llm_stub, gateway_for):
+    server = llm_stub('Antwort', latency=0.1)
+    gateway = gateway_for(server)
+
+    gateway.chat_many([{'messages': MESSAGES, 'coalesce': False}] * 3)
+
+    assert server.stats['requests'] == 3
+
+
+def test_different_requests_are_not_coalesced(llm_stub, gateway_for):
+    server = llm_stub(latency=0.1)
+    gateway = gateway_for(server)
+
+    responses = gateway.chat_many([{'messages': [{'role': 'user', 'content': text}]} for text in 'abc'])
+
+    assert [message_content(response) for response in responses] == [f"Stub reply to: {text}" for text in 'abc']
+    assert server.stats['requests'] == 3
+
+
+def test_stream_is_retried_before_the_first_token(llm_stub, gateway_for):
+    server = llm_stub('Eine gestreamte Antwort', fail_first=1)
+    gateway = gateway_for(server)
+
+    pieces = list(gateway.stream(MESSAGES))
+
+    assert ''.join(pieces) == 'Eine gestreamte Antwort'
+    assert len(pieces) == 3
+    assert gateway.stats()['retries'] == 1
+
+
+def test_backoff_honors_retry_after_and_caps_the_delay():
+    gateway = LLMGateway(api_key='test', base_url='http://127.0.0.1:9')
+    gateway.backoff_base, gateway.backoff_max = 0.5, 4.0
+
+    assert gateway._backoff(0, '2') == 2.0
+    assert gateway._backoff(0, '60') == 4.0
+    assert all(0 <= gateway._backoff(attempt) <= min(4.0, 0.5 * 2 ** attempt)
+               for attempt in range(8) for _ in range(20))
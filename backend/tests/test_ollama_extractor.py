@@ -0,0 +1,54 @@
+import json
+import threading
+
+import pytest
+
+from services.ollama_extractor import OllamaExtractor
+
+REPLY = {'personal_data': {'first_name': 'Anna', 'last_name': 'Muster'},
+         'skills': {'technical': ['Python', 'SQL'], 'languages': ['Deutsch']}}
+
+
+@pytest.fixture
+def stub(llm_stub):
+    return llm_stub(json.dumps(REPLY), latency=0.2, load_time=0.3)
+
+
+@pytest.fixture
+def extractor(stub, monkeypatch):
+    monkeypatch.setenv('OLLAMA_MAX_CONCURRENCY', '2')
+    extractor = OllamaExtractor(model='stub', base_url=stub.url, warm_up=False)
+    yield extractor
+    extractor.close()
+
+
+def test_warm_up_loads_the_model_once(stub, extractor):
+    assert extractor.warm_up()
+    assert extractor.warm.is_set()
+
+    extractor.chat([{'role': 'user', 'content': 'Test'}])
+
+    assert stub.stats['model_loads'] == 1
+    assert extractor.stats()['cold_loads'] == 0
+
+
+def test_extract_cv_data_parses_the_streamed_reply(stub, extractor):
+    data = extractor.extract_cv_data("Anna Muster\nSkills: Python, SQL")
+
+    assert data == REPLY
+    stats = extractor.stats()
+    assert stats['requests'] == 1 and stats['errors'] == 0 and stats['repaired'] == 0
+    assert stats['eval_tokens'] > 0
+
+
+def test_concurrent_requests_are_capped(stub, extractor):
+    extractor.warm_up()
+    threads = [threading.Thread(target=extractor.chat, args=([{'role': 'user', 'content': str(n)}],))
+               for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.stats['max_in_flight'] == 2
+    assert extractor.stats()['requests'] == 6
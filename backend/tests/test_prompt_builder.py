@@ -0,0 +1,30 @@
+import pytest
+
+from services.prompt_builder import PromptBuilder
+
+
+@pytest.fixture
+def builder():
+    return PromptBuilder(model='gpt-4', context_tokens=4000, completion_tokens=1000)
+
+
+def test_split_keeps_the_order_around_an_overlong_line(builder):
+    text = 'first\n' + 'x' * 6000 + '\nlast'
+
+    pieces = builder._split(text, 500)
+
+    assert pieces[0] == 'first' and pieces[-1] == 'last'
+    assert ''.join(pieces[1:-1]) == 'x' * 6000
+    assert all(builder.count_tokens(piece) <= 500 for piece in pieces)
+
+
+def test_plan_fits_small_cv_in_one_chunk(builder):
+    chunks = builder.plan('Anna Muster\nPython developer', ['personal_data', 'skills'], 500)
+
+    assert len(chunks) == 1
+    assert chunks[0].fields == ['personal_data', 'skills']
+
+
+def test_plan_rejects_a_context_window_without_room_for_text(builder):
+    with pytest.raises(ValueError, match='Context window too small'):
+        builder.plan('Anna Muster', ['skills'], 3000)
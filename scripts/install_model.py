@@ -1,26 +1,48 @@
-import requests
+import os
+import sys
 import json
+import argparse
+import requests
 
-def install_mistral():
-    url = "http://localhost:11434/api/pull"
+def install_model(model, base_url):
+    url = f"{base_url.rstrip('/')}/api/pull"
     data = {
-        "name": "mistral"
+        "name": model
     }
-    
-    print("Starting Mistral model installation...")
+
+    print(f"Starting {model} model installation...")
     try:
         response = requests.post(url, json=data, stream=True)
-        
+
         if response.status_code == 200:
             for line in response.iter_lines():
                 if line:
                     print(json.loads(line))
             print("Installation completed successfully!")
+            return True
         else:
             print(f"Error: {response.status_code}")
             print(response.text)
     except Exception as e:
         print(f"Error: {str(e)}")
+    return False
+
+def warm_up(model, base_url, keep_alive):
+    """Load the model into memory so the first extraction does not wait for it"""
+    response = requests.post(f"{base_url.rstrip('/')}/api/generate",
+                             json={"model": model, "keep_alive": keep_alive})
+    response.raise_for_status()
+    print(f"{model} loaded (keep_alive {keep_alive})")
 
 if __name__ == "__main__":
-    install_mistral() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pull an Ollama model for CV extraction")
+    parser.add_argument("model", nargs="?", default=os.getenv("OLLAMA_MODEL", "mistral"))
+    parser.add_argument("--base-url", default=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    parser.add_argument("--warm-up", action="store_true", help="Load the model after pulling it")
+    parser.add_argument("--keep-alive", default=os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+    args = parser.parse_args()
+
+    if not install_model(args.model, args.base_url):
+        sys.exit(1)
+    if args.warm_up:
+        warm_up(args.model, args.base_url, args.keep_alive)